@@ -0,0 +1,158 @@
+"""
+Benchmark dos cleaners em árvores falsas (roda em Linux):
+
+    python -m benchmarks.bench_cleanup --files 500 --profiles 3
+    python -m benchmarks.bench_cleanup --compare benchmarks/results/a.json benchmarks/results/b.json
+
+Cenários: resolução dos alvos, varredura, pré-visualização (com e sem
+filtro de idade, e no modo orçamento), análise de uso de disco e exclusão
+por backend, mais o cache de miniaturas. Cada
+um reporta arquivos/s, bytes/s e pico de memória (tracemalloc); o
+resultado vai para um JSON comparável entre commits.
+"""
+from __future__ import annotations
+import os, sys, json, time, shutil, argparse, platform, tempfile, tracemalloc, subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.fake_tree import TreeSpec, build_tree
+from system import metrics
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+def _git_commit() -> str | None:
+    try:
+        p = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True, text=True)
+        return p.stdout.strip() or None
+    except OSError:
+        return None
+
+def _measure(name: str, fn, repeat: int = 1) -> dict:
+    """Roda `fn() -> (arquivos, bytes)` num span e mede tempo, vazão e pico de memória."""
+    best = None
+    for _ in range(repeat):
+        tracemalloc.start()
+        cpu = time.process_time()   # processo todo: os workers de varredura também contam
+        with metrics.span(f"bench.{name}") as sp:
+            files, nbytes = fn()
+            sp.add(files=files, bytes=nbytes)
+        wall = sp.wall; cpu = time.process_time() - cpu
+        _, peak = tracemalloc.get_traced_memory(); tracemalloc.stop()
+        run = {'scenario': name, 'files': files, 'bytes': nbytes, 'seconds': round(wall, 4),
+               'cpu_seconds': round(cpu, 4), 'subprocess_seconds': round(sp.subprocess, 4),
+               'files_per_s': round(files / wall, 1) if wall else 0.0,
+               'bytes_per_s': round(nbytes / wall, 1) if wall else 0.0, 'peak_mem_bytes': peak}
+        if best is None or run['seconds'] < best['seconds']: best = run
+    return best
+
+class Bench:
+    def __init__(self, spec: TreeSpec, workdir: str):
+        self.spec = spec; self.workdir = workdir; self.tree_stats = None
+
+    def fresh_tree(self) -> None:
+        base = os.path.join(self.workdir, 'tree')
+        shutil.rmtree(base, ignore_errors=True)
+        env, self.tree_stats = build_tree(base, self.spec)
+        os.environ.update(env)
+        from system.targets import resolve_targets
+        resolve_targets(0)   # descarta a resolução em cache da árvore anterior
+
+    def run(self, scenarios: list[str], modes: list[str], repeat: int) -> list[dict]:
+        from system import caches
+        from system.scanner import iter_batches
+        from system.budget import ByteBudget
+        results: list[dict] = []
+        self.fresh_tree()
+
+        def usage():
+            from system.disk_usage import disk_usage
+            tree = disk_usage(os.path.join(self.workdir, 'tree'))
+            return tree.total_files[0], tree.total_bytes[0]
+
+        def scan():
+            count = total = 0
+            for batch in iter_batches(caches.enumerate_browser_cache_paths()):
+                count += len(batch); total += sum(fe[1] for fe in batch)
+            return count, total
+
+        def resolve():
+            from system.targets import resolve_targets
+            paths = resolve_targets(0).group(caches.GROUP_BROWSER)
+            return len(paths), 0
+        read_only = {
+            'resolve': resolve,
+            'scan': scan,
+            'dry-run': lambda: caches._delete_from_paths(caches.enumerate_browser_cache_paths(), True, 0),
+            'dry-run-aged': lambda: caches._delete_from_paths(caches.enumerate_browser_cache_paths(), True, 7),
+            'thumbs-dry-run': lambda: caches.clear_thumbnail_cache(dry_run=True),
+            'usage': usage,
+            'budget-dry-run': lambda: caches.clear_all_browser_caches(dry_run=True, budget=ByteBudget(1024 * 1024)),
+        }
+        for name, fn in read_only.items():
+            if name in scenarios: results.append(_measure(name, fn, repeat))
+        if 'delete' in scenarios:
+            for mode in modes:
+                self.fresh_tree()
+                results.append(_measure(f'delete-{mode}', lambda: caches._delete_from_paths(
+                    caches.enumerate_browser_cache_paths(), False, 0, mode=mode)))
+        if 'thumbs-delete' in scenarios:
+            self.fresh_tree()
+            results.append(_measure('thumbs-delete', lambda: caches.clear_thumbnail_cache(dry_run=False, mode='unlink')))
+        return results
+
+def compare(old_path: str, new_path: str) -> None:
+    with open(old_path, encoding='utf-8') as fh: old = {r['scenario']: r for r in json.load(fh)['results']}
+    with open(new_path, encoding='utf-8') as fh: new = json.load(fh)['results']
+    print(f"{'cenário':<18} {'antes (s)':>10} {'depois (s)':>10} {'Δ':>8}")
+    for r in new:
+        o = old.get(r['scenario'])
+        if not o: continue
+        delta = (r['seconds'] - o['seconds']) / o['seconds'] * 100 if o['seconds'] else 0.0
+        print(f"{r['scenario']:<18} {o['seconds']:>10.4f} {r['seconds']:>10.4f} {delta:>+7.1f}%")
+
+SCENARIOS = ('resolve', 'scan', 'usage', 'dry-run', 'dry-run-aged', 'budget-dry-run', 'delete', 'thumbs-dry-run',
+             'thumbs-delete')
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description="Benchmark dos cleaners de cache")
+    p.add_argument('--profiles', type=int, default=2)
+    p.add_argument('--files', type=int, default=200, help="arquivos por pasta de cache")
+    p.add_argument('--depth', type=int, default=2)
+    p.add_argument('--fanout', type=int, default=4)
+    p.add_argument('--median-size', type=int, default=8 * 1024)
+    p.add_argument('--sigma', type=float, default=1.5)
+    p.add_argument('--old-fraction', type=float, default=0.5)
+    p.add_argument('--seed', type=int, default=1234)
+    p.add_argument('--scenarios', default=','.join(SCENARIOS))
+    p.add_argument('--modes', default='unlink,tree', help="backends para o cenário delete")
+    p.add_argument('--repeat', type=int, default=3, help="repetições dos cenários só de leitura (vale o melhor)")
+    p.add_argument('--out', help="arquivo JSON (padrão: benchmarks/results/<commit>-<ts>.json)")
+    p.add_argument('--compare', nargs=2, metavar=('ANTES', 'DEPOIS'))
+    args = p.parse_args(argv)
+    if args.compare:
+        compare(*args.compare); return 0
+
+    spec = TreeSpec(profiles=args.profiles, files_per_cache=args.files, depth=args.depth, fanout=args.fanout,
+                    median_size=args.median_size, sigma=args.sigma, old_fraction=args.old_fraction, seed=args.seed)
+    scenarios = [s for s in args.scenarios.split(',') if s]
+    with tempfile.TemporaryDirectory(prefix='otimizador-bench-') as tmp:
+        bench = Bench(spec, tmp)
+        results = bench.run(scenarios, [m for m in args.modes.split(',') if m], args.repeat)
+        tree = bench.tree_stats.to_dict()
+    commit = _git_commit()
+    doc = {'meta': {'commit': commit, 'timestamp': int(time.time()), 'python': platform.python_version(),
+                    'platform': platform.platform(), 'spec': spec.to_dict(), 'tree': tree},
+           'results': results}
+    out = args.out or os.path.join(RESULTS_DIR, f"{commit or 'nocommit'}-{doc['meta']['timestamp']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as fh: json.dump(doc, fh, indent=2)
+    for r in results:
+        print(f"{r['scenario']:<18} {r['files']:>8} arq {r['seconds']:>8.4f} s {r['files_per_s']:>10.0f} arq/s "
+              f"{r['bytes_per_s'] / 1048576:>9.1f} MB/s  pico {r['peak_mem_bytes'] / 1024:>8.0f} KB")
+    print(f"Resultado: {out}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
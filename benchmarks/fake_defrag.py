@@ -0,0 +1,34 @@
+"""
+Imita a saída do `defrag <X:> /O /U /V` (linhas de progresso reescritas com
+\r) para exercitar `system.defrag.DefragRun` fora do Windows:
+
+    DefragRun(vols, command=lambda v: [sys.executable, '-m', 'benchmarks.fake_defrag', v.path])
+
+FAKE_DEFRAG_DELAY (s por passo) e FAKE_DEFRAG_FAIL (letras que terminam com
+código 1) ajustam o comportamento.
+"""
+from __future__ import annotations
+import os, sys, time
+
+PHASES = ('Pre-Optimization', 'Retrim', 'Post Defragmentation Report')
+
+def main(argv: list[str] | None = None) -> int:
+    args = sys.argv[1:] if argv is None else argv
+    volume = next((a for a in args if not a.startswith('/')), 'C:').upper()
+    delay = float(os.environ.get('FAKE_DEFRAG_DELAY', '0.02'))
+    fail = volume[:1] in os.environ.get('FAKE_DEFRAG_FAIL', '').upper()
+    out = sys.stdout
+    out.write(f"Invoking optimization on ({volume})...\n\n"); out.flush()
+    for phase in PHASES[:2]:
+        for pct in range(0, 101, 10):
+            out.write(f"\r\t{phase}:  {pct}% complete..."); out.flush()
+            time.sleep(delay)
+        out.write("\n")
+    if fail:
+        out.write("The operation failed: volume is locked.\n"); return 1
+    out.write(f"\n{PHASES[2]}:\n\tVolume Information:\n\tVolume size = 100 GB\n")
+    out.write("The operation completed successfully.\n")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
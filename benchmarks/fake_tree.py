@@ -0,0 +1,99 @@
+"""
+Gera árvores falsas de %LOCALAPPDATA% / %APPDATA% com perfis de Chrome, Edge,
+Opera/GX e Firefox e o cache de miniaturas do Explorer, para medir os
+cleaners fora do Windows.
+"""
+from __future__ import annotations
+import os, random, time
+
+DAY = 86400
+
+class TreeSpec:
+    """
+    Parâmetros da árvore: `files_per_cache` arquivos em cada pasta de cache,
+    espalhados em até `depth` níveis de subpastas (`fanout` por nível), com
+    tamanhos log-normais (mediana `median_size`, dispersão `sigma`) e uma
+    fração `old_fraction` com mtime de `old_days` dias atrás.
+    """
+    def __init__(self, profiles: int = 2, files_per_cache: int = 200, depth: int = 2, fanout: int = 4,
+                 median_size: int = 8 * 1024, sigma: float = 1.5, max_size: int = 4 * 1024 * 1024,
+                 old_fraction: float = 0.5, old_days: int = 30, thumbnails: int = 8, seed: int = 1234):
+        self.profiles = profiles; self.files_per_cache = files_per_cache
+        self.depth = depth; self.fanout = fanout
+        self.median_size = median_size; self.sigma = sigma; self.max_size = max_size
+        self.old_fraction = old_fraction; self.old_days = old_days
+        self.thumbnails = thumbnails; self.seed = seed
+
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+CHROMIUM_SUBS = ('Cache/Cache_Data', 'Code Cache/js', 'Code Cache/wasm', 'GPUCache',
+                 'Service Worker/CacheStorage', 'Media Cache', 'ShaderCache')
+FIREFOX_SUBS = ('cache2/entries', 'startupCache', 'jumpListCache', 'storage/default')
+# pastas vizinhas que NÃO são cache (não podem ser tocadas)
+KEEP_FILES = ('Bookmarks', 'History', 'Login Data', 'Preferences')
+
+class TreeStats:
+    def __init__(self):
+        self.files = 0; self.bytes = 0; self.old_files = 0; self.old_bytes = 0
+        self.cache_dirs = 0; self.seconds = 0.0
+
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+def _profile_names(n: int) -> list[str]:
+    return ['Default'] + [f'Profile {i}' for i in range(1, n)]
+
+def _fill(root: str, spec: TreeSpec, rng: random.Random, stats: TreeStats, now: float) -> None:
+    os.makedirs(root, exist_ok=True); stats.cache_dirs += 1
+    dirs = [root]
+    level = [root]
+    for _ in range(spec.depth):
+        nxt = []
+        for d in level:
+            for j in range(spec.fanout):
+                p = os.path.join(d, f"{j:02x}"); os.makedirs(p, exist_ok=True); nxt.append(p)
+        dirs.extend(nxt); level = nxt
+    for i in range(spec.files_per_cache):
+        size = min(spec.max_size, int(rng.lognormvariate(0, spec.sigma) * spec.median_size))
+        path = os.path.join(rng.choice(dirs), f"f_{i:06d}")
+        with open(path, 'wb') as fh:
+            if size: fh.truncate(size)   # esparso: rápido de criar, tamanho real no stat
+        old = rng.random() < spec.old_fraction
+        mtime = now - (spec.old_days * DAY if old else rng.uniform(0, DAY))
+        os.utime(path, (mtime, mtime))
+        stats.files += 1; stats.bytes += size
+        if old: stats.old_files += 1; stats.old_bytes += size
+
+def _keep_files(profile_dir: str) -> None:
+    os.makedirs(profile_dir, exist_ok=True)
+    for name in KEEP_FILES:
+        with open(os.path.join(profile_dir, name), 'wb') as fh: fh.write(b'keep')
+
+def build_tree(base: str, spec: TreeSpec) -> tuple[dict[str, str], TreeStats]:
+    """Cria a árvore em `base`; devolve as variáveis de ambiente a usar e as estatísticas."""
+    start = time.perf_counter()
+    rng = random.Random(spec.seed); now = time.time(); stats = TreeStats()
+    local = os.path.join(base, 'Local'); roaming = os.path.join(base, 'Roaming')
+    chromium = [os.path.join(local, 'Google', 'Chrome', 'User Data'),
+                os.path.join(local, 'Microsoft', 'Edge', 'User Data')]
+    opera = [os.path.join(roaming, 'Opera Software', 'Opera Stable'),
+             os.path.join(roaming, 'Opera Software', 'Opera GX Stable')]
+    for ud in chromium:
+        for prof in _profile_names(spec.profiles):
+            pdir = os.path.join(ud, prof); _keep_files(pdir)
+            for sub in CHROMIUM_SUBS: _fill(os.path.join(pdir, *sub.split('/')), spec, rng, stats, now)
+    for od in opera:
+        # Opera guarda o perfil direto na pasta; o padrão */Cache pega as subpastas
+        _keep_files(od)
+        for sub in CHROMIUM_SUBS: _fill(os.path.join(od, 'Default', *sub.split('/')), spec, rng, stats, now)
+    profiles = os.path.join(roaming, 'Mozilla', 'Firefox', 'Profiles')
+    for i in range(spec.profiles):
+        pdir = os.path.join(profiles, f"{rng.getrandbits(32):08x}.default-release"); _keep_files(pdir)
+        for sub in FIREFOX_SUBS: _fill(os.path.join(pdir, *sub.split('/')), spec, rng, stats, now)
+    explorer = os.path.join(local, 'Microsoft', 'Windows', 'Explorer')
+    os.makedirs(explorer, exist_ok=True)
+    for name in [f"thumbcache_{s}.db" for s in ('16', '32', '48', '96', '256', '1024', 'idx', 'sr')][:spec.thumbnails]:
+        with open(os.path.join(explorer, name), 'wb') as fh: fh.truncate(rng.randint(1, 64) * 16384)
+    stats.seconds = time.perf_counter() - start
+    return {'LOCALAPPDATA': local, 'APPDATA': roaming}, stats
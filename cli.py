@@ -0,0 +1,101 @@
+"""
+Modo sem interface (Agendador de Tarefas, scripts):
+
+    main.py --run caches,thumbs,recycle --dry-run --json
+    main.py --profile completa
+
+As ações rodam pelo pipeline (system.pipeline): as independentes em paralelo,
+respeitando as dependências (ponto de restauração antes dos ajustes etc.).
+
+Não importa tkinter nem PIL. Códigos de saída: 0 = tudo certo,
+1 = alguma ação falhou, 2 = uso inválido, 130 = interrompido.
+"""
+from __future__ import annotations
+import sys, json, time, logging, argparse
+from typing import Callable
+
+from system.os_utils import ensure_windows, human_size, is_admin
+from system.logs import setup_logging, stop_logging
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog='main.py', description="Disdal Tech – Otimizador (modo sem interface)")
+    p.add_argument('--run', metavar='AÇÕES', help="ações separadas por vírgula (veja --list)")
+    p.add_argument('--profile', metavar='PERFIL', help="roda um perfil salvo ou embutido (veja --list)")
+    p.add_argument('--list', action='store_true', help="lista as ações e os perfis disponíveis")
+    p.add_argument('--dry-run', action='store_true', help="só mede; ações sem pré-visualização são puladas")
+    p.add_argument('--json', action='store_true', help="resultado em JSON no stdout")
+    p.add_argument('--quiet', action='store_true', help="sem log no console")
+    return p
+
+def _setup_logging(log_path: str | None, quiet: bool) -> None:
+    # stdout fica para o resultado
+    setup_logging(log_path, console=None if quiet else sys.stderr)
+
+def _print_text(results, dry_run: bool, elapsed: float) -> None:
+    for r in results:
+        line = f"{r.name:<16} {r.status:<8} {r.elapsed:7.2f} s"
+        if 'files' in r.data: line += f"  arquivos={r.data['files']} tamanho={human_size(r.data['bytes'])}"
+        elif 'bytes' in r.data: line += f"  devolvidos={human_size(r.data['bytes'])}"
+        if r.error: line += f"  erro: {r.error}"
+        print(line)
+    print(f"{'total':<16} {'(simulação)' if dry_run else '':<8} {elapsed:7.2f} s")
+
+def main(argv: list[str] | None = None, log_path: str | None = None,
+         after_logging: Callable[[], None] | None = None) -> int:
+    """`after_logging` roda logo depois de o log ser configurado (ex.: poda dos logs antigos)."""
+    parser = build_parser()
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit as e:
+        return EXIT_OK if e.code == 0 else EXIT_USAGE
+    from system.actions import ACTIONS
+    from system.pipeline import Pipeline, Profile, list_profiles, load_profile
+
+    if args.list:
+        for a in ACTIONS.values():
+            print(f"{a.name:<16} {a.title}{'' if a.supports_dry_run else '  (sem --dry-run)'}")
+        print()
+        for prof in list_profiles().values():
+            print(f"{prof.name:<16} {prof.title}: {', '.join(prof.actions)}")
+        return EXIT_OK
+    try:
+        if args.profile:
+            profile = load_profile(args.profile)
+        else:
+            names = [n.strip() for n in (args.run or '').split(',') if n.strip()]
+            if not names: raise ValueError("Nenhuma ação informada.")
+            profile = Profile('cli', names)
+        pipeline = Pipeline(profile)
+    except ValueError as e:
+        parser.print_usage(sys.stderr)
+        print(str(e), file=sys.stderr)
+        return EXIT_USAGE
+
+    ensure_windows()
+    _setup_logging(log_path, args.quiet)
+    try:
+        if after_logging is not None: after_logging()
+        logging.info("CLI: %s%s (admin: %s)", ",".join(profile.actions), " [simulação]" if args.dry_run else "", is_admin())
+        start = time.perf_counter()
+        try:
+            results = pipeline.run(dry_run=args.dry_run).results
+        except KeyboardInterrupt:
+            logging.warning("Interrompido.")
+            return EXIT_INTERRUPTED
+        elapsed = time.perf_counter() - start
+        ok = all(r.ok for r in results)
+
+        if args.json:
+            json.dump({'ok': ok, 'profile': profile.name, 'dry_run': args.dry_run, 'elapsed': round(elapsed, 3),
+                       'actions': [r.to_dict() for r in results]}, sys.stdout, ensure_ascii=False, indent=2)
+            print()
+        else:
+            _print_text(results, args.dry_run, elapsed)
+        return EXIT_OK if ok else EXIT_FAILED
+    finally:
+        stop_logging()   # esvazia a fila antes de o Agendador encerrar o processo (também ao interromper)
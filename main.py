@@ -2,10 +2,13 @@
 # -*- coding: utf-8 -*-
 """
 Disdal Tech – Otimizador (GUI) • Windows 10/11
-App modularizado.
+App modularizado. Com argumentos (ex.: --run caches --json) roda sem
+interface; veja cli.py.
 """
 from __future__ import annotations
-import os, sys, time, logging
+import time
+_T0 = time.perf_counter()  # início do relatório de abertura
+import os, sys, threading
 from datetime import datetime
 
 # === garantir que pastas system/ e ui/ estejam no path ===
@@ -13,23 +16,35 @@ BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 if BASE_DIR not in sys.path:
     sys.path.insert(0, BASE_DIR)
 
-from ui.app import WinOptimizerApp
 from system.os_utils import ensure_windows
+from system.logs import setup_logging, prune_logs
 
 APP_NAME = "Disdal Tech – Otimizador"
 LOG_DIR = os.path.join(os.environ.get('TEMP', '.'), 'win_optimizer_logs')
 os.makedirs(LOG_DIR, exist_ok=True)
 LOG_PATH = os.path.join(LOG_DIR, f"optimizer_{int(time.time())}.log")
+METRICS_PATH = os.path.join(LOG_DIR, 'metrics.jsonl')  # spans de todas as execuções (ver system.metrics)
+
+def _start_prune() -> None:
+    """Poda dos logs antigos fora do caminho da abertura (depois do setup_logging, para os avisos irem ao log)."""
+    threading.Thread(target=prune_logs, args=(LOG_DIR,), kwargs={'exclude': LOG_PATH},
+                     name='prune-logs', daemon=True).start()
 
 def main():
+    from system import metrics
+    metrics.configure(METRICS_PATH)
+    if len(sys.argv) > 1:
+        # modo sem interface: nada de tkinter/PIL
+        from cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:], log_path=LOG_PATH, after_logging=_start_prune))
     ensure_windows()
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s [%(levelname)s] %(message)s',
-        handlers=[logging.FileHandler(LOG_PATH, encoding='utf-8'),
-                  logging.StreamHandler(sys.stdout)]
-    )
-    app = WinOptimizerApp(app_name=APP_NAME, log_path=LOG_PATH)
+    from ui.timing import StartupTimer
+    timer = StartupTimer(_T0)
+    from ui.app import WinOptimizerApp
+    timer.mark('imports')
+    setup_logging(LOG_PATH, console=sys.stdout)
+    _start_prune()
+    app = WinOptimizerApp(app_name=APP_NAME, log_path=LOG_PATH, timer=timer)
     app.mainloop()
 
 if __name__ == '__main__':
@@ -0,0 +1,162 @@
+from __future__ import annotations
+import logging
+from typing import Callable
+
+from . import metrics
+from .jobs import RES_DISK, RES_LIGHT, RES_PROCESS
+from .progress import CancelToken, drain, is_cancelled
+
+# Catálogo das ações do otimizador, sem nenhuma dependência de interface:
+# usado pela CLI (main.py --run) e por quem mais precisar rodar ações por
+# nome. Cada ação recebe (dry_run, cancel) e devolve (ok, dados).
+
+STATUS_OK = 'ok'
+STATUS_FAILED = 'failed'     # a ação rodou e reportou falha
+STATUS_ERROR = 'error'       # exceção
+STATUS_SKIPPED = 'skipped'   # sem suporte a dry-run, ou cancelada antes de começar
+
+ActionFn = Callable[[bool, CancelToken | None], tuple[bool, dict]]
+
+class Action:
+    __slots__ = ('name', 'title', 'fn', 'resource', 'supports_dry_run')
+
+    def __init__(self, name: str, title: str, fn: ActionFn, resource: str, supports_dry_run: bool):
+        self.name = name; self.title = title; self.fn = fn
+        self.resource = resource; self.supports_dry_run = supports_dry_run
+
+class ActionResult:
+    __slots__ = ('name', 'status', 'data', 'elapsed', 'error', 'span')
+
+    def __init__(self, name: str, status: str, data: dict | None = None, elapsed: float = 0.0,
+                 error: str | None = None, span: metrics.Span | None = None):
+        self.name = name; self.status = status; self.data = data or {}
+        self.elapsed = elapsed; self.error = error
+        self.span = span
+
+    @property
+    def ok(self) -> bool:
+        return self.status in (STATUS_OK, STATUS_SKIPPED)
+
+    def to_dict(self) -> dict:
+        d = {'name': self.name, 'status': self.status, 'ok': self.ok, 'elapsed': round(self.elapsed, 3)}
+        if self.span is not None:
+            d['cpu'] = round(self.span.cpu, 3); d['subprocess'] = round(self.span.subprocess, 3)
+        if self.error: d['error'] = self.error
+        d.update(self.data)
+        return d
+
+    def __repr__(self) -> str:
+        return f"ActionResult({self.name}, {self.status}, {self.elapsed:.2f}s)"
+
+ACTIONS: dict[str, Action] = {}
+
+def register_action(name: str, title: str, fn: ActionFn, resource: str = RES_LIGHT,
+                    supports_dry_run: bool = False) -> Action:
+    a = Action(name, title, fn, resource, supports_dry_run)
+    ACTIONS[name] = a
+    return a
+
+def run_action(name: str, dry_run: bool = False, cancel: CancelToken | None = None) -> ActionResult:
+    action = ACTIONS.get(name)
+    if action is None:
+        return ActionResult(name, STATUS_ERROR, error="ação desconhecida")
+    if is_cancelled(cancel) or (dry_run and not action.supports_dry_run):
+        return ActionResult(name, STATUS_SKIPPED)
+    sp = metrics.span(f"action.{name}", dry_run=dry_run)
+    try:
+        ok, data = action.fn(dry_run, cancel)
+    except Exception as e:
+        logging.exception("Falha na ação %s", name)
+        sp.finish(e)
+        return ActionResult(name, STATUS_ERROR, elapsed=sp.wall, error=str(e), span=sp)
+    if not ok: sp.add(errors=1)
+    sp.finish()
+    return ActionResult(name, STATUS_OK if ok else STATUS_FAILED, data, sp.wall, span=sp)
+
+def run_actions(names: list[str], dry_run: bool = False, cancel: CancelToken | None = None,
+                on_result: Callable[[ActionResult], None] | None = None) -> list[ActionResult]:
+    results: list[ActionResult] = []
+    for name in names:
+        res = run_action(name, dry_run, cancel)
+        results.append(res)
+        if on_result: on_result(res)
+    return results
+
+# --- ações -------------------------------------------------------------
+# Os módulos de sistema são importados dentro de cada ação: quem roda só
+# "recycle" não paga pela importação dos cleaners.
+
+def _cleanup_data(ev) -> dict:
+    files, nbytes = ev.result
+    metrics.add(files=files, bytes=nbytes)
+    return {'files': files, 'bytes': nbytes, 'errors': ev.errors, 'skipped': ev.skipped, 'cancelled': ev.cancelled}
+
+def _caches(dry_run: bool, cancel: CancelToken | None) -> tuple[bool, dict]:
+    from .caches import plan_browser_caches
+    plan = plan_browser_caches()
+    ev = drain(plan.iter_build(cancel=cancel) if dry_run else plan.iter_execute(cancel=cancel))
+    return ev.errors == 0 and not ev.cancelled, _cleanup_data(ev)
+
+def _caches_budget(dry_run: bool, cancel: CancelToken | None) -> tuple[bool, dict]:
+    # orçamento padrão por navegador; os arquivos usados nas últimas horas ficam
+    from .budget import ByteBudget
+    from .caches import log_shrink, plan_browser_caches
+    plan = plan_browser_caches(budget=ByteBudget())
+    ev = drain(plan.iter_build(cancel=cancel) if dry_run else plan.iter_execute(cancel=cancel))
+    log_shrink(plan)
+    data = _cleanup_data(ev)
+    data['browsers'] = {g.name: {'bytes': g.bytes, 'after': g.after} for g in plan.shrink.values()}
+    return ev.errors == 0 and not ev.cancelled, data
+
+def _thumbs(dry_run: bool, cancel: CancelToken | None) -> tuple[bool, dict]:
+    from .caches import iter_clear_thumbnail_cache
+    ev = drain(iter_clear_thumbnail_cache(dry_run, cancel=cancel))
+    return ev.errors == 0 and not ev.cancelled, _cleanup_data(ev)
+
+def _recycle(dry_run: bool, cancel: CancelToken | None) -> tuple[bool, dict]:
+    from .recycle_bin import empty_recycle_bin
+    return empty_recycle_bin(show_progress=False), {}
+
+def _ram(dry_run: bool, cancel: CancelToken | None) -> tuple[bool, dict]:
+    from .memory import trim_memory
+    report = trim_memory(); report.log()
+    return True, {'processes': report.ok, 'tried': report.tried, 'bytes': report.freed}
+
+def _restore(dry_run: bool, cancel: CancelToken | None) -> tuple[bool, dict]:
+    from datetime import datetime
+    from .restore import create_restore_point
+    return create_restore_point(f"WinOptimizer {datetime.now().strftime('%Y-%m-%d %H:%M')}"), {}
+
+def _defrag(dry_run: bool, cancel: CancelToken | None) -> tuple[bool, dict]:
+    from .defrag import optimize_drives
+    return optimize_drives(cancel=cancel), {}
+
+def _drivers(dry_run: bool, cancel: CancelToken | None) -> tuple[bool, dict]:
+    from .drivers import scan_driver_updates
+    scan_driver_updates()
+    return True, {}
+
+def _power_high(dry_run: bool, cancel: CancelToken | None) -> tuple[bool, dict]:
+    from .power import set_power_plan_high_performance
+    return set_power_plan_high_performance(), {}
+
+def _power_balanced(dry_run: bool, cancel: CancelToken | None) -> tuple[bool, dict]:
+    from .power import set_power_plan_balanced
+    return set_power_plan_balanced(), {}
+
+def _revert(dry_run: bool, cancel: CancelToken | None) -> tuple[bool, dict]:
+    from .appearance import revert_performance_tweaks
+    return revert_performance_tweaks(), {}
+
+register_action('caches', "Limpar caches de navegadores", _caches, RES_DISK, supports_dry_run=True)
+register_action('caches-budget', "Reduzir caches de navegadores a 256 MB cada", _caches_budget, RES_DISK,
+                supports_dry_run=True)
+register_action('thumbs', "Limpar cache de miniaturas", _thumbs, RES_DISK, supports_dry_run=True)
+register_action('recycle', "Esvaziar Lixeira", _recycle, RES_DISK)
+register_action('ram', "Otimizar memória RAM", _ram, RES_LIGHT)
+register_action('restore', "Criar ponto de restauração", _restore, RES_PROCESS)
+register_action('defrag', "Otimizar unidades", _defrag, RES_DISK)
+register_action('drivers', "Verificar atualizações de drivers", _drivers, RES_PROCESS)
+register_action('power-high', "Plano de energia: Alto desempenho", _power_high, RES_PROCESS)
+register_action('power-balanced', "Plano de energia: Balanceado", _power_balanced, RES_PROCESS)
+register_action('revert', "Desfazer ajustes de desempenho", _revert, RES_PROCESS)
@@ -2,7 +2,9 @@ from __future__ import annotations
 import logging, subprocess
 from .os_utils import run_ps
 from .power import set_power_plan_balanced  # usado na reversão
+from . import metrics
 
+@metrics.instrument()
 def set_visual_effects_best_performance(best_performance: bool = True) -> bool:
     try:
         val = 2 if best_performance else 1
@@ -27,6 +29,7 @@ def set_visual_effects_best_performance(best_performance: bool = True) -> bool:
         logging.error("Erro ao ajustar efeitos: %s", e)
         return False
 
+@metrics.instrument()
 def revert_performance_tweaks() -> bool:
     ok1 = set_power_plan_balanced()
     ok2 = set_visual_effects_best_performance(False)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+import os, time, heapq
+
+from .scanner import FileEntry, UsageEntry
+
+# Modo orçamento: em vez de apagar o cache inteiro, mantém cada raiz (ou
+# cada navegador, somando as raízes dele) abaixo de um teto em bytes,
+# removendo primeiro os arquivos usados há mais tempo (max(atime, mtime)).
+# Arquivos usados nas últimas `keep_recent` horas nunca saem, mesmo que o
+# teto não seja alcançado — são os que o navegador vai pedir de novo logo.
+
+SCOPE_ROOT = 'root'       # teto por pasta de cache
+SCOPE_GROUP = 'group'     # teto por navegador (todas as pastas/perfis dele)
+BUDGET_SCOPES = (SCOPE_ROOT, SCOPE_GROUP)
+DEFAULT_CAP = 256 * 1024 * 1024
+DEFAULT_KEEP_RECENT = 24.0   # horas
+
+class ByteBudget:
+    __slots__ = ('cap', 'scope', 'keep_recent')
+
+    def __init__(self, cap: int = DEFAULT_CAP, scope: str = SCOPE_GROUP, keep_recent: float = DEFAULT_KEEP_RECENT):
+        if scope not in BUDGET_SCOPES:
+            raise ValueError(f"escopo inválido: {scope}")
+        self.cap = max(0, int(cap)); self.scope = scope; self.keep_recent = keep_recent
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ByteBudget) and (self.cap, self.scope, self.keep_recent) == \
+            (other.cap, other.scope, other.keep_recent)
+
+    def __repr__(self) -> str:
+        return f"ByteBudget(cap={self.cap}, scope={self.scope}, keep_recent={self.keep_recent}h)"
+
+class GroupShrink:
+    """Quanto um navegador (ou raiz) encolhe: antes, removido e o que sobra."""
+    __slots__ = ('name', 'files', 'bytes', 'evict_files', 'evict_bytes')
+
+    def __init__(self, name: str):
+        self.name = name; self.files = 0; self.bytes = 0; self.evict_files = 0; self.evict_bytes = 0
+
+    @property
+    def after(self) -> int:
+        return self.bytes - self.evict_bytes
+
+    def __repr__(self) -> str:
+        return f"GroupShrink({self.name}, {self.bytes} -> {self.after}, evict={self.evict_files})"
+
+def select_evictions(pools: dict[str, list[UsageEntry]], cap: int, keep_recent: float = DEFAULT_KEEP_RECENT,
+                     now: float | None = None) -> dict[str, list[FileEntry]]:
+    """
+    Arquivos a remover para que `pools` (raiz -> arquivos), somados, caibam
+    em `cap`. Heap por último uso: O(n) para montar e O(k log n) para tirar
+    os k mais antigos, sem ordenar a lista inteira.
+    """
+    total = sum(ue[1] for pool in pools.values() for ue in pool)
+    excess = total - cap
+    out: dict[str, list[FileEntry]] = {root: [] for root in pools}
+    if excess <= 0: return out
+    hot = (now if now is not None else time.time()) - keep_recent * 3600
+    heap = [(ue[3], root, i) for root, pool in pools.items() for i, ue in enumerate(pool) if ue[3] < hot]
+    heapq.heapify(heap)
+    freed = 0
+    while heap and freed < excess:
+        _, root, i = heapq.heappop(heap)
+        path, size, mtime, _ = pools[root][i]
+        out[root].append((path, size, mtime)); freed += size
+    return out
+
+def apply_budget(pools: dict[str, list[UsageEntry]], budget: ByteBudget, groups: dict[str, str] | None = None,
+                 now: float | None = None) -> tuple[dict[str, tuple[list[FileEntry], set[str]]], dict[str, GroupShrink]]:
+    """
+    Aplica o orçamento por raiz ou por grupo (`groups`: raiz -> navegador).
+    Devolve {raiz: (a remover, pastas com arquivos mantidos)} e o encolhimento
+    por navegador (o relatório é sempre por grupo, qualquer que seja o escopo).
+    """
+    groups = groups or {}
+    by_key: dict[str, dict[str, list[UsageEntry]]] = {}
+    for root, pool in pools.items():
+        key = root if budget.scope == SCOPE_ROOT else groups.get(root, root)
+        by_key.setdefault(key, {})[root] = pool
+    evicted: dict[str, list[FileEntry]] = {}
+    for sub in by_key.values():
+        evicted.update(select_evictions(sub, budget.cap, budget.keep_recent, now))
+
+    plan: dict[str, tuple[list[FileEntry], set[str]]] = {}
+    shrink: dict[str, GroupShrink] = {}
+    for root, pool in pools.items():
+        gone = evicted.get(root, [])
+        gone_paths = {fe[0] for fe in gone}
+        kept = {os.path.dirname(ue[0]) for ue in pool if ue[0] not in gone_paths}
+        plan[root] = (gone, kept)
+        name = groups.get(root, root)
+        g = shrink.setdefault(name, GroupShrink(name))
+        g.files += len(pool); g.bytes += sum(ue[1] for ue in pool)
+        g.evict_files += len(gone); g.evict_bytes += sum(fe[1] for fe in gone)
+    return plan, shrink
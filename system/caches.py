@@ -1,113 +1,173 @@
 from __future__ import annotations
 import os, logging, time
-try:
-    from send2trash import send2trash  # type: ignore
-    HAS_SEND2TRASH = True
-except Exception:
-    HAS_SEND2TRASH = False
-
-def _delete_from_paths(paths: list[str], dry_run: bool, older_than_days: int) -> tuple[int, int]:
-    now = time.time(); cutoff = now - max(0, older_than_days) * 86400
-    total_bytes = 0; count = 0
-    for base in paths:
-        if not os.path.isdir(base): continue
-        for root, _, files in os.walk(base):
-            for fname in files:
-                fpath = os.path.join(root, fname)
-                try: st = os.stat(fpath)
-                except Exception: continue
-                if older_than_days > 0 and st.st_mtime >= cutoff: continue
-                total_bytes += getattr(st, 'st_size', 0)
-                if dry_run: count += 1; continue
-                try:
-                    if HAS_SEND2TRASH: send2trash(fpath)
-                    else: os.remove(fpath)
-                    count += 1
-                except PermissionError:
-                    try:
-                        os.chmod(fpath, 0o666); os.remove(fpath); count += 1
-                    except Exception:
-                        logging.debug("Não foi possível excluir: %s", fpath)
-                except Exception:
-                    logging.debug("Não foi possível excluir: %s", fpath)
-    return count, total_bytes
+from typing import Iterator
+
+from .scanner import DEFAULT_SCAN_WORKERS, iter_batches
+from .progress import CancelToken, CleanupProgress, Throttle, drain, is_cancelled, PROGRESS_INTERVAL
+from .deleters import MODE_AUTO
+from .scheduler import make_scheduler
+from .scan_index import shared_index
+from .plan import CleanupPlan
+from .budget import ByteBudget
+from .targets import KIND_FILE, register_target, registered_targets, resolve_targets
+from . import metrics
+
+# Alvos de limpeza — resolvidos juntos numa só travessia (ver system.targets).
+# Chamadas em sequência (ex.: navegadores + miniaturas) reaproveitam a resolução.
+GROUP_BROWSER = 'browser'
+GROUP_THUMBNAILS = 'thumbnails'
+TARGETS_MAX_AGE = 5.0
+
+CHROMIUM_CACHE_SUBS = ('Cache', 'Code Cache/js', 'Code Cache/wasm', 'GPUCache',
+                       'Service Worker/CacheStorage', 'Media Cache', 'ShaderCache')
+FIREFOX_CACHE_SUBS = ('cache2', 'startupCache', 'jumpListCache', 'storage/default')
+
+def _register_chromium(name: str, *user_data_dirs: str) -> None:
+    register_target(name, GROUP_BROWSER, *[f"{d}/*/{sub}" for d in user_data_dirs for sub in CHROMIUM_CACHE_SUBS])
+
+_register_chromium('chrome', '%LOCALAPPDATA%/Google/Chrome/User Data')
+_register_chromium('edge', '%LOCALAPPDATA%/Microsoft/Edge/User Data')
+# Opera / GX (Roaming ou Local)
+_register_chromium('opera', *[f"%{base}%/Opera Software/{ed}" for base in ('APPDATA', 'LOCALAPPDATA')
+                              for ed in ('Opera Stable', 'Opera GX Stable')])
+register_target('firefox', GROUP_BROWSER, *[f"%APPDATA%/Mozilla/Firefox/Profiles/*/{sub}" for sub in FIREFOX_CACHE_SUBS])
+register_target('thumbnails', GROUP_THUMBNAILS, '%LOCALAPPDATA%/Microsoft/Windows/Explorer/thumbcache*.db', kind=KIND_FILE)
+
+def iter_delete_from_paths(paths: list[str], dry_run: bool, older_than_days: int,
+                           workers: int = DEFAULT_SCAN_WORKERS, cancel: CancelToken | None = None,
+                           interval: float = PROGRESS_INTERVAL, mode: str = MODE_AUTO) -> Iterator[CleanupProgress]:
+    """
+    Variante em streaming de `_delete_from_paths`: produz eventos de progresso
+    no máximo a cada `interval` segundos e checa `cancel` entre lotes.
+    `mode` escolhe o backend de exclusão (ver system.deleters).
+    O último evento tem `done=True`.
+    """
+    return metrics.spanned_events('cleanup.paths.' + ('preview' if dry_run else 'delete'),
+                                  _iter_delete_from_paths(paths, dry_run, older_than_days, workers, cancel, interval, mode),
+                                  mode=mode, roots=len(paths))
+
+def _iter_delete_from_paths(paths: list[str], dry_run: bool, older_than_days: int, workers: int,
+                            cancel: CancelToken | None, interval: float, mode: str) -> Iterator[CleanupProgress]:
+    cutoff = time.time() - older_than_days * 86400 if older_than_days > 0 else None
+    roots = [p for p in paths if os.path.isdir(p)]
+    prog = CleanupProgress(dry_run); throttle = Throttle(interval)
+    backend = None if dry_run else make_scheduler(mode)
+    # o backend 'tree' precisa ver também os arquivos poupados pelo corte de idade
+    scan_cutoff = None if backend is not None and backend.needs_skipped else cutoff
+    if backend is not None: backend.begin(roots)
+    for batch in iter_batches(roots, scan_cutoff, workers, cancel=cancel):
+        if is_cancelled(cancel): break
+        if scan_cutoff != cutoff:
+            for fe in batch:
+                if fe[2] >= cutoff: backend.skip(fe[0])
+            batch = [fe for fe in batch if fe[2] < cutoff]
+        prog.scanned += len(batch); prog.bytes += sum(fe[1] for fe in batch)
+        if backend is not None:
+            ok, failed = backend.submit(batch)
+            prog.deleted += ok; prog.errors += failed
+        if throttle.ready():
+            yield prog.snapshot()
+    if backend is not None:
+        ok, failed = backend.drain() if is_cancelled(cancel) else backend.flush()
+        prog.deleted += ok; prog.errors += failed
+        backend.log_summary()
+    prog.cancelled = is_cancelled(cancel); prog.done = True
+    yield prog.snapshot()
+
+def _delete_from_paths(paths: list[str], dry_run: bool, older_than_days: int,
+                       workers: int = DEFAULT_SCAN_WORKERS, mode: str = MODE_AUTO) -> tuple[int, int]:
+    return drain(iter_delete_from_paths(paths, dry_run, older_than_days, workers, mode=mode)).result
 
 def enumerate_browser_cache_paths() -> list[str]:
     """Chrome, Edge, Opera/GX, Firefox (todos perfis)."""
-    paths: list[str] = []
-    localapp = os.environ.get('LOCALAPPDATA', '')
-    appdata  = os.environ.get('APPDATA', '')
-
-    def add_if_exists(p: str):
-        if p and os.path.isdir(p):
-            paths.append(p)
-
-    def add_chromium_profile_caches(root: str):
-        if not os.path.isdir(root): return
-        for prof in os.listdir(root):
-            prof_path = os.path.join(root, prof)
-            if not os.path.isdir(prof_path): continue
-            for sub in [
-                'Cache',
-                os.path.join('Code Cache', 'js'),
-                os.path.join('Code Cache', 'wasm'),
-                'GPUCache',
-                os.path.join('Service Worker', 'CacheStorage'),
-                'Media Cache',
-                'ShaderCache',
-            ]:
-                add_if_exists(os.path.join(prof_path, sub))
-
-    # Chrome
-    add_chromium_profile_caches(os.path.join(localapp, 'Google', 'Chrome', 'User Data'))
-    # Edge
-    add_chromium_profile_caches(os.path.join(localapp, 'Microsoft', 'Edge', 'User Data'))
-    # Opera / GX (Roaming ou Local)
-    for base in (appdata, localapp):
-        opera_root = os.path.join(base, 'Opera Software')
-        if os.path.isdir(opera_root):
-            for ed in ('Opera Stable', 'Opera GX Stable'):
-                add_chromium_profile_caches(os.path.join(opera_root, ed))
-
-    # Firefox
-    ff_profiles = os.path.join(appdata, 'Mozilla', 'Firefox', 'Profiles')
-    if os.path.isdir(ff_profiles):
-        for prof in os.listdir(ff_profiles):
-            prof_path = os.path.join(ff_profiles, prof)
-            if not os.path.isdir(prof_path): continue
-            add_if_exists(os.path.join(prof_path, 'cache2'))
-            add_if_exists(os.path.join(prof_path, 'startupCache'))
-            add_if_exists(os.path.join(prof_path, 'jumpListCache'))
-            add_if_exists(os.path.join(prof_path, 'storage', 'default'))
-
-    return paths
-
-def clear_all_browser_caches(dry_run: bool = False) -> tuple[int, int]:
+    return resolve_targets(TARGETS_MAX_AGE).group(GROUP_BROWSER)
+
+def browser_cache_groups() -> dict[str, str]:
+    """Pasta de cache -> navegador ('chrome', 'edge', …), para o orçamento por navegador."""
+    res = resolve_targets(TARGETS_MAX_AGE)
+    return {p: t.name for t in registered_targets(GROUP_BROWSER) for p in res.paths.get(t.name, ())}
+
+def iter_clear_browser_caches(dry_run: bool = False, workers: int = DEFAULT_SCAN_WORKERS,
+                              cancel: CancelToken | None = None, interval: float = PROGRESS_INTERVAL,
+                              mode: str = MODE_AUTO, force_rescan: bool = False,
+                              budget: ByteBudget | None = None) -> Iterator[CleanupProgress]:
+    """
+    A pré-visualização varre pelo índice incremental em disco (ver
+    system.scan_index); `force_rescan` o descarta e refaz a varredura
+    completa. Com `budget`, só o necessário para caber no orçamento é
+    removido (ver system.budget).
+    """
     paths = enumerate_browser_cache_paths()
     if not paths:
         logging.info("Nenhuma pasta de cache de navegador encontrada.")
-        return (0, 0)
+    if budget is not None or dry_run:
+        plan = plan_browser_caches(budget=budget, force_rescan=force_rescan)
+        if dry_run: yield from plan.iter_build(workers, cancel=cancel, interval=interval)
+        else: yield from plan.iter_execute(mode, workers, cancel=cancel, interval=interval)
+        log_shrink(plan)
+        return
     # 0 dias = apaga tudo
-    return _delete_from_paths(paths, dry_run=dry_run, older_than_days=0)
+    yield from iter_delete_from_paths(paths, dry_run=dry_run, older_than_days=0, workers=workers,
+                                      cancel=cancel, interval=interval, mode=mode)
+
+def clear_all_browser_caches(dry_run: bool = False, workers: int = DEFAULT_SCAN_WORKERS,
+                             mode: str = MODE_AUTO, force_rescan: bool = False,
+                             budget: ByteBudget | None = None) -> tuple[int, int]:
+    return drain(iter_clear_browser_caches(dry_run, workers, mode=mode, force_rescan=force_rescan,
+                                           budget=budget)).result
+
+def plan_browser_caches(older_than_days: int = 0, budget: ByteBudget | None = None,
+                        force_rescan: bool = False) -> CleanupPlan:
+    """
+    Plano (ainda não varrido) das pastas de cache; use iter_build/build.
+    Sem orçamento, varre pelo índice em disco; `force_rescan` o descarta.
+    """
+    paths = enumerate_browser_cache_paths()
+    if budget is not None:
+        return CleanupPlan(paths, label=GROUP_BROWSER + '.budget', budget=budget, groups=browser_cache_groups())
+    index = shared_index()
+    if force_rescan: index.invalidate(paths)
+    return CleanupPlan(paths, older_than_days, label=GROUP_BROWSER, index=index)
+
+def log_shrink(plan: CleanupPlan) -> None:
+    for g in sorted(plan.shrink.values(), key=lambda g: g.evict_bytes, reverse=True):
+        logging.info("Orçamento %s: %.1f MB -> %.1f MB (%d arquivos a remover)",
+                     g.name, g.bytes / 1048576, g.after / 1048576, g.evict_files)
 
-def clear_thumbnail_cache(dry_run: bool = False) -> tuple[int, int]:
+def _thumbnail_dir() -> str:
     localapp = os.environ.get('LOCALAPPDATA')
     if not localapp:
-        logging.warning("LOCALAPPDATA não definido."); return (0, 0)
-    explorer = os.path.join(localapp, 'Microsoft', 'Windows', 'Explorer')
-    if not os.path.isdir(explorer): return (0, 0)
-    targets = [os.path.join(explorer, f) for f in os.listdir(explorer)
-               if f.lower().startswith('thumbcache') and f.lower().endswith('.db')]
-    total = sum((os.path.getsize(p) for p in targets if os.path.exists(p)), 0)
+        logging.warning("LOCALAPPDATA não definido."); return ''
+    return os.path.join(localapp, 'Microsoft', 'Windows', 'Explorer')
+
+def _scan_thumbnails(explorer: str, cutoff: float | None = None, cancel: CancelToken | None = None):
+    entries = []
+    for p in resolve_targets(TARGETS_MAX_AGE).group(GROUP_THUMBNAILS):
+        try: st = os.stat(p)
+        except OSError: continue
+        entries.append((p, st.st_size, st.st_mtime))
+    return entries, {explorer: os.stat(explorer).st_mtime_ns}, set()
+
+def plan_thumbnail_cache() -> CleanupPlan:
+    # o Explorer reescreve os thumbcache*.db o tempo todo: não pular por mtime
+    explorer = _thumbnail_dir()
+    return CleanupPlan([explorer] if explorer else [], scan=_scan_thumbnails, strict_mtime=False,
+                       label=GROUP_THUMBNAILS)
+
+def iter_clear_thumbnail_cache(dry_run: bool = False, cancel: CancelToken | None = None,
+                               interval: float = PROGRESS_INTERVAL, mode: str = MODE_AUTO,
+                               plan: CleanupPlan | None = None) -> Iterator[CleanupProgress]:
+    plan = plan or plan_thumbnail_cache()
+    events = plan.iter_build(cancel=cancel, interval=interval) if dry_run else \
+             plan.iter_execute(mode, cancel=cancel, interval=interval)
+    last = CleanupProgress(dry_run)
+    for last in events:
+        if not last.done: yield last
     if dry_run:
-        logging.info("Miniaturas encontradas: %d (%.1f KB)", len(targets), total/1024); return (len(targets), total)
-    deleted = 0
-    for f in targets:
-        try:
-            if HAS_SEND2TRASH: send2trash(f)
-            else: os.remove(f)
-            deleted += 1
-        except Exception:
-            logging.debug("Não foi possível remover: %s (provavelmente em uso)", f)
-    logging.info("Miniaturas removidas: %d (%.1f KB)", deleted, total/1024)
-    return (deleted, total)
+        logging.info("Miniaturas encontradas: %d (%.1f KB)", last.scanned, last.bytes/1024)
+    else:
+        logging.info("Miniaturas removidas: %d (%.1f KB)", last.deleted, last.bytes/1024)
+    yield last
+
+def clear_thumbnail_cache(dry_run: bool = False, mode: str = MODE_AUTO) -> tuple[int, int]:
+    return drain(iter_clear_thumbnail_cache(dry_run, mode=mode)).result
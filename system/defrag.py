@@ -1,18 +1,272 @@
 from __future__ import annotations
-import logging
-from .os_utils import run_ps
+import os, re, time, logging, threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, Sequence
 
-def optimize_drives() -> bool:
+from .runner import run_streaming
+from .progress import CancelToken, Throttle, is_cancelled
+from .devices import MEDIA_HDD, MEDIA_REMOTE, MEDIA_SSD, MEDIA_UNKNOWN
+from . import metrics
+
+# Otimização por volume: um `defrag <X:> /O /U /V` por unidade, em vez de um
+# único `defrag /C` que só termina quando a última unidade acaba. Cada tipo
+# de mídia tem seu limite de execuções simultâneas (`DEFRAG_LIMITS`), então o
+# retrim de um SSD não espera a desfragmentação de horas de um HDD. A linha
+# de progresso do /U ("Retrim: 45% concluído…") vira `percent`/`phase`.
+#
+# O processo é montado por `command(volume)` — por padrão `defrag_command` —
+# e roda em `runner.run_streaming`; trocar o comando (p.ex. por
+# `python -m benchmarks.fake_defrag`) permite exercitar o orquestrador fora
+# do Windows.
+
+DEFRAG_EXE = 'defrag'
+# None = sem limite (uma desfragmentação de HDD pode levar horas)
+DEFRAG_TIMEOUT: float | None = None
+VOLUME_QUERY_TIMEOUT = 30.0
+DEFRAG_LIMITS = {MEDIA_SSD: 2, MEDIA_HDD: 1, MEDIA_REMOTE: 0, MEDIA_UNKNOWN: 1}
+DEFRAG_PARALLEL = 3   # total de volumes ao mesmo tempo
+
+STATE_PENDING = 'pending'
+STATE_RUNNING = 'running'
+STATE_DONE = 'done'
+STATE_FAILED = 'failed'
+STATE_CANCELLED = 'cancelled'
+STATE_SKIPPED = 'skipped'
+FINAL_STATES = (STATE_DONE, STATE_FAILED, STATE_CANCELLED, STATE_SKIPPED)
+
+# "Pre-Optimization: 12% complete...", "Desfragmentação: 45% concluída..."
+_PROGRESS_LINE = re.compile(r'^\s*(?P<phase>[^:%]{1,60}?)\s*:\s*(?P<pct>\d{1,3}(?:[.,]\d+)?)\s*%')
+_VOLUME_LINE = re.compile(r'^([A-Za-z])=([^=]*)=(\d*)$')
+
+class Volume:
+    __slots__ = ('letter', 'media', 'filesystem', 'size')
+
+    def __init__(self, letter: str, media: str = MEDIA_UNKNOWN, filesystem: str = '', size: int = 0):
+        self.letter = letter.upper().rstrip(':'); self.media = media
+        self.filesystem = filesystem; self.size = size
+
+    @property
+    def path(self) -> str:
+        return f"{self.letter}:"
+
+    def __repr__(self) -> str:
+        return f"Volume({self.path}, {self.media}, {self.filesystem or '?'})"
+
+def list_volumes() -> list[Volume]:
+    """Volumes fixos com letra e sistema de arquivos otimizável (Windows; vazio nos demais)."""
+    if os.name != 'nt': return []
+    from .pshost import run_powershell
+    from .devices import media_type
+    script = ("Get-Volume | Where-Object { $_.DriveLetter -and $_.DriveType -eq 'Fixed' -and "
+              "$_.FileSystem -in 'NTFS','ReFS' } | ForEach-Object { "
+              "\"$($_.DriveLetter)=$($_.FileSystem)=$($_.Size)\" }")
+    res = run_powershell(script, timeout=VOLUME_QUERY_TIMEOUT)
+    if not res.ok:
+        logging.warning("Não foi possível listar as unidades: %s", res.error or res.stderr or res.returncode)
+        return []
+    vols = []
+    for line in res.stdout.splitlines():
+        m = _VOLUME_LINE.match(line.strip())
+        if not m: continue
+        vols.append(Volume(m.group(1), media_type(f"{m.group(1)}:\\"), m.group(2), int(m.group(3) or 0)))
+    return sorted(vols, key=lambda v: v.letter)
+
+def defrag_command(volume: Volume) -> list[str]:
+    # /O escolhe sozinho: retrim em SSD, desfragmentação em HDD
+    return [DEFRAG_EXE, volume.path, '/O', '/U', '/V']
+
+def parse_progress(line: str) -> tuple[str, float] | None:
+    """(fase, porcentagem) de uma linha de progresso do `defrag /U`, ou None."""
+    m = _PROGRESS_LINE.match(line)
+    if not m: return None
+    pct = float(m.group('pct').replace(',', '.'))
+    return (m.group('phase').strip(), pct) if pct <= 100 else None
+
+class VolumeStatus:
+    __slots__ = ('volume', 'state', 'phase', 'percent', 'elapsed', 'returncode', 'message', 'cancel', 'started')
+
+    def __init__(self, volume: Volume):
+        self.volume = volume
+        self.state = STATE_PENDING
+        self.phase = ''; self.percent = 0.0
+        self.elapsed = 0.0; self.returncode: int | None = None
+        self.message = ''               # última linha que não é de progresso (ou o erro)
+        self.cancel = CancelToken()     # cancela só esta unidade
+        self.started = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.state in (STATE_DONE, STATE_SKIPPED)
+
+    def copy(self) -> VolumeStatus:
+        st = VolumeStatus.__new__(VolumeStatus)
+        for k in self.__slots__: setattr(st, k, getattr(self, k))
+        if self.state == STATE_RUNNING: st.elapsed = time.perf_counter() - self.started
+        return st
+
+    def __repr__(self) -> str:
+        return f"VolumeStatus({self.volume.path}, {self.state}, {self.phase or '-'} {self.percent:.0f}%, {self.elapsed:.1f}s)"
+
+class DefragProgress:
+    """Evento da otimização: uma cópia do estado de cada volume."""
+    __slots__ = ('volumes', 'elapsed', 'done', 'cancelled')
+
+    def __init__(self, volumes: list[VolumeStatus], elapsed: float = 0.0):
+        self.volumes = volumes; self.elapsed = elapsed
+        self.done = False; self.cancelled = False
+
+    @property
+    def ok(self) -> bool:
+        return all(v.ok for v in self.volumes)
+
+    @property
+    def errors(self) -> int:
+        return sum(v.state == STATE_FAILED for v in self.volumes)
+
+    @property
+    def result(self) -> tuple[int, int]:
+        """(volumes otimizados, 0) — no formato dos eventos de limpeza, para as métricas."""
+        return sum(v.state == STATE_DONE for v in self.volumes), 0
+
+    def __repr__(self) -> str:
+        return f"DefragProgress({self.volumes}, done={self.done}, cancelled={self.cancelled})"
+
+class DefragRun:
+    """
+    Otimiza `volumes`, cada um no seu processo. `limits` (tipo de mídia ->
+    simultâneos; 0 = não otimiza esse tipo) e `parallel` controlam quantos
+    rodam juntos. `skip`/`cancel_volume` podem ser chamados de outra thread
+    durante `iter_run`.
+    """
+    def __init__(self, volumes: Sequence[Volume], limits: dict[str, int] | None = None,
+                 parallel: int = DEFRAG_PARALLEL, command: Callable[[Volume], list[str]] = defrag_command,
+                 timeout: float | None = DEFRAG_TIMEOUT, on_line=None):
+        self.status = [VolumeStatus(v) for v in volumes]
+        self.limits = {**DEFRAG_LIMITS, **(limits or {})}
+        self.parallel = max(1, parallel)
+        self.command = command; self.timeout = timeout; self.on_line = on_line
+        self._cond = threading.Condition()
+        self._changed = False
+
+    def _find(self, letter: str) -> VolumeStatus | None:
+        letter = letter.upper().rstrip(':')
+        return next((st for st in self.status if st.volume.letter == letter), None)
+
+    def skip(self, letter: str) -> None:
+        """Não otimiza a unidade; se já estiver rodando, cancela."""
+        st = self._find(letter)
+        if st is None: return
+        with self._cond:
+            if st.state == STATE_PENDING:
+                st.state = STATE_SKIPPED; self._touch()
+        st.cancel.cancel()
+
+    cancel_volume = skip
+
+    def _touch(self) -> None:
+        self._changed = True; self._cond.notify_all()
+
+    def snapshot(self, start: float) -> DefragProgress:
+        with self._cond:
+            self._changed = False
+            return DefragProgress([st.copy() for st in self.status], time.perf_counter() - start)
+
+    def iter_run(self, cancel: CancelToken | None = None, interval: float = 0.5) -> Iterator[DefragProgress]:
+        return metrics.spanned_events('defrag.optimize', self._iter_run(cancel, interval), volumes=len(self.status))
+
+    def _iter_run(self, cancel: CancelToken | None, interval: float) -> Iterator[DefragProgress]:
+        start = time.perf_counter(); throttle = Throttle(interval)
+        for st in self.status:
+            if self.limits.get(st.volume.media, self.limits[MEDIA_UNKNOWN]) <= 0:
+                st.state = STATE_SKIPPED; st.message = f"tipo {st.volume.media} não é otimizado"
+        sems = {m: threading.Semaphore(max(1, n)) for m, n in self.limits.items()}
+        total = threading.Semaphore(self.parallel)
+        # HDDs primeiro: são os mais longos, e os SSDs cabem nas vagas restantes
+        order = sorted(self.status, key=lambda st: st.volume.media != MEDIA_HDD)
+        pending = [st for st in order if st.state == STATE_PENDING]
+        with ThreadPoolExecutor(max_workers=max(1, len(pending)), thread_name_prefix='defrag') as ex:
+            futs = [ex.submit(self._run_volume, st, sems.get(st.volume.media, sems[MEDIA_UNKNOWN]), total)
+                    for st in pending]
+            while not all(f.done() for f in futs):
+                if is_cancelled(cancel):
+                    for st in self.status: self.skip(st.volume.letter)
+                with self._cond:
+                    if not self._changed: self._cond.wait(interval)
+                    changed = self._changed
+                if changed and throttle.ready(): yield self.snapshot(start)
+            for f in futs: f.result()
+        ev = self.snapshot(start); ev.done = True; ev.cancelled = is_cancelled(cancel)
+        for st in ev.volumes:
+            logging.info("Unidade %s (%s): %s em %.0f s%s", st.volume.path, st.volume.media, _STATE_TEXT[st.state],
+                         st.elapsed, f" — {st.message}" if st.message and not st.ok else "")
+        yield ev
+
+    def run(self, cancel: CancelToken | None = None) -> DefragProgress:
+        last = None
+        for last in self.iter_run(cancel): pass
+        return last
+
+    def _run_volume(self, st: VolumeStatus, sem: threading.Semaphore, total: threading.Semaphore) -> None:
+        with sem, total:
+            with self._cond:
+                if st.state != STATE_PENDING: return   # pulada enquanto esperava vaga
+                st.state = STATE_RUNNING; st.started = time.perf_counter(); self._touch()
+            logging.info("Otimizando %s (%s)…", st.volume.path, st.volume.media)
+
+            def on_line(stream: str, line: str) -> None:
+                prog = parse_progress(line)
+                with self._cond:
+                    if prog: st.phase, st.percent = prog
+                    else: st.message = line
+                    self._touch()
+                if not prog: logging.info("[defrag %s] %s", st.volume.path, line)
+                if self.on_line: self.on_line(stream, line)
+
+            with metrics.span('defrag.volume', volume=st.volume.path, media=st.volume.media) as sp:
+                res = run_streaming(self.command(st.volume), timeout=self.timeout, on_line=on_line, cancel=st.cancel)
+                if not res.ok: sp.add(errors=1)
+            with self._cond:
+                st.elapsed = res.elapsed; st.returncode = res.returncode
+                if res.error: st.state = STATE_FAILED; st.message = res.error
+                elif res.cancelled: st.state = STATE_CANCELLED
+                elif res.timed_out: st.state = STATE_FAILED; st.message = f"tempo limite de {self.timeout} s"
+                elif res.returncode != 0: st.state = STATE_FAILED; st.message = st.message or f"código {res.returncode}"
+                else: st.state = STATE_DONE; st.percent = 100.0
+                self._touch()
+
+_STATE_TEXT = {STATE_DONE: "concluída", STATE_FAILED: "falhou", STATE_CANCELLED: "cancelada",
+               STATE_SKIPPED: "ignorada", STATE_PENDING: "não iniciada", STATE_RUNNING: "em andamento"}
+
+def state_text(state: str) -> str:
+    return _STATE_TEXT.get(state, state)
+
+def _optimize_all(timeout: float | None, on_line, cancel: CancelToken | None) -> bool:
+    """Caminho antigo: um `defrag /C` para todas as unidades (quando não dá para listá-las)."""
+    p = run_streaming([DEFRAG_EXE, '/C', '/O', '/U', '/V'], timeout=timeout, on_line=on_line,
+                      log_output=True, cancel=cancel)
+    if p.error:
+        logging.error("Erro ao otimizar: %s", p.error); return False
+    if p.timed_out:
+        logging.warning("Otimização interrompida: tempo limite de %s s.", timeout); return False
+    if p.cancelled:
+        logging.warning("Otimização cancelada."); return False
+    ok = p.returncode == 0
+    logging.info("Otimização %s (%.0f s).", "concluída" if ok else f"retornou código {p.returncode}", p.elapsed)
+    return ok
+
+@metrics.instrument()
+def optimize_drives(timeout: float | None = DEFRAG_TIMEOUT, on_line=None, cancel: CancelToken | None = None,
+                    volumes: Sequence[Volume] | None = None, skip: Sequence[str] = ()) -> bool:
     try:
-        cmd = ['defrag', '/C', '/O', '/U', '/V']
         logging.info("Otimizando unidades… (pode demorar)")
-        p = run_ps(cmd)
-        out = (p.stdout or p.stderr or '').strip()
-        if out:
-            logging.info("Saída defrag:\n%s", out)
-        ok = p.returncode == 0
-        logging.info("Otimização %s.", "concluída" if ok else f"retornou código {p.returncode}")
-        return ok
+        volumes = list_volumes() if volumes is None else volumes
+        if not volumes:
+            return _optimize_all(timeout, on_line, cancel)
+        run = DefragRun(volumes, timeout=timeout, on_line=on_line)
+        for letter in skip: run.skip(letter)
+        ev = run.run(cancel)
+        if ev.cancelled: logging.warning("Otimização cancelada.")
+        return ev.ok and not ev.cancelled
     except Exception as e:
         logging.error("Erro ao otimizar: %s", e)
         return False
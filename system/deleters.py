@@ -0,0 +1,280 @@
+from __future__ import annotations
+import os, stat, shutil, logging, time
+try:
+    from send2trash import send2trash  # type: ignore
+    HAS_SEND2TRASH = True
+except Exception:
+    HAS_SEND2TRASH = False
+
+from .logs import aggregate
+from .scanner import FileEntry
+
+MODE_AUTO   = 'auto'    # lixeira em lote se send2trash existir, senão unlink
+MODE_UNLINK = 'unlink'  # os.remove arquivo a arquivo
+MODE_TREE   = 'tree'    # remove subpastas inteiras quando todo o conteúdo é elegível
+MODE_TRASH  = 'trash'   # send2trash com lotes de caminhos numa só operação
+DELETE_MODES = (MODE_AUTO, MODE_UNLINK, MODE_TREE, MODE_TRASH)
+
+TRASH_BATCH = 256
+
+def _force_remove(fpath: str) -> bool:
+    """os.remove com o fallback de chmod em PermissionError."""
+    try:
+        os.remove(fpath); return True
+    except PermissionError:
+        try:
+            os.chmod(fpath, 0o666); os.remove(fpath); return True
+        except Exception:
+            logging.warning("Não foi possível excluir: %s", fpath, extra=aggregate('exclusão'))
+    except Exception:
+        logging.warning("Não foi possível excluir: %s", fpath, extra=aggregate('exclusão'))
+    return False
+
+def _is_junction(path: str) -> bool:
+    """Junção NTFS (is_symlink não as reconhece antes do Python 3.12)."""
+    isjunction = getattr(os.path, 'isjunction', None)
+    if isjunction is not None: return isjunction(path)
+    try: return bool(os.lstat(path).st_file_attributes & stat.FILE_ATTRIBUTE_REPARSE_POINT)
+    except (OSError, AttributeError): return False
+
+def _rmtree_retry(func, path, _exc) -> None:
+    """onerror do rmtree: mesma tentativa de chmod usada em arquivos avulsos."""
+    try:
+        os.chmod(path, stat.S_IWRITE); func(path)
+    except Exception:
+        pass
+
+class DeleteStats:
+    __slots__ = ('files', 'bytes', 'failed', 'seconds')
+
+    def __init__(self):
+        self.files = 0; self.bytes = 0; self.failed = 0; self.seconds = 0.0
+
+    @property
+    def files_per_s(self) -> float:
+        return self.files / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def bytes_per_s(self) -> float:
+        return self.bytes / self.seconds if self.seconds > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return (f"DeleteStats(files={self.files}, bytes={self.bytes}, failed={self.failed}, "
+                f"seconds={self.seconds:.3f}, files_per_s={self.files_per_s:.0f})")
+
+class DeleteBackend:
+    """
+    Recebe lotes de (caminho, tamanho, mtime) via `submit` e devolve quantos
+    foram excluídos/falharam naquele momento; `flush` conclui o que estiver
+    pendente. `stats` acumula a vazão do backend.
+    """
+    name = 'base'
+    needs_skipped = False  # True: quer saber dos arquivos não elegíveis (skip)
+    concurrent = True      # False: precisa ver todos os arquivos num só backend (ver system.scheduler)
+
+    def __init__(self):
+        self.stats = DeleteStats()
+
+    def begin(self, roots: list[str]) -> None:
+        pass
+
+    def skip(self, fpath: str) -> None:
+        self.keep_dir(os.path.dirname(fpath))
+
+    def keep_dir(self, d: str) -> None:
+        """Pasta com arquivos que devem ficar (não pode ser removida inteira)."""
+        pass
+
+    def submit(self, entries: list[FileEntry]) -> tuple[int, int]:
+        start = time.perf_counter()
+        ok, failed, freed = self._delete(entries)
+        self._account(ok, failed, freed, start)
+        return ok, failed
+
+    def flush(self) -> tuple[int, int]:
+        return 0, 0
+
+    def drain(self) -> tuple[int, int]:
+        """Ao cancelar: conclui o que já está em andamento sem processar pendências."""
+        return 0, 0
+
+    def _delete(self, entries: list[FileEntry]) -> tuple[int, int, int]:
+        """Devolve (excluídos, falhas, bytes liberados)."""
+        raise NotImplementedError
+
+    def _account(self, ok: int, failed: int, freed: int, start: float) -> None:
+        st = self.stats
+        st.seconds += time.perf_counter() - start
+        st.files += ok; st.failed += failed; st.bytes += freed
+
+    def log_summary(self) -> None:
+        st = self.stats
+        if st.files or st.failed:
+            logging.info("Exclusão (%s): %d arquivos, %d falhas em %.1f s (%.0f arq/s)",
+                         self.name, st.files, st.failed, st.seconds, st.files_per_s)
+
+class UnlinkBackend(DeleteBackend):
+    name = MODE_UNLINK
+
+    def _delete(self, entries):
+        ok = 0; freed = 0
+        for fpath, size, _ in entries:
+            if _force_remove(fpath): ok += 1; freed += size
+        return ok, len(entries) - ok, freed
+
+class TrashBackend(DeleteBackend):
+    """
+    Envia à Lixeira em lotes de `batch` caminhos (uma operação de shell por lote).
+    Com `permanent_fallback` (modo 'auto'), o que a Lixeira recusar é excluído
+    de vez; no modo 'trash', escolhido explicitamente, fica onde está.
+    """
+    name = MODE_TRASH
+
+    def __init__(self, batch: int = TRASH_BATCH, permanent_fallback: bool = False):
+        super().__init__()
+        self.batch = max(1, batch)
+        self.permanent_fallback = permanent_fallback
+        self._pending: list[FileEntry] = []
+
+    def submit(self, entries):
+        self._pending.extend(entries)
+        ok = failed = 0
+        while len(self._pending) >= self.batch:
+            chunk = self._pending[:self.batch]; del self._pending[:self.batch]
+            o, f = super().submit(chunk); ok += o; failed += f
+        return ok, failed
+
+    def flush(self):
+        chunk = self._pending; self._pending = []
+        return super().submit(chunk) if chunk else (0, 0)
+
+    def _delete(self, entries):
+        try:
+            send2trash([e[0] for e in entries])
+            return len(entries), 0, sum(e[1] for e in entries)
+        except Exception:
+            pass
+        # lote recusado (versão antiga do send2trash ou item bloqueado): um a um;
+        # parte do lote pode já ter ido para a Lixeira antes da falha
+        ok = 0; freed = 0
+        for fpath, size, _ in entries:
+            if os.path.lexists(fpath) and not self._retry(fpath): continue
+            ok += 1; freed += size
+        return ok, len(entries) - ok, freed
+
+    def _retry(self, fpath: str) -> bool:
+        try:
+            send2trash(fpath); return True
+        except Exception:
+            pass
+        if not os.path.lexists(fpath): return True
+        if not self.permanent_fallback:
+            logging.warning("A Lixeira recusou (mantido): %s", fpath, extra=aggregate('lixeira'))
+            return False
+        if not _force_remove(fpath): return False
+        logging.info("A Lixeira recusou; excluído permanentemente: %s", fpath, extra=aggregate('exclusão permanente'))
+        return True
+
+class TreeBackend(DeleteBackend):
+    """
+    Acumula os arquivos e, no `flush`, remove com rmtree cada subpasta (abaixo
+    da raiz) em que nenhum arquivo foi poupado; o resto vai arquivo a arquivo.
+    As raízes em si são preservadas.
+    """
+    name = MODE_TREE
+    needs_skipped = True
+    concurrent = False
+
+    def __init__(self):
+        super().__init__()
+        self._roots: set[str] = set()
+        self._kept: set[str] = set()
+        self._entries: list[FileEntry] = []
+
+    def begin(self, roots):
+        self._roots = {os.path.normpath(r) for r in roots}
+
+    def keep_dir(self, d):
+        while d and d not in self._kept and d not in self._roots:
+            self._kept.add(d)
+            parent = os.path.dirname(d)
+            if parent == d: break
+            d = parent
+
+    def submit(self, entries):
+        self._entries.extend(entries)
+        return 0, 0
+
+    def _top_removable(self, fpath: str) -> str:
+        """Pasta mais alta (abaixo da raiz) sem arquivos poupados, ou o próprio arquivo."""
+        chain = []
+        d = os.path.dirname(fpath)
+        while d not in self._roots:
+            chain.append(d)
+            parent = os.path.dirname(d)
+            if parent == d: return fpath  # fora das raízes conhecidas
+            d = parent
+        for d in reversed(chain):
+            if d not in self._kept: return d
+        return fpath
+
+    @staticmethod
+    def _only_known(target: str, known: set[str]) -> bool:
+        """
+        Relista `target` antes do rmtree: só os arquivos do plano podem estar
+        lá. Link simbólico/junção, pasta ilegível ou arquivo criado depois da
+        varredura fazem o grupo voltar para a exclusão arquivo a arquivo.
+        """
+        stack = [target]
+        while stack:
+            try: it = os.scandir(stack.pop())
+            except OSError: return False
+            with it:
+                for e in it:
+                    try:
+                        if e.is_symlink() or (e.is_dir() and _is_junction(e.path)): return False
+                        if e.is_dir(): stack.append(e.path)
+                        elif e.path not in known: return False
+                    except OSError:
+                        return False
+        return True
+
+    def flush(self):
+        entries = self._entries; self._entries = []
+        if not entries: return 0, 0
+        start = time.perf_counter()
+        groups: dict[str, list[FileEntry]] = {}
+        for fe in entries:
+            groups.setdefault(self._top_removable(fe[0]), []).append(fe)
+        ok = failed = 0; freed = 0
+        for target, files in groups.items():
+            if len(files) == 1 and target == files[0][0]:
+                if _force_remove(target): ok += 1; freed += files[0][1]
+                else: failed += 1
+                continue
+            if not self._only_known(target, {fe[0] for fe in files}):
+                logging.debug("Pasta mudou desde a varredura; exclusão arquivo a arquivo: %s", target)
+                for fpath, size, _ in files:
+                    if _force_remove(fpath): ok += 1; freed += size
+                    else: failed += 1
+                continue
+            shutil.rmtree(target, onerror=_rmtree_retry)
+            leftover = os.path.lexists(target)
+            for fpath, size, _ in files:
+                if leftover and os.path.lexists(fpath):
+                    failed += 1; logging.warning("Não foi possível excluir: %s", fpath, extra=aggregate('exclusão'))
+                else:
+                    ok += 1; freed += size
+        self._account(ok, failed, freed, start)
+        return ok, failed
+
+def make_backend(mode: str = MODE_AUTO) -> DeleteBackend:
+    if mode == MODE_AUTO:
+        return TrashBackend(permanent_fallback=True) if HAS_SEND2TRASH else UnlinkBackend()
+    if mode == MODE_UNLINK: return UnlinkBackend()
+    if mode == MODE_TREE: return TreeBackend()
+    if mode == MODE_TRASH:
+        if not HAS_SEND2TRASH:
+            raise ValueError("Modo 'trash' requer o pacote send2trash.")
+        return TrashBackend()
+    raise ValueError(f"Modo de exclusão desconhecido: {mode!r}")
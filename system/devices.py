@@ -0,0 +1,83 @@
+from __future__ import annotations
+import os, re, logging, threading
+
+# Em que dispositivo físico está cada caminho e de que tipo ele é (SSD,
+# HDD, rede). O agrupamento usa st_dev (um stat); o tipo vem, no Windows,
+# de Get-PhysicalDisk pela sessão quente do PowerShell (uma consulta por
+# execução) e, no Linux, de /sys/dev/block/<maj>:<min>/queue/rotational.
+
+MEDIA_SSD = 'ssd'
+MEDIA_HDD = 'hdd'
+MEDIA_REMOTE = 'remote'
+MEDIA_UNKNOWN = 'unknown'
+
+MEDIA_QUERY_TIMEOUT = 20.0
+_MEDIA_LINE = re.compile(r'^([A-Za-z])=(\S*)$')
+
+_lock = threading.Lock()
+_drive_media: dict[str, str] | None = None   # letra -> tipo (Windows)
+_dev_media: dict[int, str] = {}
+
+def device_of(path: str) -> int | None:
+    try: return os.stat(path).st_dev
+    except OSError: return None
+
+def volume_label(path: str) -> str:
+    """'C:' no Windows; fora dele, o ponto de montagem que contém `path`."""
+    path = os.path.abspath(path)
+    drive, _ = os.path.splitdrive(path)
+    if drive: return drive.upper() if len(drive) == 2 else drive
+    while not os.path.ismount(path):
+        parent = os.path.dirname(path)
+        if parent == path: break
+        path = parent
+    return path
+
+def _windows_drive_media() -> dict[str, str]:
+    global _drive_media
+    with _lock:
+        if _drive_media is not None: return _drive_media
+    from .pshost import run_powershell
+    script = ("Get-Partition | Where-Object DriveLetter | ForEach-Object { "
+              "$pd = Get-PhysicalDisk | Where-Object DeviceId -eq $_.DiskNumber; "
+              "\"$($_.DriveLetter)=$($pd.MediaType)\" }")
+    res = run_powershell(script, timeout=MEDIA_QUERY_TIMEOUT)
+    found: dict[str, str] = {}
+    if res.ok:
+        for line in res.stdout.splitlines():
+            m = _MEDIA_LINE.match(line.strip())
+            if not m: continue
+            kind = m.group(2).upper()
+            found[m.group(1).upper()] = MEDIA_SSD if kind in ('SSD', 'SCM') else MEDIA_HDD if kind == 'HDD' else MEDIA_UNKNOWN
+    else:
+        logging.debug("Tipo de mídia indisponível: %s", res.error or res.returncode)
+    with _lock:
+        _drive_media = found
+    return found
+
+def _linux_media(dev: int) -> str:
+    base = f"/sys/dev/block/{os.major(dev)}:{os.minor(dev)}"
+    for rel in ('queue/rotational', '../queue/rotational'):   # disco inteiro ou partição
+        try:
+            with open(os.path.join(os.path.realpath(base), rel)) as fh:
+                return MEDIA_HDD if fh.read().strip() == '1' else MEDIA_SSD
+        except OSError:
+            continue
+    return MEDIA_UNKNOWN
+
+def media_type(path: str, dev: int | None = None) -> str:
+    """Tipo de mídia do volume de `path` (cache por dispositivo)."""
+    dev = device_of(path) if dev is None else dev
+    if dev is not None and dev in _dev_media: return _dev_media[dev]
+    drive, _ = os.path.splitdrive(os.path.abspath(path))
+    if drive.startswith(('\\\\', '//')):
+        kind = MEDIA_REMOTE
+    elif os.name == 'nt':
+        kind = _windows_drive_media().get(drive[:1].upper(), MEDIA_UNKNOWN)
+    elif dev is not None:
+        kind = _linux_media(dev)
+    else:
+        kind = MEDIA_UNKNOWN
+    if dev is not None:
+        with _lock: _dev_media[dev] = kind
+    return kind
@@ -0,0 +1,201 @@
+from __future__ import annotations
+import os, time, heapq, queue, threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+
+from .scanner import DEFAULT_SCAN_WORKERS
+from .progress import CancelToken, Throttle, is_cancelled, PROGRESS_INTERVAL
+from . import metrics
+
+# Analisador de uso de disco: varre uma unidade ou pasta com vários workers
+# (fila compartilhada de pastas, então uma subárvore grande não prende um
+# worker só) e monta uma árvore de tamanhos em arrays paralelos — um índice
+# por pasta, nenhum objeto por arquivo. Como toda pasta é criada depois da
+# pai, os totais saem de uma passada de trás para frente (`rollup`). Dos
+# arquivos só ficam os `top_files` maiores, num heap.
+
+TOP_FILES = 200
+
+class UsageTree:
+    """
+    Pastas em arrays: `parent`, `files`/`bytes` diretos e, após `rollup`,
+    `total_files`/`total_bytes` da subárvore. O índice 0 é a raiz.
+    """
+    def __init__(self, root: str, top_files: int = TOP_FILES):
+        self.root = os.path.abspath(root)
+        self.names: list[str] = [self.root]
+        self.parent = array('l', [-1])
+        self.files = array('q', [0]); self.bytes = array('q', [0])
+        self.total_files = array('q'); self.total_bytes = array('q')
+        self.errors = 0
+        self.top_files = top_files
+        self._top: list[tuple[int, int, str]] = []   # heap (tamanho, pasta, nome)
+        self._children: tuple[int, array, array] | None = None   # (pastas no rollup, início, ordem)
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def path(self, i: int) -> str:
+        parts = []
+        while i > 0:
+            parts.append(self.names[i]); i = self.parent[i]
+        return os.path.join(self.root, *reversed(parts))
+
+    # --- construção (workers) ---
+    def _add_dir(self, name: str, parent: int) -> int:
+        self.names.append(name); self.parent.append(parent)
+        self.files.append(0); self.bytes.append(0)
+        return len(self.parent) - 1
+
+    def _list(self, i: int) -> list[int]:
+        """Lista a pasta `i`; devolve os índices das subpastas criadas."""
+        subdirs: list[str] = []; files = 0; nbytes = 0
+        big: list[tuple[int, str]] = []
+        floor = self._top[0][0] if len(self._top) >= self.top_files else -1
+        try:
+            with os.scandir(self.path(i)) as it:
+                for e in it:
+                    try:
+                        if e.is_dir(follow_symlinks=False):
+                            if not getattr(e, 'is_junction', lambda: False)(): subdirs.append(e.name)
+                            continue
+                        if not e.is_file(follow_symlinks=False): continue
+                        size = e.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        continue
+                    files += 1; nbytes += size
+                    if size > floor: big.append((size, e.name))
+        except OSError:
+            with self.lock: self.errors += 1
+            return []
+        with self.lock:
+            self.files[i] = files; self.bytes[i] = nbytes
+            for size, name in big:
+                if len(self._top) < self.top_files: heapq.heappush(self._top, (size, i, name))
+                elif size > self._top[0][0]: heapq.heapreplace(self._top, (size, i, name))
+            return [self._add_dir(n, i) for n in subdirs]
+
+    # --- consulta ---
+    def rollup(self) -> None:
+        """Totais por subárvore; filhos sempre têm índice maior que o pai."""
+        with self.lock:
+            n = len(self.parent)
+            tf = array('q', self.files[:n]); tb = array('q', self.bytes[:n])
+            parent = self.parent
+            for i in range(n - 1, 0, -1):
+                p = parent[i]; tf[p] += tf[i]; tb[p] += tb[i]
+            self.total_files = tf; self.total_bytes = tb
+
+    def _child_index(self) -> tuple[array, array]:
+        """Filhos em formato CSR: `order[start[i]:start[i+1]]` são os filhos de i (refeito a cada rollup)."""
+        n = len(self.total_bytes)
+        if self._children is None or self._children[0] != n:
+            count = array('l', [0]) * (n + 1)
+            for i in range(1, n): count[self.parent[i] + 1] += 1
+            for i in range(n): count[i + 1] += count[i]
+            order = array('l', count[:n]); fill = array('l', count[:n])
+            for i in range(1, n):
+                p = self.parent[i]; order[fill[p]] = i; fill[p] += 1
+            self._children = (n, count, order)
+        return self._children[1], self._children[2]
+
+    def children(self, i: int = 0, limit: int | None = None) -> list[int]:
+        """Subpastas de `i` (de uma árvore com `rollup`), da maior para a menor."""
+        if i >= len(self.total_bytes): return []
+        start, order = self._child_index()
+        kids = order[start[i]:start[i + 1]]
+        tb = self.total_bytes
+        if limit is not None and limit < len(kids):
+            return heapq.nlargest(limit, kids, key=lambda k: tb[k])
+        return sorted(kids, key=lambda k: tb[k], reverse=True)
+
+    def largest_dirs(self, n: int = 20, direct: bool = False) -> list[int]:
+        """As `n` pastas com mais bytes — diretos (`direct`) ou na subárvore."""
+        src = self.bytes if direct else self.total_bytes
+        return heapq.nlargest(n, range(1, len(src)), key=src.__getitem__)
+
+    def largest_files(self, n: int | None = None) -> list[tuple[str, int]]:
+        with self.lock:
+            top = sorted(self._top, reverse=True)
+        return [(os.path.join(self.path(i), name), size) for size, i, name in top[:n]]
+
+class UsageProgress:
+    """Evento da análise; `tree` é a árvore parcial (chame `rollup` antes de consultar)."""
+    __slots__ = ('dirs', 'files', 'bytes', 'errors', 'elapsed', 'done', 'cancelled', 'tree')
+
+    def __init__(self, tree: UsageTree):
+        self.tree = tree
+        self.dirs = 0; self.files = 0; self.bytes = 0; self.errors = 0
+        self.elapsed = 0.0; self.done = False; self.cancelled = False
+
+    @property
+    def result(self) -> tuple[int, int]:
+        return self.files, self.bytes
+
+    def __repr__(self) -> str:
+        return (f"UsageProgress(dirs={self.dirs}, files={self.files}, bytes={self.bytes}, "
+                f"errors={self.errors}, done={self.done}, cancelled={self.cancelled})")
+
+def iter_disk_usage(root: str, workers: int = DEFAULT_SCAN_WORKERS, cancel: CancelToken | None = None,
+                    interval: float = PROGRESS_INTERVAL, top_files: int = TOP_FILES) -> Iterator[UsageProgress]:
+    """
+    Varre `root` em paralelo e produz eventos a cada `interval` s; o último
+    (`done=True`) traz a árvore com `rollup` feito.
+    """
+    return metrics.spanned_events('disk_usage.scan', _iter_disk_usage(root, workers, cancel, interval, top_files),
+                                  root=root)
+
+def _iter_disk_usage(root: str, workers: int, cancel: CancelToken | None, interval: float,
+                     top_files: int) -> Iterator[UsageProgress]:
+    tree = UsageTree(root, top_files)
+    start = time.perf_counter()
+    q: queue.SimpleQueue = queue.SimpleQueue(); q.put(0)
+    pending = [1]; counts = [0, 0]   # pastas na fila/em andamento; (arquivos, bytes) vistos
+    idle = threading.Condition(); stop = threading.Event()
+    workers = max(1, workers)
+
+    def release() -> None:
+        stop.set()
+        for _ in range(workers): q.put(None)   # acorda quem está esperando na fila
+
+    def work() -> None:
+        while True:
+            i = q.get()
+            if i is None or stop.is_set() or is_cancelled(cancel): return
+            kids = tree._list(i)
+            for k in kids: q.put(k)
+            with idle:
+                pending[0] += len(kids) - 1
+                counts[0] += tree.files[i]; counts[1] += tree.bytes[i]
+                if pending[0] == 0:
+                    idle.notify_all(); release()
+
+    def event(done: bool = False) -> UsageProgress:
+        ev = UsageProgress(tree)
+        ev.dirs = len(tree); ev.files, ev.bytes = counts; ev.errors = tree.errors
+        ev.elapsed = time.perf_counter() - start; ev.done = done
+        return ev
+
+    throttle = Throttle(interval)
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='usage') as ex:
+        futs = [ex.submit(work) for _ in range(workers)]
+        try:
+            while True:
+                with idle:
+                    if pending[0] > 0 and not is_cancelled(cancel): idle.wait(interval)
+                    finished = pending[0] == 0
+                if finished or is_cancelled(cancel): break
+                if throttle.ready(): yield event()
+        finally:
+            if not stop.is_set(): release()   # cancelado ou iterador fechado
+        for f in futs: f.result()
+    tree.rollup()
+    ev = event(done=True); ev.cancelled = is_cancelled(cancel)
+    yield ev
+
+def disk_usage(root: str, workers: int = DEFAULT_SCAN_WORKERS) -> UsageTree:
+    last = None
+    for last in iter_disk_usage(root, workers): pass
+    return last.tree
@@ -1,25 +1,32 @@
 from __future__ import annotations
 import logging, subprocess
-from .os_utils import run_cmd
+from .runner import run_many, run_streaming
+from . import metrics
 
+# UsoClient/pnputil às vezes travam; não deixar a ação presa para sempre
+USOCLIENT_TIMEOUT = 60.0
+PNPUTIL_TIMEOUT = 300.0
+
+@metrics.instrument()
 def scan_driver_updates() -> None:
     logging.info("Iniciando verificação de atualizações de drivers…")
-    for arg in ('StartScan', 'StartInteractiveScan'):
-        try:
-            p = run_cmd(['UsoClient.exe', arg])
-            if p.returncode == 0:
-                logging.info("USOClient %s disparado.", arg)
-                break
-        except Exception:
-            pass
-    try:
-        pnp = run_cmd(['pnputil', '/scan-devices'])
-        if pnp.returncode == 0:
-            logging.info("pnputil /scan-devices concluído.")
-        else:
-            logging.warning("pnputil retornou código %s", pnp.returncode)
-    except Exception as e:
-        logging.warning("Falha ao executar pnputil: %s", e)
+    # UsoClient e pnputil são independentes: rodam ao mesmo tempo
+    uso, pnp = run_many([['UsoClient.exe', 'StartScan'], ['pnputil', '/scan-devices']],
+                        timeouts=[USOCLIENT_TIMEOUT, PNPUTIL_TIMEOUT], log_output=True)
+    if not uso.ok:
+        uso = run_streaming(['UsoClient.exe', 'StartInteractiveScan'], timeout=USOCLIENT_TIMEOUT)
+    if uso.ok:
+        logging.info("USOClient %s disparado.", uso.cmd[1])
+    elif uso.timed_out:
+        logging.warning("USOClient não respondeu em %.0f s.", USOCLIENT_TIMEOUT)
+    if pnp.ok:
+        logging.info("pnputil /scan-devices concluído (%.1f s).", pnp.elapsed)
+    elif pnp.error:
+        logging.warning("Falha ao executar pnputil: %s", pnp.error)
+    elif pnp.timed_out:
+        logging.warning("pnputil não respondeu em %.0f s; processo encerrado.", PNPUTIL_TIMEOUT)
+    else:
+        logging.warning("pnputil retornou código %s", pnp.returncode)
     try:
         subprocess.Popen(['start', 'ms-settings:windowsupdate'], shell=True)
     except Exception:
@@ -0,0 +1,288 @@
+from __future__ import annotations
+import os, hashlib, logging, threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator
+
+from .os_utils import app_cache_dir
+from .scanner import DEFAULT_SCAN_WORKERS, FileEntry, iter_batches
+from .progress import CancelToken, CleanupProgress, Throttle, is_cancelled, BATCH_SIZE, PROGRESS_INTERVAL
+from .deleters import MODE_AUTO
+from .scheduler import make_scheduler
+from .startup_analysis import HashCache
+from . import metrics
+
+# Localizador de duplicados em estágios, cada um descartando o que o
+# anterior já separou:
+#   1. tamanho — arquivos de tamanho único não têm par;
+#   2. hash parcial (início + fim, PARTIAL_BLOCK bytes cada);
+#   3. hash completo só dos que sobraram, com leitura em blocos grandes.
+# Os estágios 2 e 3 rodam num pool de threads (o hashlib solta o GIL) e
+# os grupos confirmados saem em streaming, dos tamanhos maiores para os
+# menores. Os hashes ficam em cache por (caminho, tamanho, mtime).
+
+PARTIAL_BLOCK = 4096
+READ_BUFFER = 1024 * 1024
+DEFAULT_MIN_SIZE = 1024
+HASH_WORKERS = 4
+PARTIAL_CACHE = 'dup_partial.json'
+FULL_CACHE = 'dup_full.json'
+
+STAGE_SCAN = 'scan'
+STAGE_PARTIAL = 'partial'
+STAGE_FULL = 'full'
+
+KEEP_OLDEST = 'oldest'
+KEEP_NEWEST = 'newest'
+KEEP_SHORTEST = 'shortest'   # caminho mais curto (em geral a cópia "original")
+
+def _mtime_ns(mtime: float) -> int:
+    return int(mtime * 1e9)
+
+def _new_hash():
+    return hashlib.blake2b(digest_size=20)
+
+def partial_hash(path: str, size: int) -> tuple[str, tuple[int, int] | None]:
+    """Hash do início e do fim; também devolve (st_dev, st_ino) para detectar hard links."""
+    h = _new_hash()
+    with open(path, 'rb') as fh:
+        st = os.fstat(fh.fileno())
+        h.update(fh.read(PARTIAL_BLOCK))
+        if size > 2 * PARTIAL_BLOCK:
+            fh.seek(size - PARTIAL_BLOCK); h.update(fh.read(PARTIAL_BLOCK))
+        elif size > PARTIAL_BLOCK:
+            h.update(fh.read())
+    ident = (st.st_dev, st.st_ino) if st.st_ino else None
+    return h.hexdigest(), ident
+
+def _ident(path: str) -> tuple[int, int] | None:
+    try: st = os.stat(path)
+    except OSError: return None
+    return (st.st_dev, st.st_ino) if st.st_ino else None
+
+def full_hash(path: str) -> str:
+    """Leitura em blocos de READ_BUFFER num buffer reaproveitado (sem uma cópia por bloco)."""
+    h = _new_hash()
+    buf = bytearray(READ_BUFFER); view = memoryview(buf)
+    with open(path, 'rb', buffering=0) as fh:
+        while True:
+            n = fh.readinto(buf)
+            if not n: break
+            h.update(view[:n])
+    return h.hexdigest()
+
+class DuplicateGroup:
+    """Arquivos com o mesmo conteúdo; `files` são FileEntry (caminho, tamanho, mtime)."""
+    __slots__ = ('size', 'digest', 'files')
+
+    def __init__(self, size: int, digest: str, files: list[FileEntry]):
+        self.size = size; self.digest = digest; self.files = files
+
+    @property
+    def wasted(self) -> int:
+        return self.size * (len(self.files) - 1)
+
+    def __repr__(self) -> str:
+        return f"DuplicateGroup({len(self.files)}x {self.size} bytes, {self.digest[:12]})"
+
+class DupProgress:
+    """Evento da busca; `groups` traz só os grupos confirmados desde o evento anterior."""
+    __slots__ = ('stage', 'scanned', 'candidates', 'hashed_bytes', 'found', 'wasted', 'errors',
+                 'groups', 'done', 'cancelled')
+
+    def __init__(self):
+        self.stage = STAGE_SCAN
+        self.scanned = 0; self.candidates = 0; self.hashed_bytes = 0
+        self.found = 0; self.wasted = 0; self.errors = 0
+        self.groups: list[DuplicateGroup] = []
+        self.done = False; self.cancelled = False
+
+    def snapshot(self) -> DupProgress:
+        ev = DupProgress()
+        for k in self.__slots__: setattr(ev, k, getattr(self, k))
+        self.groups = []
+        return ev
+
+    @property
+    def result(self) -> tuple[int, int]:
+        return self.found, self.wasted
+
+    def __repr__(self) -> str:
+        return (f"DupProgress({self.stage}, scanned={self.scanned}, candidates={self.candidates}, "
+                f"found={self.found}, wasted={self.wasted}, errors={self.errors}, done={self.done})")
+
+class _Hasher:
+    """Hash parcial/completo com cache; conta bytes lidos e erros (thread-safe)."""
+    def __init__(self, partial: HashCache, full: HashCache):
+        self.partial = partial; self.full = full
+        self.read = 0; self.errors = 0
+        self._lock = threading.Lock()
+
+    def _count(self, nbytes: int = 0, error: bool = False) -> None:
+        with self._lock:
+            self.read += nbytes; self.errors += error
+
+    def head_tail(self, fe: FileEntry) -> tuple[FileEntry, str | None, tuple[int, int] | None]:
+        path, size, mtime = fe
+        try:
+            digest, ident = partial_hash(path, size)
+        except OSError:
+            self._count(error=True); return fe, None, None
+        self._count(min(size, 2 * PARTIAL_BLOCK))
+        return fe, digest, ident
+
+    def whole(self, fe: FileEntry) -> tuple[FileEntry, str | None]:
+        path, size, mtime = fe
+        if size <= 2 * PARTIAL_BLOCK:
+            # o hash parcial já cobriu o arquivo inteiro
+            return fe, self.partial.get(path, size, _mtime_ns(mtime))
+        digest = self.full.get(path, size, _mtime_ns(mtime))
+        if digest is None:
+            try: digest = full_hash(path)
+            except OSError:
+                self._count(error=True); return fe, None
+            self.full.put(path, size, _mtime_ns(mtime), digest)
+            self._count(size)
+        return fe, digest
+
+def _group_by(items, key) -> dict:
+    out: dict = {}
+    for it in items:
+        k = key(it)
+        if k is not None: out.setdefault(k, []).append(it)
+    return out
+
+def iter_find_duplicates(roots: list[str], min_size: int = DEFAULT_MIN_SIZE, workers: int = HASH_WORKERS,
+                         cancel: CancelToken | None = None, interval: float = PROGRESS_INTERVAL,
+                         partial_cache: HashCache | None = None,
+                         full_cache: HashCache | None = None) -> Iterator[DupProgress]:
+    """Busca duplicados em `roots`; os grupos chegam nos eventos à medida que são confirmados."""
+    return metrics.spanned_events('duplicates.find', _iter_find(roots, min_size, workers, cancel, interval,
+                                                                partial_cache, full_cache), roots=len(roots))
+
+def _iter_find(roots: list[str], min_size: int, workers: int, cancel: CancelToken | None, interval: float,
+               partial_cache: HashCache | None, full_cache: HashCache | None) -> Iterator[DupProgress]:
+    partial_cache = partial_cache or HashCache(os.path.join(app_cache_dir(), PARTIAL_CACHE))
+    full_cache = full_cache or HashCache(os.path.join(app_cache_dir(), FULL_CACHE))
+    hasher = _Hasher(partial_cache, full_cache)
+    prog = DupProgress(); throttle = Throttle(interval)
+
+    # 1. tamanho
+    by_size: dict[int, list[FileEntry]] = {}
+    for batch in iter_batches([r for r in roots if os.path.isdir(r)], None, DEFAULT_SCAN_WORKERS, cancel=cancel):
+        for fe in batch:
+            if fe[1] >= max(1, min_size): by_size.setdefault(fe[1], []).append(fe)
+        prog.scanned += len(batch)
+        if throttle.ready(): yield prog.snapshot()
+    sizes = sorted((s for s, files in by_size.items() if len(files) > 1), reverse=True)
+    prog.candidates = sum(len(by_size[s]) for s in sizes)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='dup') as ex:
+        # 2. hash parcial (do cache quando o arquivo não mudou)
+        prog.stage = STAGE_PARTIAL
+        survivors: dict[tuple[int, str], list[FileEntry]] = {}
+        todo = [fe for s in sizes for fe in by_size[s]]
+        del by_size
+        seen_ids: set[tuple[int, int]] = set()
+        futs = []
+        for fe in todo:
+            digest = partial_cache.get(fe[0], fe[1], _mtime_ns(fe[2]))
+            if digest is None:
+                futs.append(ex.submit(hasher.head_tail, fe)); continue
+            ident = _ident(fe[0])   # um stat ainda é bem mais barato que ler o arquivo
+            if ident is not None:
+                if ident in seen_ids: continue
+                seen_ids.add(ident)
+            survivors.setdefault((fe[1], digest), []).append(fe)
+        for fut in as_completed(futs):
+            if is_cancelled(cancel):
+                for f in futs: f.cancel()
+                break
+            fe, digest, ident = fut.result()
+            if digest is None: continue
+            partial_cache.put(fe[0], fe[1], _mtime_ns(fe[2]), digest)
+            if ident is not None:
+                if ident in seen_ids: continue   # hard link do mesmo arquivo: não é cópia
+                seen_ids.add(ident)
+            survivors.setdefault((fe[1], digest), []).append(fe)
+            prog.hashed_bytes = hasher.read; prog.errors = hasher.errors
+            if throttle.ready(): yield prog.snapshot()
+
+        # 3. hash completo, grupo a grupo (maiores primeiro) para o streaming
+        prog.stage = STAGE_FULL
+        buckets = [] if is_cancelled(cancel) else \
+            sorted((files for files in survivors.values() if len(files) > 1), key=lambda files: files[0][1], reverse=True)
+        pending = {}
+        for files in buckets:
+            for fe in files: pending[ex.submit(hasher.whole, fe)] = files
+        results: dict[int, list[tuple[FileEntry, str]]] = {}
+        remaining = {id(files): len(files) for files in buckets}
+        for fut in as_completed(pending):
+            if is_cancelled(cancel):
+                for f in pending: f.cancel()
+                break
+            files = pending[fut]; key = id(files)
+            fe, digest = fut.result()
+            if digest is not None: results.setdefault(key, []).append((fe, digest))
+            remaining[key] -= 1
+            if not remaining[key]:
+                for digest, same in _group_by(results.pop(key, []), lambda r: r[1]).items():
+                    if len(same) < 2: continue
+                    g = DuplicateGroup(files[0][1], digest, sorted((r[0] for r in same), key=lambda fe: fe[0]))
+                    prog.groups.append(g); prog.found += 1; prog.wasted += g.wasted
+            prog.hashed_bytes = hasher.read; prog.errors = hasher.errors
+            if throttle.ready(): yield prog.snapshot()
+
+    partial_cache.save(); full_cache.save()
+    prog.hashed_bytes = hasher.read; prog.errors = hasher.errors
+    prog.cancelled = is_cancelled(cancel); prog.done = True
+    logging.info("Duplicados: %d grupos, %.1f MB repetidos (%d candidatos, %.1f MB lidos).",
+                 prog.found, prog.wasted / 1048576, prog.candidates, prog.hashed_bytes / 1048576)
+    yield prog.snapshot()
+
+def find_duplicates(roots: list[str], min_size: int = DEFAULT_MIN_SIZE, workers: int = HASH_WORKERS) -> list[DuplicateGroup]:
+    groups: list[DuplicateGroup] = []
+    for ev in iter_find_duplicates(roots, min_size, workers): groups.extend(ev.groups)
+    return groups
+
+def select_extras(groups: list[DuplicateGroup], keep: str = KEEP_OLDEST) -> list[FileEntry]:
+    """Todas as cópias menos uma por grupo (a mantida segue `keep`)."""
+    rank = {KEEP_OLDEST: lambda fe: (fe[2], fe[0]), KEEP_NEWEST: lambda fe: (-fe[2], fe[0]),
+            KEEP_SHORTEST: lambda fe: (len(fe[0]), fe[0])}[keep]
+    out: list[FileEntry] = []
+    for g in groups:
+        out.extend(sorted(g.files, key=rank)[1:])
+    return out
+
+def iter_delete_duplicates(entries: list[FileEntry], mode: str = MODE_AUTO, cancel: CancelToken | None = None,
+                           interval: float = PROGRESS_INTERVAL) -> Iterator[CleanupProgress]:
+    """
+    Remove as cópias escolhidas pelo backend de exclusão (Lixeira em lote
+    com send2trash no modo automático). Arquivo alterado desde a busca
+    (tamanho ou mtime) é mantido e contado em `skipped`.
+    """
+    return metrics.spanned_events('duplicates.delete', _iter_delete(entries, mode, cancel, interval), mode=mode)
+
+def _iter_delete(entries: list[FileEntry], mode: str, cancel: CancelToken | None,
+                 interval: float) -> Iterator[CleanupProgress]:
+    prog = CleanupProgress(dry_run=False); throttle = Throttle(interval)
+    backend = make_scheduler(mode)
+    backend.begin(sorted({os.path.dirname(fe[0]) for fe in entries}))
+    for i in range(0, len(entries), BATCH_SIZE):
+        if is_cancelled(cancel): break
+        batch = []
+        for fe in entries[i:i + BATCH_SIZE]:
+            try: st = os.stat(fe[0])
+            except OSError:
+                prog.skipped += 1; continue
+            if st.st_size != fe[1] or st.st_mtime != fe[2]:
+                prog.skipped += 1; continue
+            batch.append(fe)
+        prog.scanned += len(batch); prog.bytes += sum(fe[1] for fe in batch)
+        ok, failed = backend.submit(batch)
+        prog.deleted += ok; prog.errors += failed
+        if throttle.ready(): yield prog.snapshot()
+    ok, failed = backend.drain() if is_cancelled(cancel) else backend.flush()
+    prog.deleted += ok; prog.errors += failed
+    backend.log_summary()
+    prog.cancelled = is_cancelled(cancel); prog.done = True
+    yield prog.snapshot()
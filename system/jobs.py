@@ -0,0 +1,65 @@
+from __future__ import annotations
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from . import metrics
+
+# Classes de recurso: cada uma tem seu próprio pool, o que limita quantos
+# trabalhos pesados do mesmo tipo rodam ao mesmo tempo sem prender os demais.
+RES_DISK    = 'disk'     # varreduras/remoções, defrag
+RES_PROCESS = 'process'  # subprocessos (powershell, UsoClient, reg…)
+RES_LIGHT   = 'light'    # chamadas rápidas de API
+RES_PIPELINE = 'pipeline'  # coordenador de um perfil (as etapas vão para os pools acima)
+
+DEFAULT_LIMITS = {RES_DISK: 1, RES_PROCESS: 2, RES_LIGHT: 2, RES_PIPELINE: 1}
+
+class Job:
+    """Resultado de um trabalho: `result` ou `error`, e a duração em segundos (do span `job.<nome>`)."""
+    __slots__ = ('name', 'resource', 'result', 'error', 'elapsed', 'future', 'span')
+
+    def __init__(self, name: str, resource: str):
+        self.name = name; self.resource = resource
+        self.result = None; self.error: BaseException | None = None
+        self.elapsed = 0.0; self.future: Future | None = None
+        self.span: metrics.Span | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+class JobRunner:
+    def __init__(self, limits: dict[str, int] | None = None):
+        self.limits = dict(DEFAULT_LIMITS, **(limits or {}))
+        self._pools: dict[str, ThreadPoolExecutor] = {}
+        self._lock = threading.Lock()
+
+    def _pool(self, resource: str) -> ThreadPoolExecutor:
+        with self._lock:
+            pool = self._pools.get(resource)
+            if pool is None:
+                pool = ThreadPoolExecutor(max_workers=max(1, self.limits.get(resource, 1)),
+                                          thread_name_prefix=f"job-{resource}")
+                self._pools[resource] = pool
+            return pool
+
+    def submit(self, fn, *args, resource: str = RES_LIGHT, name: str | None = None, **kwargs) -> Job:
+        job = Job(name or getattr(fn, '__name__', 'job'), resource)
+
+        def run() -> Job:
+            sp = metrics.span(f"job.{job.name}", resource=resource)
+            try:
+                job.result = fn(*args, **kwargs)
+            except BaseException as e:
+                job.error = e
+            job.span = sp.finish(job.error)
+            job.elapsed = sp.wall
+            return job
+
+        job.future = self._pool(resource).submit(run)
+        return job
+
+    def shutdown(self, wait: bool = False) -> None:
+        with self._lock:
+            pools = list(self._pools.values()); self._pools.clear()
+        for pool in pools:
+            pool.shutdown(wait=wait, cancel_futures=True)
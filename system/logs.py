@@ -0,0 +1,183 @@
+from __future__ import annotations
+import os, sys, time, queue, atexit, logging, threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+# Log sem bloquear quem loga: os handlers da raiz são trocados por um
+# QueueHandler, e uma thread (QueueListener) faz a escrita no arquivo e no
+# console. O arquivo de cada execução gira por tamanho, e os antigos de
+# `win_optimizer_logs` são podados por idade, quantidade e tamanho total.
+# Erros repetidos por arquivo (marcados com `extra=aggregate('chave')`)
+# passam só os primeiros de cada janela; o resto vira um registro de resumo.
+
+LOG_FORMAT = '%(asctime)s [%(levelname)s] %(message)s'
+LOG_PREFIX = 'optimizer_'
+LOG_MAX_BYTES = 2 * 1024 * 1024   # por arquivo, antes de girar
+LOG_BACKUPS = 3
+KEEP_DAYS = 14
+KEEP_RUNS = 20
+KEEP_TOTAL_BYTES = 50 * 1024 * 1024
+METRICS_MAX_BYTES = 10 * 1024 * 1024
+
+AGGREGATE_WINDOW = 10.0   # s
+AGGREGATE_BURST = 5       # registros que passam por janela e chave
+AGGREGATE_MAX_DROPPED = 1000   # omitidos que fecham a janela antes da hora
+
+AGGREGATE_ATTR = 'aggregate'
+
+def aggregate(key: str) -> dict:
+    """`extra` para um erro repetitivo: logging.warning(..., extra=aggregate('delete'))."""
+    return {AGGREGATE_ATTR: key}
+
+class _Bucket:
+    __slots__ = ('start', 'passed', 'dropped', 'level', 'name', 'sample')
+
+    def __init__(self, record: logging.LogRecord, now: float):
+        self.start = now; self.passed = 0; self.dropped = 0
+        self.level = record.levelno; self.name = record.name; self.sample = ''
+
+class AggregatingQueueHandler(QueueHandler):
+    """
+    QueueHandler que limita registros marcados por chave: `burst` por janela
+    de `window` s. Cada chave tem a própria janela; os omitidos viram um
+    resumo quando ela fecha (pelo tempo ou ao chegar a `max_dropped`
+    omitidos) ou no flush. Registros não marcados passam direto.
+    """
+    def __init__(self, q: queue.Queue, window: float = AGGREGATE_WINDOW, burst: int = AGGREGATE_BURST,
+                 max_dropped: int = AGGREGATE_MAX_DROPPED):
+        super().__init__(q)
+        self.window = window; self.burst = burst; self.max_dropped = max_dropped
+        self._buckets: dict[str, _Bucket] = {}
+        self._agg_lock = threading.Lock()
+
+    def emit(self, record: logging.LogRecord) -> None:
+        key = getattr(record, AGGREGATE_ATTR, None)
+        now = time.monotonic()
+        with self._agg_lock:
+            pending = self._expire(now)
+            if key is not None:
+                b = self._buckets.get(key)
+                if b is None: b = self._buckets[key] = _Bucket(record, now)
+                if b.passed >= self.burst:
+                    b.dropped += 1; b.sample = record.getMessage()
+                    record = None
+                    if b.dropped >= self.max_dropped: pending.extend(self._expire(now, key))
+                else:
+                    b.passed += 1
+        for summary in pending: super().emit(summary)
+        if record is not None: super().emit(record)
+
+    def _expire(self, now: float, only: str | None = None, everything: bool = False) -> list[logging.LogRecord]:
+        """Fecha as janelas vencidas (ou só a de `only`, ou todas) e devolve os resumos."""
+        out: list[logging.LogRecord] = []
+        if only is not None: keys = [only]
+        else: keys = [k for k, b in self._buckets.items() if everything or now - b.start >= self.window]
+        for key in keys:
+            b = self._buckets.pop(key)
+            if b.dropped:
+                out.append(logging.LogRecord(
+                    b.name, b.level, __file__, 0,
+                    "%s: mais %d ocorrência(s) omitida(s) em %.0f s (última: %s)",
+                    (key, b.dropped, now - b.start, b.sample), None))
+        return out
+
+    def flush(self) -> None:
+        with self._agg_lock:
+            pending = self._expire(time.monotonic(), everything=True)
+        for summary in pending: super().emit(summary)
+
+class LogSetup:
+    __slots__ = ('handler', 'listener', 'handlers', 'path')
+
+    def __init__(self, handler: AggregatingQueueHandler, listener: QueueListener,
+                 handlers: list[logging.Handler], path: str | None):
+        self.handler = handler; self.listener = listener; self.handlers = handlers; self.path = path
+
+    def stop(self) -> None:
+        """Emite os resumos pendentes e espera a thread esvaziar a fila."""
+        if self.listener is None: return
+        self.handler.flush()
+        self.listener.stop(); self.listener = None
+        for h in self.handlers:
+            try: h.close()
+            except Exception: pass
+
+_active: LogSetup | None = None
+
+def setup_logging(log_path: str | None = None, console=sys.stdout, level: int = logging.INFO) -> LogSetup:
+    """
+    Configura a raiz com um único QueueHandler; a escrita (arquivo girando
+    por tamanho + console opcional) acontece na thread do listener. Chamar
+    de novo substitui a configuração anterior.
+    """
+    global _active
+    stop_logging()
+    fmt = logging.Formatter(LOG_FORMAT)
+    handlers: list[logging.Handler] = []
+    if log_path:
+        os.makedirs(os.path.dirname(os.path.abspath(log_path)), exist_ok=True)
+        handlers.append(RotatingFileHandler(log_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS,
+                                            encoding='utf-8', delay=True))
+    if console is not None: handlers.append(logging.StreamHandler(console))
+    if not handlers: handlers.append(logging.NullHandler())
+    for h in handlers: h.setFormatter(fmt)
+
+    q: queue.Queue = queue.Queue(-1)
+    qh = AggregatingQueueHandler(q)
+    listener = QueueListener(q, *handlers, respect_handler_level=True)
+    root = logging.getLogger()
+    for h in list(root.handlers): root.removeHandler(h)
+    root.addHandler(qh); root.setLevel(level)
+    listener.start()
+    _active = LogSetup(qh, listener, handlers, log_path)
+    return _active
+
+def stop_logging() -> None:
+    global _active
+    if _active is not None:
+        logging.getLogger().removeHandler(_active.handler)
+        _active.stop(); _active = None
+
+atexit.register(stop_logging)
+
+def prune_logs(log_dir: str, keep_days: int = KEEP_DAYS, keep_runs: int = KEEP_RUNS,
+               keep_bytes: int = KEEP_TOTAL_BYTES, metrics_max: int = METRICS_MAX_BYTES,
+               exclude: str | None = None) -> int:
+    """
+    Remove logs `optimizer_*` (e os girados) além de `keep_days` dias, das
+    `keep_runs` execuções mais recentes ou de `keep_bytes` no total; o
+    `metrics.jsonl` grande demais vira `metrics.jsonl.1`. Devolve quantos
+    arquivos saíram. `exclude` é o log da execução atual.
+    """
+    try:
+        names = os.listdir(log_dir)
+    except OSError:
+        return 0
+    runs: dict[str, list[tuple[str, int, float]]] = {}
+    for n in names:
+        if not n.startswith(LOG_PREFIX): continue
+        p = os.path.join(log_dir, n)
+        try: st = os.stat(p)
+        except OSError: continue
+        run = n.split('.log', 1)[0]   # optimizer_<ts>.log.2 -> optimizer_<ts>
+        runs.setdefault(run, []).append((p, st.st_size, st.st_mtime))
+    keep_name = os.path.basename(exclude).split('.log', 1)[0] if exclude else None
+    cutoff = time.time() - keep_days * 86400
+    ordered = sorted(runs.items(), key=lambda kv: max(f[2] for f in kv[1]), reverse=True)
+    removed = 0; total = 0
+    for i, (run, files) in enumerate(ordered):
+        size = sum(f[1] for f in files)
+        newest = max(f[2] for f in files)
+        if run != keep_name and (i >= keep_runs or newest < cutoff or total + size > keep_bytes):
+            for p, _, _ in files:
+                try: os.remove(p); removed += 1
+                except OSError: pass
+            continue
+        total += size
+    metrics = os.path.join(log_dir, 'metrics.jsonl')
+    try:
+        if os.path.getsize(metrics) > metrics_max:
+            os.replace(metrics, metrics + '.1')
+    except OSError:
+        pass
+    if removed: logging.info("Logs antigos removidos: %d arquivo(s).", removed)
+    return removed
@@ -1,6 +1,5 @@
 from __future__ import annotations
-import os, logging, ctypes
-import ctypes.wintypes as wintypes
+import os, time, logging, ctypes, threading
 
 try:
     import psutil  # type: ignore
@@ -8,66 +7,273 @@ try:
 except Exception:
     HAS_PSUTIL = False
 
-def optimize_memory_ram() -> tuple[int, int]:
-    """
-    Enxuga RAM via EmptyWorkingSet em processos de usuário (ignora críticos).
-    Retorna (processos_ajustados, tentativas).
-    """
-    logging.info("Otimizando memória RAM…")
-    psapi = ctypes.WinDLL('psapi', use_last_error=True)
-    kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+from . import metrics
+
+# Enxugamento de memória por política: escolhe os maiores processos (por
+# RSS) em vez de chamar EmptyWorkingSet em todos, mede o working set antes e
+# depois e reporta o quanto cada um devolveu. As chamadas ao sistema ficam
+# num `ProcessBackend`; `FakeProcessBackend` permite medir a lógica fora do
+# Windows.
+
+SKIPPED_NAMES = {"System", "Registry", "MemCompression", "Idle", "smss.exe", "csrss.exe", "wininit.exe",
+                 "services.exe", "lsass.exe", "winlogon.exe", "dwm.exe"}
+SYSTEM_ACCOUNTS = ('SYSTEM', 'LOCAL SERVICE', 'NETWORK SERVICE')
+DEFAULT_TOP_N = 30
+DEFAULT_MIN_RSS = 32 * 1024 * 1024
+
+# (pid, nome, rss, create_time)
+ProcRow = tuple[int, str, int, float]
 
-    EmptyWorkingSet = psapi.EmptyWorkingSet
-    EmptyWorkingSet.argtypes = [wintypes.HANDLE]
-    EmptyWorkingSet.restype  = wintypes.BOOL
+class ProcessBackend:
+    name = 'base'
 
-    OpenProcess = kernel32.OpenProcess
-    OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
-    OpenProcess.restype  = wintypes.HANDLE
+    def list_processes(self) -> list[ProcRow]:
+        """Listagem barata (sem usuário): pid, nome, RSS e instante de criação."""
+        raise NotImplementedError
 
-    CloseHandle = kernel32.CloseHandle
-    CloseHandle.argtypes = [wintypes.HANDLE]
-    CloseHandle.restype  = wintypes.BOOL
+    def owner(self, pid: int) -> str | None:
+        """Conta dona do processo (consulta cara; o chamador usa cache)."""
+        return None
 
+    def working_set(self, pid: int) -> int | None:
+        raise NotImplementedError
+
+    def trim(self, pid: int) -> bool:
+        raise NotImplementedError
+
+    def foreground_pid(self) -> int | None:
+        return None
+
+class WindowsProcessBackend(ProcessBackend):
+    name = 'windows'
     PROCESS_QUERY_INFORMATION = 0x0400
-    PROCESS_SET_QUOTA         = 0x0100
-
-    skipped = {"System", "Registry", "MemCompression", "Idle"}
-
-    count_ok = 0
-    count_try = 0
-
-    if HAS_PSUTIL:
-        for p in psutil.process_iter(['pid', 'name', 'username']):
-            name = (p.info.get('name') or '').strip()
-            pid  = p.info.get('pid')
-            if not pid or name in skipped:
-                continue
-            if pid == os.getpid():
-                continue
-            user = (p.info.get('username') or '')
-            if 'SYSTEM' in user or 'LOCAL SERVICE' in user or 'NETWORK SERVICE' in user:
-                continue
-            try:
-                h = OpenProcess(PROCESS_QUERY_INFORMATION | PROCESS_SET_QUOTA, False, pid)
-                if h:
-                    count_try += 1
-                    if EmptyWorkingSet(h):
-                        count_ok += 1
-                    CloseHandle(h)
-            except Exception:
-                continue
-    else:
-        try:
+    PROCESS_SET_QUOTA = 0x0100
+
+    def __init__(self):
+        import ctypes.wintypes as wintypes
+        psapi = ctypes.WinDLL('psapi', use_last_error=True)
+        kernel32 = ctypes.WinDLL('kernel32', use_last_error=True)
+        self._user32 = ctypes.WinDLL('user32', use_last_error=True)
+
+        self._EmptyWorkingSet = psapi.EmptyWorkingSet
+        self._EmptyWorkingSet.argtypes = [wintypes.HANDLE]
+        self._EmptyWorkingSet.restype = wintypes.BOOL
+        self._OpenProcess = kernel32.OpenProcess
+        self._OpenProcess.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+        self._OpenProcess.restype = wintypes.HANDLE
+        self._CloseHandle = kernel32.CloseHandle
+        self._CloseHandle.argtypes = [wintypes.HANDLE]
+        self._CloseHandle.restype = wintypes.BOOL
+        self._wintypes = wintypes
+
+    def list_processes(self) -> list[ProcRow]:
+        if not HAS_PSUTIL:
             pid = os.getpid()
-            h = OpenProcess(PROCESS_QUERY_INFORMATION | PROCESS_SET_QUOTA, False, pid)
-            if h:
-                count_try = 1
-                if EmptyWorkingSet(h):
-                    count_ok = 1
-                CloseHandle(h)
+            return [(pid, 'python', self.working_set(pid) or 0, 0.0)]
+        rows: list[ProcRow] = []
+        for p in psutil.process_iter(['pid', 'name', 'memory_info', 'create_time']):
+            mi = p.info.get('memory_info')
+            rows.append((p.info['pid'], (p.info.get('name') or '').strip(), mi.rss if mi else 0,
+                         p.info.get('create_time') or 0.0))
+        return rows
+
+    def owner(self, pid: int) -> str | None:
+        if not HAS_PSUTIL: return None
+        try: return psutil.Process(pid).username()
+        except Exception: return None
+
+    def working_set(self, pid: int) -> int | None:
+        if not HAS_PSUTIL: return None
+        try: return psutil.Process(pid).memory_info().rss
+        except Exception: return None
+
+    def trim(self, pid: int) -> bool:
+        h = self._OpenProcess(self.PROCESS_QUERY_INFORMATION | self.PROCESS_SET_QUOTA, False, pid)
+        if not h: return False
+        try: return bool(self._EmptyWorkingSet(h))
+        finally: self._CloseHandle(h)
+
+    def foreground_pid(self) -> int | None:
+        try:
+            hwnd = self._user32.GetForegroundWindow()
+            if not hwnd: return None
+            pid = self._wintypes.DWORD()
+            self._user32.GetWindowThreadProcessId(hwnd, ctypes.byref(pid))
+            return pid.value or None
         except Exception:
-            pass
+            return None
+
+class FakeProcessBackend(ProcessBackend):
+    """
+    Tabela de processos simulada: {pid: (nome, rss, usuário)}. `trim` reduz
+    o RSS por `trim_ratio`; `latency` (s) simula o custo de cada consulta e
+    `calls` conta as chamadas por método.
+    """
+    name = 'fake'
+
+    def __init__(self, table: dict[int, tuple[str, int, str]], trim_ratio: float = 0.6,
+                 latency: float = 0.0, foreground: int | None = None):
+        self.table = {pid: list(row) for pid, row in table.items()}
+        self.trim_ratio = trim_ratio; self.latency = latency; self.foreground = foreground
+        self.calls: dict[str, int] = {}
+
+    def _call(self, what: str) -> None:
+        self.calls[what] = self.calls.get(what, 0) + 1
+        if self.latency: time.sleep(self.latency)
+
+    def list_processes(self) -> list[ProcRow]:
+        self._call('list')
+        return [(pid, row[0], row[1], float(pid)) for pid, row in self.table.items()]
+
+    def owner(self, pid: int) -> str | None:
+        self._call('owner')
+        row = self.table.get(pid)
+        return row[2] if row else None
+
+    def working_set(self, pid: int) -> int | None:
+        self._call('working_set')
+        row = self.table.get(pid)
+        return row[1] if row else None
 
-    logging.info("RAM: processos ajustados: %d de %d.", count_ok, count_try)
-    return count_ok, count_try
+    def trim(self, pid: int) -> bool:
+        self._call('trim')
+        row = self.table.get(pid)
+        if row is None: return False
+        row[1] = int(row[1] * (1 - self.trim_ratio))
+        return True
+
+    def foreground_pid(self) -> int | None:
+        return self.foreground
+
+class TrimPolicy:
+    """
+    Quais processos enxugar: a união dos `top_n` maiores por RSS com os que
+    têm pelo menos `min_rss` bytes (None desativa cada critério; sem nenhum,
+    todos), fora de SKIPPED_NAMES e dos nomes extras em `exclude`, contas de
+    serviço e, se `skip_foreground`, o aplicativo em primeiro plano.
+    """
+    def __init__(self, top_n: int | None = DEFAULT_TOP_N, min_rss: int | None = DEFAULT_MIN_RSS,
+                 exclude: set[str] | None = None, skip_foreground: bool = True,
+                 skip_system_accounts: bool = True):
+        self.top_n = top_n; self.min_rss = min_rss
+        self.exclude = {n.lower() for n in SKIPPED_NAMES | set(exclude or ())}
+        self.skip_foreground = skip_foreground
+        self.skip_system_accounts = skip_system_accounts
+
+class MetadataCache:
+    """Dono e classificação por (pid, create_time) — válido enquanto o processo viver."""
+    def __init__(self):
+        self._data: dict[tuple[int, float], bool] = {}
+        self._lock = threading.Lock()
+        self.hits = 0; self.misses = 0
+
+    def is_system(self, backend: ProcessBackend, pid: int, created: float) -> bool:
+        key = (pid, created)
+        with self._lock:
+            if key in self._data:
+                self.hits += 1; return self._data[key]
+        user = backend.owner(pid) or ''
+        system = any(acc in user.upper() for acc in SYSTEM_ACCOUNTS)
+        with self._lock:
+            self.misses += 1; self._data[key] = system
+        return system
+
+    def prune(self, alive: set[tuple[int, float]]) -> None:
+        with self._lock:
+            for key in [k for k in self._data if k not in alive]: del self._data[key]
+
+_metadata = MetadataCache()
+
+def select_processes(rows: list[ProcRow], policy: TrimPolicy, backend: ProcessBackend,
+                     cache: MetadataCache | None = None) -> list[ProcRow]:
+    """Aplica a política; o dono só é consultado para os candidatos, do maior para o menor."""
+    cache = cache or _metadata
+    own = os.getpid()
+    fg = backend.foreground_pid() if policy.skip_foreground else None
+    picked: list[ProcRow] = []
+    for row in sorted(rows, key=lambda r: r[2], reverse=True):
+        pid, name, rss, created = row
+        # ordem decrescente: quando sai do top N e fica abaixo do limite, os demais também
+        in_top = policy.top_n is None or len(picked) < policy.top_n
+        above = policy.min_rss is None or rss >= policy.min_rss
+        if policy.top_n is not None and policy.min_rss is not None:
+            if not (in_top or above): break
+        elif not (in_top and above): break
+        if not pid or pid == own or pid == fg or name.lower() in policy.exclude: continue
+        if policy.skip_system_accounts and cache.is_system(backend, pid, created): continue
+        picked.append(row)
+    cache.prune({(r[0], r[3]) for r in rows})
+    return picked
+
+class TrimResult:
+    __slots__ = ('pid', 'name', 'before', 'after', 'ok')
+
+    def __init__(self, pid: int, name: str, before: int, after: int, ok: bool):
+        self.pid = pid; self.name = name; self.before = before; self.after = after; self.ok = ok
+
+    @property
+    def freed(self) -> int:
+        return max(0, self.before - self.after)
+
+    def __repr__(self) -> str:
+        return f"TrimResult({self.name}[{self.pid}], freed={self.freed}, ok={self.ok})"
+
+class TrimReport:
+    def __init__(self):
+        self.results: list[TrimResult] = []
+        self.candidates = 0
+        self.elapsed = 0.0
+
+    @property
+    def ok(self) -> int:
+        return sum(1 for r in self.results if r.ok)
+
+    @property
+    def tried(self) -> int:
+        return len(self.results)
+
+    @property
+    def freed(self) -> int:
+        return sum(r.freed for r in self.results)
+
+    def top(self, n: int = 5) -> list[TrimResult]:
+        return sorted(self.results, key=lambda r: r.freed, reverse=True)[:n]
+
+    def log(self) -> None:
+        logging.info("RAM: processos ajustados: %d de %d; %.1f MB devolvidos em %.2f s.",
+                     self.ok, self.tried, self.freed / 1048576, self.elapsed)
+        for r in self.top(len(self.results)):
+            logging.debug("RAM: %s (pid %d): %.1f -> %.1f MB", r.name, r.pid, r.before / 1048576, r.after / 1048576)
+
+def default_process_backend() -> ProcessBackend:
+    return WindowsProcessBackend()
+
+@metrics.instrument()
+def trim_memory(policy: TrimPolicy | None = None, backend: ProcessBackend | None = None,
+                cache: MetadataCache | None = None) -> TrimReport:
+    policy = policy or TrimPolicy()
+    backend = backend or default_process_backend()
+    report = TrimReport()
+    start = time.perf_counter()
+    targets = select_processes(backend.list_processes(), policy, backend, cache)
+    report.candidates = len(targets)
+    for pid, name, rss, _created in targets:
+        before = backend.working_set(pid)
+        if before is None: before = rss
+        try: ok = backend.trim(pid)
+        except Exception: ok = False
+        after = backend.working_set(pid) if ok else before
+        report.results.append(TrimResult(pid, name, before, before if after is None else after, ok))
+    report.elapsed = time.perf_counter() - start
+    metrics.add(bytes=report.freed, errors=report.tried - report.ok)
+    return report
+
+def optimize_memory_ram(policy: TrimPolicy | None = None) -> tuple[int, int]:
+    """
+    Enxuga RAM via EmptyWorkingSet nos processos escolhidos pela política.
+    Retorna (processos_ajustados, tentativas).
+    """
+    logging.info("Otimizando memória RAM…")
+    report = trim_memory(policy)
+    report.log()
+    return report.ok, report.tried
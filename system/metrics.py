@@ -0,0 +1,186 @@
+from __future__ import annotations
+import os, json, time, logging, threading, functools
+from collections import deque
+from typing import Callable, Iterator
+
+# Instrumentação: cada operação roda dentro de um span que mede tempo de
+# parede e de CPU (da thread), arquivos/bytes tocados, tempo gasto em
+# subprocessos e erros. Spans aninhados na mesma thread somam seus
+# contadores no pai; spans destacados (geradores de limpeza) guardam os
+# próprios números e só registram quem é o pai. Os spans encerrados ficam
+# numa janela em memória (consultável pela interface, CLI e benchmarks) e,
+# se configurado, são anexados a um arquivo JSON-lines.
+
+RECENT_SPANS = 2000
+RUN_ID = f"{int(time.time())}-{os.getpid()}"
+
+class Span:
+    __slots__ = ('name', 'attrs', 'parent', 'thread', 'started', 'wall', 'cpu', 'files', 'bytes',
+                 'subprocess', 'errors', 'error', 'detached', '_t0', '_c0', '_open')
+
+    def __init__(self, name: str, attrs: dict | None = None, detached: bool = False):
+        self.name = name; self.attrs = dict(attrs or {})
+        self.parent: Span | None = None
+        self.thread = threading.current_thread().name
+        self.started = time.time()
+        self.wall = 0.0; self.cpu = 0.0
+        self.files = 0; self.bytes = 0; self.subprocess = 0.0; self.errors = 0
+        self.error: str | None = None
+        self.detached = detached   # não entra na pilha da thread (ex.: geradores)
+        self._t0 = time.perf_counter(); self._c0 = time.thread_time()
+        self._open = True
+
+    def add(self, files: int = 0, bytes: int = 0, errors: int = 0, subprocess: float = 0.0) -> None:
+        self.files += files; self.bytes += bytes; self.errors += errors; self.subprocess += subprocess
+
+    def finish(self, error: BaseException | str | None = None) -> Span:
+        if not self._open: return self
+        self._open = False
+        self.wall = time.perf_counter() - self._t0
+        self.cpu = time.thread_time() - self._c0
+        if error is not None:
+            self.error = str(error) or type(error).__name__; self.errors += 1
+        if not self.detached: _pop(self)
+        if self.parent is not None and not self.detached:
+            self.parent.add(self.files, self.bytes, self.errors, self.subprocess)
+        recorder.record(self)
+        return self
+
+    def __enter__(self) -> Span:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.finish(exc)
+        return False
+
+    def to_dict(self) -> dict:
+        d = {'run': RUN_ID, 'name': self.name, 'started': round(self.started, 3), 'wall': round(self.wall, 4),
+             'cpu': round(self.cpu, 4), 'files': self.files, 'bytes': self.bytes,
+             'subprocess': round(self.subprocess, 4), 'errors': self.errors, 'thread': self.thread}
+        if self.parent is not None: d['parent'] = self.parent.name
+        if self.error: d['error'] = self.error
+        if self.attrs: d['attrs'] = self.attrs
+        return d
+
+    def __repr__(self) -> str:
+        return f"Span({self.name}, wall={self.wall:.3f}s, files={self.files}, bytes={self.bytes}, errors={self.errors})"
+
+_local = threading.local()
+
+def _stack() -> list[Span]:
+    st = getattr(_local, 'stack', None)
+    if st is None: st = _local.stack = []
+    return st
+
+def _pop(sp: Span) -> None:
+    st = _stack()
+    if sp in st: st.remove(sp)
+
+def current_span() -> Span | None:
+    st = _stack()
+    return st[-1] if st else None
+
+def span(name: str, detached: bool = False, **attrs) -> Span:
+    """Abre um span (use com `with`); `detached` para geradores consumidos aos poucos."""
+    sp = Span(name, attrs, detached)
+    sp.parent = current_span()
+    if not detached: _stack().append(sp)
+    return sp
+
+def add(files: int = 0, bytes: int = 0, errors: int = 0, subprocess: float = 0.0) -> None:
+    """Soma contadores no span corrente da thread (sem span aberto, não faz nada)."""
+    sp = current_span()
+    if sp is not None: sp.add(files, bytes, errors, subprocess)
+
+def instrument(name: str | None = None) -> Callable:
+    """Decorador: cada chamada da função vira um span."""
+    def deco(fn: Callable) -> Callable:
+        label = name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+def spanned_events(name: str, events: Iterator, **attrs) -> Iterator:
+    """
+    Envolve um iterador de `CleanupProgress` num span destacado: o último
+    evento define arquivos/bytes/erros. Serve para os geradores de limpeza.
+    """
+    sp = span(name, detached=True, **attrs)
+    last = None
+    try:
+        for last in events:
+            yield last
+    except GeneratorExit:
+        # o consumidor parou antes do fim (break, janela fechada): não é erro.
+        # Fecha o gerador interno já, para ele liberar workers/arquivos.
+        close = getattr(events, 'close', None)
+        if close is not None: close()
+        _add_last(sp, last); sp.attrs['cancelled'] = True
+        sp.finish(); raise
+    except BaseException as e:
+        sp.finish(e); raise
+    _add_last(sp, last)
+    sp.finish()
+
+def _add_last(sp: Span, last) -> None:
+    if last is None: return
+    files, nbytes = last.result
+    sp.add(files=files, bytes=nbytes, errors=last.errors)
+    if last.cancelled: sp.attrs['cancelled'] = True
+
+class MetricsRecorder:
+    def __init__(self, maxlen: int = RECENT_SPANS):
+        self.recent: deque[Span] = deque(maxlen=maxlen)
+        self.path: str | None = None
+        self._lock = threading.Lock()
+
+    def configure(self, path: str | None) -> None:
+        """Arquivo JSON-lines onde cada span encerrado é anexado (None desliga)."""
+        with self._lock:
+            self.path = path
+        if path: os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def record(self, sp: Span) -> None:
+        with self._lock:
+            self.recent.append(sp)
+            path = self.path
+            if path:
+                try:
+                    with open(path, 'a', encoding='utf-8') as fh:
+                        fh.write(json.dumps(sp.to_dict(), ensure_ascii=False) + "\n")
+                except OSError as e:
+                    logging.debug("Falha ao gravar métricas: %s", e)
+
+    def query(self, name: str | None = None, since: float | None = None, prefix: bool = False) -> list[Span]:
+        with self._lock:
+            spans = list(self.recent)
+        return [s for s in spans
+                if (name is None or (s.name.startswith(name) if prefix else s.name == name))
+                and (since is None or s.started >= since)]
+
+    def last(self, name: str) -> Span | None:
+        found = self.query(name)
+        return found[-1] if found else None
+
+    def summary(self, name: str | None = None, prefix: bool = False) -> dict[str, dict]:
+        """Totais por nome de span: chamadas, tempo, CPU, arquivos, bytes, subprocessos, erros."""
+        out: dict[str, dict] = {}
+        for s in self.query(name, prefix=prefix):
+            a = out.setdefault(s.name, {'count': 0, 'wall': 0.0, 'cpu': 0.0, 'files': 0, 'bytes': 0,
+                                        'subprocess': 0.0, 'errors': 0})
+            a['count'] += 1; a['wall'] += s.wall; a['cpu'] += s.cpu; a['files'] += s.files
+            a['bytes'] += s.bytes; a['subprocess'] += s.subprocess; a['errors'] += s.errors
+        return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self.recent.clear()
+
+recorder = MetricsRecorder()
+configure = recorder.configure
+query = recorder.query
+summary = recorder.summary
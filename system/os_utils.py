@@ -1,10 +1,14 @@
 from __future__ import annotations
-import os, sys, ctypes, subprocess
-import tkinter as tk
-from tkinter import messagebox
+import os, sys, time, ctypes, subprocess
+
+from . import metrics
+
+# Permite rodar fora do Windows (testes da CLI); as ações em si continuam
+# dependendo das APIs do Windows.
+SKIP_OS_CHECK_ENV = 'OTIMIZADOR_SKIP_OS_CHECK'
 
 def ensure_windows():
-    if os.name != 'nt':
+    if os.name != 'nt' and os.environ.get(SKIP_OS_CHECK_ENV) != '1':
         raise SystemExit("Este aplicativo é somente para Windows.")
 
 def is_admin() -> bool:
@@ -18,13 +22,23 @@ def relaunch_as_admin():
         params = " ".join(f'"{a}"' for a in sys.argv)
         ctypes.windll.shell32.ShellExecuteW(None, "runas", sys.executable, params, None, 1)
     except Exception as e:
+        from tkinter import messagebox  # só a interface chama isto
         messagebox.showwarning("Permissão", f"Falha ao elevar privilégios: {e}")
 
-def run_ps(cmd: list[str]) -> subprocess.CompletedProcess:
-    return subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='ignore')
+def run_ps(cmd: list[str], timeout: float | None = None) -> subprocess.CompletedProcess:
+    start = time.perf_counter()
+    try:
+        return subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='ignore', timeout=timeout)
+    finally:
+        metrics.add(subprocess=time.perf_counter() - start)
 
-def run_cmd(cmd: list[str]) -> subprocess.CompletedProcess:
-    return subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='ignore', shell=False)
+def run_cmd(cmd: list[str], timeout: float | None = None) -> subprocess.CompletedProcess:
+    start = time.perf_counter()
+    try:
+        return subprocess.run(cmd, capture_output=True, text=True, encoding='utf-8', errors='ignore', shell=False,
+                              timeout=timeout)
+    finally:
+        metrics.add(subprocess=time.perf_counter() - start)
 
 def human_size(num_bytes: int) -> str:
     for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
@@ -33,11 +47,18 @@ def human_size(num_bytes: int) -> str:
         num_bytes /= 1024.0
     return f"{num_bytes:.1f} PB"
 
+def app_cache_dir(*parts: str) -> str:
+    """Pasta de cache por usuário (%LOCALAPPDATA%\\DisdalTech\\Otimizador\\…), criada sob demanda."""
+    base = os.environ.get('LOCALAPPDATA') or os.environ.get('TEMP') or os.path.expanduser('~')
+    path = os.path.join(base, 'DisdalTech', 'Otimizador', *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
 def resource_path(name: str) -> str:
     base = getattr(sys, "_MEIPASS", os.path.abspath(os.path.dirname(os.path.dirname(__file__))))
     return os.path.join(base, name)
 
-def disable_maximize_button(root: tk.Tk) -> None:
+def disable_maximize_button(root) -> None:
     try:
         GWL_STYLE      = -16
         WS_MAXIMIZEBOX = 0x00010000
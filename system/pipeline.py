@@ -0,0 +1,293 @@
+from __future__ import annotations
+import os, re, json, time, logging
+from concurrent.futures import FIRST_COMPLETED, wait
+from typing import Callable, Iterator, Sequence
+
+from . import metrics
+from .actions import ACTIONS, STATUS_ERROR, STATUS_OK, STATUS_SKIPPED, ActionResult, run_action
+from .jobs import JobRunner
+from .os_utils import app_cache_dir
+from .progress import CancelToken, is_cancelled
+
+# Manutenção em etapas: um perfil é uma lista de ações do catálogo
+# (system.actions) com dependências. Etapas independentes rodam ao mesmo
+# tempo, cada uma no pool da sua classe de recurso do JobRunner — duas
+# limpezas de disco continuam em fila, mas o ponto de restauração
+# (processo) anda junto com a Lixeira (disco) e a RAM (leve).
+#
+# Dependências:
+#   after    — só ordem: espera a outra etapa terminar, dê certo ou não;
+#   requires — a outra etapa precisa dar certo, senão esta é pulada.
+# Além das declaradas no perfil, valem as regras de `DEPENDENCY_RULES`
+# sempre que as duas ações estão no mesmo perfil.
+#
+# Perfil salvo (profiles/<nome>.json na pasta do app):
+#   {"name": "noite", "title": "Noite", "steps": ["recycle", "caches",
+#    {"action": "defrag", "after": ["recycle"]}]}
+
+STEP_PENDING = 'pending'
+STEP_RUNNING = 'running'
+
+# (antes, depois, obrigatória): ajustes de registro/aparência só com ponto de
+# restauração criado; o defrag vem depois das limpezas (menos arquivos a mover)
+DEPENDENCY_RULES: list[tuple[str, str, bool]] = [
+    ('restore', 'power-high', True), ('restore', 'power-balanced', True), ('restore', 'revert', True),
+    ('caches', 'defrag', False), ('caches-budget', 'defrag', False),
+    ('thumbs', 'defrag', False), ('recycle', 'defrag', False),
+]
+
+PROFILE_DIR = 'profiles'
+_PROFILE_NAME = re.compile(r'^[\w\- ]{1,40}$')
+
+class Step:
+    __slots__ = ('action', 'after', 'requires')
+
+    def __init__(self, action: str, after: Sequence[str] = (), requires: Sequence[str] = ()):
+        self.action = action; self.after = list(after); self.requires = list(requires)
+
+    def to_dict(self) -> dict:
+        d: dict = {'action': self.action}
+        if self.after: d['after'] = self.after
+        if self.requires: d['requires'] = self.requires
+        return d
+
+    @classmethod
+    def from_dict(cls, d: dict | str) -> Step:
+        if isinstance(d, str): return cls(d)
+        return cls(d['action'], d.get('after', ()), d.get('requires', ()))
+
+    def __repr__(self) -> str:
+        return f"Step({self.action}, after={self.after}, requires={self.requires})"
+
+class Profile:
+    __slots__ = ('name', 'title', 'steps')
+
+    def __init__(self, name: str, steps: Sequence[Step | str], title: str = ''):
+        self.name = name; self.title = title or name
+        self.steps = [s if isinstance(s, Step) else Step(s) for s in steps]
+
+    @property
+    def actions(self) -> list[str]:
+        return [s.action for s in self.steps]
+
+    def to_dict(self) -> dict:
+        return {'name': self.name, 'title': self.title, 'steps': [s.to_dict() for s in self.steps]}
+
+    @classmethod
+    def from_dict(cls, d: dict) -> Profile:
+        return cls(d['name'], [Step.from_dict(s) for s in d.get('steps', ())], d.get('title', ''))
+
+    def __repr__(self) -> str:
+        return f"Profile({self.name}, {self.actions})"
+
+BUILTIN_PROFILES = {
+    'rapida': Profile('rapida', ['recycle', 'thumbs', 'caches', 'ram'], "Rápida (limpezas + RAM)"),
+    'completa': Profile('completa', ['restore', 'recycle', 'thumbs', 'caches', 'ram', 'defrag'],
+                        "Completa (ponto de restauração, limpezas, RAM e unidades)"),
+    'desempenho': Profile('desempenho', ['restore', 'power-high', 'ram'],
+                          "Desempenho (ponto de restauração + plano de energia)"),
+}
+
+# --- perfis salvos -----------------------------------------------------
+def _profile_path(name: str) -> str:
+    if not _PROFILE_NAME.match(name):
+        raise ValueError(f"nome de perfil inválido: {name!r}")
+    return os.path.join(app_cache_dir(PROFILE_DIR), f"{name}.json")
+
+def list_profiles() -> dict[str, Profile]:
+    """Perfis embutidos e salvos (um salvo com o mesmo nome substitui o embutido)."""
+    found = dict(BUILTIN_PROFILES)
+    try:
+        names = sorted(os.listdir(app_cache_dir(PROFILE_DIR)))
+    except OSError:
+        names = []
+    for fname in names:
+        if not fname.endswith('.json'): continue
+        try:
+            prof = load_profile(fname[:-5])
+            found[prof.name] = prof
+        except (OSError, ValueError, KeyError) as e:
+            logging.warning("Perfil ignorado (%s): %s", fname, e)
+    return found
+
+def load_profile(name: str) -> Profile:
+    try:
+        with open(_profile_path(name), 'r', encoding='utf-8') as fh:
+            return Profile.from_dict(json.load(fh))
+    except FileNotFoundError:
+        if name in BUILTIN_PROFILES: return BUILTIN_PROFILES[name]
+        raise ValueError(f"perfil desconhecido: {name}")
+
+def save_profile(profile: Profile) -> str:
+    Pipeline(profile)   # valida ações e dependências antes de gravar
+    path = _profile_path(profile.name); tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        json.dump(profile.to_dict(), fh, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    return path
+
+def delete_profile(name: str) -> bool:
+    try:
+        os.remove(_profile_path(name)); return True
+    except FileNotFoundError:
+        return False
+
+# --- execução ----------------------------------------------------------
+class StepStatus:
+    __slots__ = ('name', 'title', 'resource', 'state', 'result', 'started', 'elapsed')
+
+    def __init__(self, name: str):
+        action = ACTIONS[name]
+        self.name = name; self.title = action.title; self.resource = action.resource
+        self.state = STEP_PENDING
+        self.result: ActionResult | None = None
+        self.started = 0.0; self.elapsed = 0.0
+
+    @property
+    def done(self) -> bool:
+        return self.result is not None
+
+    def copy(self) -> StepStatus:
+        st = StepStatus.__new__(StepStatus)
+        for k in self.__slots__: setattr(st, k, getattr(self, k))
+        if self.state == STEP_RUNNING: st.elapsed = time.perf_counter() - self.started
+        return st
+
+    def __repr__(self) -> str:
+        return f"StepStatus({self.name}, {self.state}, {self.elapsed:.2f}s)"
+
+class PipelineProgress:
+    """Evento do pipeline: cópia do estado de cada etapa, na ordem do perfil."""
+    __slots__ = ('profile', 'steps', 'elapsed', 'done', 'cancelled')
+
+    def __init__(self, profile: str, steps: list[StepStatus], elapsed: float = 0.0):
+        self.profile = profile; self.steps = steps; self.elapsed = elapsed
+        self.done = False; self.cancelled = False
+
+    @property
+    def results(self) -> list[ActionResult]:
+        return [st.result for st in self.steps if st.result is not None]
+
+    @property
+    def ok(self) -> bool:
+        return all(st.result is not None and st.result.ok for st in self.steps)
+
+    @property
+    def errors(self) -> int:
+        return sum(not r.ok for r in self.results)
+
+    @property
+    def result(self) -> tuple[int, int]:
+        """(arquivos, bytes) somados das etapas de limpeza."""
+        return (sum(r.data.get('files', 0) for r in self.results),
+                sum(r.data.get('bytes', 0) for r in self.results if 'files' in r.data))
+
+    def summary(self) -> dict:
+        serial = sum(r.elapsed for r in self.results)
+        return {'profile': self.profile, 'ok': self.ok, 'cancelled': self.cancelled,
+                'elapsed': round(self.elapsed, 3), 'serial': round(serial, 3),
+                'steps': [r.to_dict() for r in self.results]}
+
+    def __repr__(self) -> str:
+        return f"PipelineProgress({self.profile}, {self.steps}, done={self.done})"
+
+class Pipeline:
+    """
+    Grafo de etapas de um perfil. Levanta ValueError para ação desconhecida,
+    dependência fora do perfil ou ciclo.
+    """
+    def __init__(self, profile: Profile, rules: Sequence[tuple[str, str, bool]] | None = None):
+        self.profile = profile
+        names = profile.actions
+        unknown = [n for n in names if n not in ACTIONS]
+        if unknown: raise ValueError(f"ações desconhecidas: {', '.join(unknown)}")
+        if len(set(names)) != len(names): raise ValueError("ação repetida no perfil")
+        present = set(names)
+        self.deps: dict[str, dict[str, bool]] = {n: {} for n in names}   # etapa -> {dependência: obrigatória}
+        for step in profile.steps:
+            for dep, hard in [(d, False) for d in step.after] + [(d, True) for d in step.requires]:
+                if dep not in present: raise ValueError(f"{step.action}: dependência fora do perfil: {dep}")
+                self.deps[step.action][dep] = self.deps[step.action].get(dep, False) or hard
+        for before, after, hard in (DEPENDENCY_RULES if rules is None else rules):
+            if before in present and after in present:
+                self.deps[after][before] = self.deps[after].get(before, False) or hard
+        self._check_cycles()
+
+    def _check_cycles(self) -> None:
+        state: dict[str, int] = {}   # 1 = visitando, 2 = ok
+        def visit(n: str, path: list[str]) -> None:
+            if state.get(n) == 2: return
+            if state.get(n) == 1: raise ValueError(f"dependência circular: {' -> '.join(path + [n])}")
+            state[n] = 1
+            for d in self.deps[n]: visit(d, path + [n])
+            state[n] = 2
+        for n in self.deps: visit(n, [])
+
+    def iter_run(self, dry_run: bool = False, cancel: CancelToken | None = None, runner: JobRunner | None = None,
+                 interval: float = 0.5) -> Iterator[PipelineProgress]:
+        """
+        Roda o perfil e produz um evento a cada mudança de etapa (ou a cada
+        `interval` s); o último tem `done=True`. Sem `runner`, usa um
+        JobRunner próprio, encerrado no fim.
+        """
+        return metrics.spanned_events(f"pipeline.{self.profile.name}",
+                                      self._iter_run(dry_run, cancel, runner, interval), dry_run=dry_run)
+
+    def _iter_run(self, dry_run: bool, cancel: CancelToken | None, runner: JobRunner | None,
+                  interval: float) -> Iterator[PipelineProgress]:
+        own = runner is None
+        runner = runner or JobRunner()
+        status = {n: StepStatus(n) for n in self.profile.actions}
+        running: dict = {}   # future -> nome
+        start = time.perf_counter()
+
+        def snapshot() -> PipelineProgress:
+            return PipelineProgress(self.profile.name, [st.copy() for st in status.values()],
+                                    time.perf_counter() - start)
+
+        def finish(st: StepStatus, res: ActionResult) -> None:
+            st.result = res; st.state = res.status; st.elapsed = res.elapsed
+            logging.info("Etapa %s: %s em %.1f s%s", st.name, res.status, res.elapsed,
+                         f" ({res.error})" if res.error else "")
+        try:
+            while True:
+                for st in status.values():
+                    if st.state != STEP_PENDING: continue
+                    deps = self.deps[st.name]
+                    if not all(status[d].done for d in deps): continue
+                    failed = [d for d, hard in deps.items() if hard and status[d].result.status != STATUS_OK]
+                    if failed:
+                        finish(st, ActionResult(st.name, STATUS_SKIPPED, error=f"depende de {', '.join(failed)}"))
+                        continue
+                    st.state = STEP_RUNNING; st.started = time.perf_counter()
+                    job = runner.submit(run_action, st.name, dry_run, cancel, resource=st.resource,
+                                        name=f"etapa.{st.name}")
+                    running[job.future] = (st, job)
+                if not running: break
+                yield snapshot()
+                done, _ = wait(list(running), timeout=interval, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    st, job = running.pop(fut)
+                    res = job.result if job.ok else ActionResult(st.name, STATUS_ERROR, error=str(job.error))
+                    finish(st, res)
+        finally:
+            if own: runner.shutdown(wait=not running)
+        ev = snapshot(); ev.done = True; ev.cancelled = is_cancelled(cancel)
+        serial = sum(r.elapsed for r in ev.results)
+        logging.info("Pipeline %s: %d etapa(s), %d com falha, %.1f s (%.1f s se em série).",
+                     self.profile.name, len(ev.steps), ev.errors, ev.elapsed, serial)
+        yield ev
+
+    def run(self, dry_run: bool = False, cancel: CancelToken | None = None, runner: JobRunner | None = None,
+            on_event: Callable[[PipelineProgress], None] | None = None) -> PipelineProgress:
+        last = None
+        for last in self.iter_run(dry_run, cancel, runner):
+            if on_event: on_event(last)
+        return last
+
+def run_profile(profile: Profile | str | Sequence[str], dry_run: bool = False, cancel: CancelToken | None = None,
+                on_event: Callable[[PipelineProgress], None] | None = None) -> PipelineProgress:
+    """Para scripts: `run_profile('rapida')`, `run_profile(['caches', 'defrag'])` ou um Profile."""
+    if isinstance(profile, str): profile = load_profile(profile)
+    elif not isinstance(profile, Profile): profile = Profile('custom', list(profile))
+    return Pipeline(profile).run(dry_run, cancel, on_event=on_event)
@@ -0,0 +1,213 @@
+from __future__ import annotations
+import os, time, hashlib, logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterator
+
+from .scanner import DEFAULT_SCAN_WORKERS, FileEntry, UsageEntry, scan_tree, scan_tree_usage
+from .progress import BATCH_SIZE, CancelToken, CleanupProgress, Throttle, drain, is_cancelled, PROGRESS_INTERVAL
+from .deleters import MODE_AUTO
+from .scheduler import make_scheduler
+from .logs import aggregate
+from .budget import ByteBudget, GroupShrink, apply_budget
+from .scan_index import ScanIndex
+from . import metrics
+
+# scan(raiz, cutoff, cancel) -> (arquivos elegíveis, {pasta: mtime_ns}, pastas com arquivos poupados)
+RootScan = Callable[..., tuple[list[FileEntry], dict[str, int], set[str]]]
+
+def _fingerprint(dirs: dict[str, int]) -> str:
+    h = hashlib.blake2b(digest_size=8)
+    for d in sorted(dirs):
+        h.update(f"{d}\0{dirs[d]}\n".encode('utf-8', 'surrogatepass'))
+    return h.hexdigest()
+
+def _current_dirs(dirs: dict[str, int]) -> dict[str, int]:
+    cur: dict[str, int] = {}
+    for d in dirs:
+        try: cur[d] = os.stat(d).st_mtime_ns
+        except OSError: cur[d] = -1
+    return cur
+
+class RootPlan:
+    __slots__ = ('root', 'entries', 'dirs', 'kept', 'fingerprint', 'pool')
+
+    def __init__(self, root: str, entries: list[FileEntry], dirs: dict[str, int], kept: set[str],
+                 pool: list[UsageEntry] | None = None):
+        self.root = root; self.entries = entries; self.dirs = dirs; self.kept = kept
+        self.fingerprint = _fingerprint(dirs)
+        self.pool = pool   # modo orçamento: todos os arquivos da raiz, com último uso
+
+    @property
+    def bytes(self) -> int:
+        return sum(e[1] for e in self.entries)
+
+    def changed(self) -> bool:
+        """Só stat das pastas registradas: arquivo criado/removido muda o mtime da pasta."""
+        return _fingerprint(_current_dirs(self.dirs)) != self.fingerprint
+
+class CleanupPlan:
+    """
+    Resultado reutilizável de uma pré-visualização: lista de arquivos (tamanho,
+    mtime) e impressão digital de cada raiz. A execução revalida o plano de
+    forma barata — só raízes cuja impressão mudou são varridas de novo e
+    entradas com mtime alterado são puladas.
+
+    Com `budget`, a varredura guarda todos os arquivos e o plano passa a ser
+    só o necessário para caber no orçamento (ver system.budget); `groups`
+    (raiz -> nome) agrupa as raízes por navegador e `shrink` traz o quanto
+    cada grupo encolhe. `older_than_days` é ignorado nesse modo.
+
+    Com `index` (ver system.scan_index), a varredura parte do índice em
+    disco e o grava ao fim de cada varredura/revalidação: a listagem das
+    pastas sobrevive ao fechamento do programa.
+    """
+    def __init__(self, roots: list[str], older_than_days: int = 0, scan: RootScan | None = None,
+                 strict_mtime: bool = True, label: str = 'plan', budget: ByteBudget | None = None,
+                 groups: dict[str, str] | None = None, index: ScanIndex | None = None):
+        self.label = label   # prefixo dos spans: cleanup.<label>.scan/revalidate/execute
+        self.roots_wanted = list(roots)
+        self.older_than_days = older_than_days
+        self.budget = budget
+        self.groups = dict(groups or {})
+        self.index = index if budget is None else None   # o orçamento precisa do último uso (atime)
+        self.scan = scan or (scan_tree_usage if budget is not None else
+                             self.index.scan if self.index is not None else scan_tree)
+        self.strict_mtime = strict_mtime
+        self.roots: dict[str, RootPlan] = {}
+        self.shrink: dict[str, GroupShrink] = {}
+        self.created = 0.0
+
+    @property
+    def count(self) -> int:
+        return sum(len(rp.entries) for rp in self.roots.values())
+
+    @property
+    def bytes(self) -> int:
+        return sum(rp.bytes for rp in self.roots.values())
+
+    def _cutoff(self) -> float | None:
+        if self.budget is not None: return None
+        return time.time() - self.older_than_days * 86400 if self.older_than_days > 0 else None
+
+    def _apply_budget(self, prog: CleanupProgress) -> None:
+        """Refaz a seleção do orçamento sobre as raízes atuais (barato: tudo em memória)."""
+        if self.budget is None: return
+        chosen, self.shrink = apply_budget({r: rp.pool or [] for r, rp in self.roots.items()},
+                                           self.budget, self.groups)
+        for root, (entries, kept) in chosen.items():
+            rp = self.roots[root]; rp.entries = entries; rp.kept = kept
+        prog.scanned = self.count; prog.bytes = self.bytes
+
+    def _scan_roots(self, roots: list[str], workers: int, cancel: CancelToken | None,
+                    interval: float, prog: CleanupProgress) -> Iterator[CleanupProgress]:
+        if not roots: return
+        cutoff = self._cutoff(); throttle = Throttle(interval)
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(roots))), thread_name_prefix='plan') as ex:
+            futs = {ex.submit(self.scan, r, cutoff, cancel): r for r in roots}
+            for fut in as_completed(futs):
+                root = futs[fut]
+                try: entries, dirs, kept = fut.result()
+                except Exception as e:
+                    logging.warning("Falha ao varrer %s: %s", root, e, extra=aggregate('varredura')); continue
+                if self.budget is not None:
+                    rp = RootPlan(root, [], dirs, kept, pool=entries)
+                    prog.scanned += len(entries); prog.bytes += sum(ue[1] for ue in entries)
+                else:
+                    rp = RootPlan(root, entries, dirs, kept)
+                    prog.scanned += len(entries); prog.bytes += rp.bytes
+                self.roots[root] = rp
+                if throttle.ready(): yield prog.snapshot()
+                if is_cancelled(cancel):
+                    for f in futs: f.cancel()
+        if self.index is not None: self.index.save()
+
+    def iter_build(self, workers: int = DEFAULT_SCAN_WORKERS, cancel: CancelToken | None = None,
+                   interval: float = PROGRESS_INTERVAL) -> Iterator[CleanupProgress]:
+        """Varredura completa; eventos como os de uma pré-visualização."""
+        return metrics.spanned_events(f"cleanup.{self.label}.scan", self._iter_build(workers, cancel, interval))
+
+    def _iter_build(self, workers: int, cancel: CancelToken | None, interval: float) -> Iterator[CleanupProgress]:
+        self.roots = {}; self.created = time.time()
+        prog = CleanupProgress(dry_run=True)
+        yield from self._scan_roots([r for r in self.roots_wanted if os.path.isdir(r)], workers, cancel, interval, prog)
+        self._apply_budget(prog)
+        prog.cancelled = is_cancelled(cancel); prog.done = True
+        yield prog.snapshot()
+
+    def build(self, workers: int = DEFAULT_SCAN_WORKERS) -> CleanupPlan:
+        drain(self.iter_build(workers))
+        return self
+
+    def iter_revalidate(self, roots: list[str] | None = None, workers: int = DEFAULT_SCAN_WORKERS,
+                        cancel: CancelToken | None = None,
+                        interval: float = PROGRESS_INTERVAL) -> Iterator[CleanupProgress]:
+        """
+        Revarre só raízes novas ou com impressão alterada; raízes que sumiram
+        (ou fora de `roots`, se informado) saem do plano.
+        """
+        return metrics.spanned_events(f"cleanup.{self.label}.revalidate",
+                                      self._iter_revalidate(roots, workers, cancel, interval))
+
+    def _iter_revalidate(self, roots: list[str] | None, workers: int, cancel: CancelToken | None,
+                         interval: float) -> Iterator[CleanupProgress]:
+        if roots is not None: self.roots_wanted = list(roots)
+        wanted = [r for r in self.roots_wanted if os.path.isdir(r)]
+        for r in list(self.roots):
+            if r not in wanted: del self.roots[r]
+        stale = [r for r in wanted if r not in self.roots or self.roots[r].changed()]
+        for r in stale: self.roots.pop(r, None)
+        if stale:
+            logging.info("Plano: %d de %d raízes mudaram; varrendo novamente.", len(stale), len(wanted))
+        prog = CleanupProgress(dry_run=True)
+        for rp in self.roots.values():
+            prog.scanned += len(rp.entries); prog.bytes += rp.bytes
+        yield from self._scan_roots(stale, workers, cancel, interval, prog)
+        self._apply_budget(prog)
+        prog.cancelled = is_cancelled(cancel); prog.done = True
+        yield prog.snapshot()
+
+    def revalidate(self, roots: list[str] | None = None, workers: int = DEFAULT_SCAN_WORKERS) -> CleanupPlan:
+        drain(self.iter_revalidate(roots, workers))
+        return self
+
+    def iter_execute(self, mode: str = MODE_AUTO, workers: int = DEFAULT_SCAN_WORKERS,
+                     cancel: CancelToken | None = None,
+                     interval: float = PROGRESS_INTERVAL) -> Iterator[CleanupProgress]:
+        return metrics.spanned_events(f"cleanup.{self.label}.execute",
+                                      self._iter_execute(mode, workers, cancel, interval), mode=mode)
+
+    def _iter_execute(self, mode: str, workers: int, cancel: CancelToken | None,
+                      interval: float) -> Iterator[CleanupProgress]:
+        drain(self._iter_revalidate(None, workers, cancel, interval))
+        prog = CleanupProgress(dry_run=False); throttle = Throttle(interval)
+        backend = make_scheduler(mode)
+        backend.begin(list(self.roots))
+        for rp in self.roots.values():
+            for d in rp.kept: backend.keep_dir(d)
+        for rp in self.roots.values():
+            for i in range(0, len(rp.entries), BATCH_SIZE):
+                if is_cancelled(cancel): break
+                batch = []
+                for fe in rp.entries[i:i + BATCH_SIZE]:
+                    if self.strict_mtime:
+                        try: st = os.stat(fe[0])
+                        except OSError:
+                            prog.skipped += 1; continue
+                        if st.st_mtime != fe[2]:
+                            prog.skipped += 1; backend.skip(fe[0]); continue
+                    batch.append(fe)
+                prog.scanned += len(batch); prog.bytes += sum(fe[1] for fe in batch)
+                ok, failed = backend.submit(batch)
+                prog.deleted += ok; prog.errors += failed
+                if throttle.ready(): yield prog.snapshot()
+        ok, failed = backend.drain() if is_cancelled(cancel) else backend.flush()
+        prog.deleted += ok; prog.errors += failed
+        backend.log_summary()
+        if prog.skipped:
+            logging.info("Plano: %d arquivos alterados desde a pré-visualização foram mantidos.", prog.skipped)
+        self.roots = {}
+        prog.cancelled = is_cancelled(cancel); prog.done = True
+        yield prog.snapshot()
+
+    def execute(self, mode: str = MODE_AUTO, workers: int = DEFAULT_SCAN_WORKERS) -> tuple[int, int]:
+        return drain(self.iter_execute(mode, workers)).result
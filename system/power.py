@@ -1,10 +1,22 @@
 from __future__ import annotations
-import logging
+import re, logging
 from .os_utils import run_ps
+from .pshost import run_powershell
+from . import metrics
 
 GUID_BALANCED = "381b4222-f694-41f0-9685-ff5bb260df2e"
 GUID_HIGH     = "8c5e7fda-e8bf-4a96-9a85-a6e23a8c635c"
 
+_SCHEME_RE = re.compile(r'([0-9a-fA-F]{8}(?:-[0-9a-fA-F]{4}){3}-[0-9a-fA-F]{12})\s*\((.*)\)')
+
+@metrics.instrument()
+def get_active_power_plan() -> tuple[str, str] | None:
+    """(GUID, nome) do plano ativo, consultado pela sessão quente do PowerShell."""
+    res = run_powershell("powercfg /getactivescheme", timeout=30)
+    m = _SCHEME_RE.search(res.stdout) if res.ok else None
+    return (m.group(1).lower(), m.group(2).strip()) if m else None
+
+@metrics.instrument()
 def set_power_plan_high_performance() -> bool:
     try:
         p = run_ps(['powercfg', '/S', GUID_HIGH])
@@ -17,6 +29,7 @@ def set_power_plan_high_performance() -> bool:
         logging.error("Erro ao ativar plano: %s", e)
         return False
 
+@metrics.instrument()
 def set_power_plan_balanced() -> bool:
     try:
         p = run_ps(['powercfg', '/S', GUID_BALANCED])
@@ -0,0 +1,64 @@
+from __future__ import annotations
+import time, threading
+
+# Intervalo mínimo entre eventos de progresso (s) e tamanho do lote de arquivos
+PROGRESS_INTERVAL = 0.1
+BATCH_SIZE = 512
+
+class CancelToken:
+    """Sinal de cancelamento compartilhado entre a interface e os workers."""
+    def __init__(self):
+        self._ev = threading.Event()
+
+    def cancel(self) -> None:
+        self._ev.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._ev.is_set()
+
+def is_cancelled(token: CancelToken | None) -> bool:
+    return token is not None and token.cancelled
+
+class Throttle:
+    """`ready()` é verdadeiro no máximo uma vez a cada `interval` segundos."""
+    def __init__(self, interval: float = PROGRESS_INTERVAL):
+        self.interval = interval
+        self._last = 0.0
+
+    def ready(self) -> bool:
+        now = time.monotonic()
+        if now - self._last >= self.interval:
+            self._last = now
+            return True
+        return False
+
+class CleanupProgress:
+    """Evento de progresso de uma limpeza (cópia imutável por convenção)."""
+    __slots__ = ('dry_run', 'scanned', 'bytes', 'deleted', 'errors', 'skipped', 'done', 'cancelled')
+
+    def __init__(self, dry_run: bool = False):
+        self.dry_run = dry_run
+        self.scanned = 0; self.bytes = 0; self.deleted = 0; self.errors = 0
+        self.skipped = 0  # entradas de um plano que mudaram desde a varredura
+        self.done = False; self.cancelled = False
+
+    def snapshot(self) -> CleanupProgress:
+        ev = CleanupProgress(self.dry_run)
+        for k in self.__slots__: setattr(ev, k, getattr(self, k))
+        return ev
+
+    @property
+    def result(self) -> tuple[int, int]:
+        """(arquivos, bytes) no formato das funções de limpeza."""
+        return (self.scanned if self.dry_run else self.deleted), self.bytes
+
+    def __repr__(self) -> str:
+        return (f"CleanupProgress(scanned={self.scanned}, bytes={self.bytes}, deleted={self.deleted}, "
+                f"errors={self.errors}, skipped={self.skipped}, done={self.done}, cancelled={self.cancelled})")
+
+def drain(events) -> CleanupProgress:
+    """Consome um iterador de progresso e devolve o último evento."""
+    last = CleanupProgress()
+    for last in events: pass
+    return last
@@ -0,0 +1,265 @@
+from __future__ import annotations
+import os, time, uuid, queue, base64, atexit, logging, threading, subprocess
+
+from .runner import CommandResult
+from . import metrics
+
+# Sessões de shell "quentes": o interpretador fica aberto e recebe cada
+# requisição pelo stdin, delimitada por um marcador único que o próprio
+# script escreve no fim do stdout (com o código de saída) e do stderr.
+
+DEFAULT_TIMEOUT = 120.0
+IDLE_TIMEOUT = 300.0   # sessões ociosas por mais que isso são encerradas
+START_TIMEOUT = 30.0
+_CREATIONFLAGS = getattr(subprocess, 'CREATE_NO_WINDOW', 0) if os.name == 'nt' else 0
+
+class Dialect:
+    """Como iniciar o interpretador e como emoldurar uma requisição."""
+    name = 'base'
+    argv: list[str] = []
+    prelude = ''
+    ping = ''
+
+    def frame(self, script: str, token: str) -> str:
+        raise NotImplementedError
+
+    @staticmethod
+    def end_marker(token: str) -> str:
+        return f"<<END:{token}"
+
+class PowerShellDialect(Dialect):
+    name = 'powershell'
+    argv = ['powershell', '-NoLogo', '-NoProfile', '-NonInteractive', '-ExecutionPolicy', 'Bypass', '-Command', '-']
+    prelude = "[Console]::OutputEncoding = [Text.Encoding]::UTF8; $ProgressPreference = 'SilentlyContinue'\n"
+    ping = "'pong'"
+
+    def frame(self, script: str, token: str) -> str:
+        # o script vai em base64 para caber numa linha só (o -Command - lê linha a linha).
+        # 'Stop' transforma erros não terminantes (ex.: cmdlet que falha num item) em
+        # exceção: caem no catch, viram código 1 e o texto vai para o stderr.
+        b64 = base64.b64encode(script.encode('utf-8')).decode('ascii')
+        end = self.end_marker(token)
+        return ("$__rc = 0; $global:LASTEXITCODE = 0; $ErrorActionPreference = 'Stop'; try { "
+                f"Invoke-Expression ([Text.Encoding]::UTF8.GetString([Convert]::FromBase64String('{b64}'))) "
+                "| Out-String -Stream | ForEach-Object { [Console]::Out.WriteLine($_) }; "
+                "if ($global:LASTEXITCODE) { $__rc = $global:LASTEXITCODE } "
+                "} catch { $__rc = 1; [Console]::Error.WriteLine($_.ToString()) } "
+                "finally { $ErrorActionPreference = 'Continue' }; "
+                f"[Console]::Out.WriteLine('{end}:' + $__rc + '>>'); [Console]::Out.Flush(); "
+                f"[Console]::Error.WriteLine('{end}>>'); [Console]::Error.Flush()\n")
+
+class PosixShellDialect(Dialect):
+    """Substituto (sh) para testar o host fora do Windows."""
+    name = 'sh'
+    argv = ['sh']
+    ping = "echo pong"
+
+    def frame(self, script: str, token: str) -> str:
+        end = self.end_marker(token)
+        return f"{{\n{script}\n}}\n__rc=$?; echo '{end}:'\"$__rc\"'>>'; echo '{end}>>' >&2\n"
+
+def _reader(stream, q: queue.Queue) -> None:
+    try:
+        for raw in iter(stream.readline, b''):
+            q.put(raw.decode('utf-8', errors='ignore').rstrip('\r\n'))
+    except Exception:
+        pass
+    q.put(None)  # EOF: processo terminou
+
+class ShellSession:
+    def __init__(self, dialect: Dialect, name: str = 'shell'):
+        self.dialect = dialect; self.name = name
+        self.proc: subprocess.Popen | None = None
+        self.last_used = 0.0; self.requests = 0; self.restarts = 0
+        self._out: queue.Queue = queue.Queue(); self._err: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def start(self) -> None:
+        if self.last_used: self.restarts += 1   # já rodou antes: caiu, foi encerrada ou ficou ociosa
+        self._out = queue.Queue(); self._err = queue.Queue()
+        self.proc = subprocess.Popen(self.dialect.argv, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     stderr=subprocess.PIPE, creationflags=_CREATIONFLAGS)
+        for stream, q in ((self.proc.stdout, self._out), (self.proc.stderr, self._err)):
+            threading.Thread(target=_reader, args=(stream, q), daemon=True, name=f"{self.name}-io").start()
+        if self.dialect.prelude:
+            self.proc.stdin.write(self.dialect.prelude.encode('utf-8')); self.proc.stdin.flush()
+        self.last_used = time.monotonic()
+        logging.debug("Sessão %s iniciada (pid %s).", self.name, self.proc.pid)
+
+    def close(self, force: bool = False) -> None:
+        proc, self.proc = self.proc, None
+        if proc is None: return
+        try:
+            if force: raise TimeoutError
+            proc.stdin.close(); proc.wait(timeout=2)
+        except Exception:
+            try: proc.kill(); proc.wait(timeout=2)
+            except Exception: pass
+        logging.debug("Sessão %s encerrada.", self.name)
+
+    def _collect(self, q: queue.Queue, marker: str, deadline: float, sink: list[str]) -> str | None:
+        """
+        Lê linhas até o marcador; devolve o marcador (com o que vier depois
+        dele), 'eof' ou None (tempo esgotado). Saída sem quebra de linha
+        final deixa o marcador no meio da linha: o trecho anterior é saída.
+        """
+        while True:
+            left = deadline - time.monotonic()
+            if left <= 0: return None
+            try: line = q.get(timeout=left)
+            except queue.Empty: return None
+            if line is None: return 'eof'
+            i = line.find(marker)
+            if i >= 0:
+                if i: sink.append(line[:i])
+                return line[i:]
+            sink.append(line)
+
+    def run(self, script: str, timeout: float | None = DEFAULT_TIMEOUT) -> CommandResult:
+        with self._lock:
+            res = CommandResult([self.dialect.name, script])
+            start = time.perf_counter()
+            token = uuid.uuid4().hex
+            payload = self.dialect.frame(script, token).encode('utf-8')
+            for attempt in (1, 2):
+                try:
+                    if not self.alive: self.start()
+                    self.proc.stdin.write(payload); self.proc.stdin.flush()
+                    break
+                except OSError as e:
+                    # caiu antes de receber o script: reinicia e reenvia uma vez
+                    self.close()
+                    if attempt == 2:
+                        res.error = str(e); res.elapsed = time.perf_counter() - start
+                        return res
+            marker = Dialect.end_marker(token)
+            deadline = time.monotonic() + (timeout if timeout is not None else 10 ** 9)
+            end = self._collect(self._out, marker, deadline, res.stdout_lines)
+            if end not in (None, 'eof'):
+                try: res.returncode = int(end[len(marker) + 1:].rstrip('>'))
+                except ValueError: res.returncode = 1
+                # o marcador do stderr vem logo em seguida
+                self._collect(self._err, marker, time.monotonic() + 5, res.stderr_lines)
+            elif end == 'eof':
+                # o script encerrou o interpretador (ex.: `exit 3`): o código dele é o resultado
+                self._collect(self._err, marker, time.monotonic() + 2, res.stderr_lines)
+                try: res.returncode = self.proc.wait(timeout=2)
+                except subprocess.TimeoutExpired: res.error = "sessão encerrada inesperadamente"
+                logging.debug("Sessão %s encerrada pelo script (código %s); será reiniciada.", self.name, res.returncode)
+                self.close(force=True)  # a próxima chamada reinicia
+            else:
+                self._drain(self._err, res.stderr_lines)
+                res.timed_out = True
+                self.close(force=True)  # estado desconhecido: a próxima chamada reinicia
+            self.requests += 1; self.last_used = time.monotonic()
+            res.elapsed = time.perf_counter() - start
+            metrics.add(subprocess=res.elapsed)
+            return res
+
+    @staticmethod
+    def _drain(q: queue.Queue, sink: list[str]) -> None:
+        while True:
+            try: line = q.get_nowait()
+            except queue.Empty: return
+            if line is not None: sink.append(line)
+
+class ShellHost:
+    """
+    Pool de sessões quentes: sessões que caíram são reiniciadas na próxima
+    requisição, `health_check` pinga as livres e as ociosas por mais de
+    `idle_timeout` são encerradas.
+    """
+    def __init__(self, dialect: Dialect | None = None, size: int = 1, idle_timeout: float | None = IDLE_TIMEOUT):
+        self.dialect = dialect or PowerShellDialect()
+        self.sessions = [ShellSession(self.dialect, f"{self.dialect.name}-{i}") for i in range(max(1, size))]
+        self.idle_timeout = idle_timeout
+        self._free: queue.Queue = queue.Queue()
+        for s in self.sessions: self._free.put(s)
+        self._stop = threading.Event()
+        if idle_timeout:
+            threading.Thread(target=self._reaper, daemon=True, name=f"{self.dialect.name}-reaper").start()
+
+    def run(self, script: str, timeout: float | None = DEFAULT_TIMEOUT, cold: bool = False) -> CommandResult:
+        """
+        Executa numa sessão livre; a espera por ela conta no `timeout`.
+        `cold` usa um processo próprio, encerrado ao fim — para trabalhos
+        longos (ex.: Checkpoint-Computer) não prenderem o pool.
+        """
+        if cold:
+            session = ShellSession(self.dialect, f"{self.dialect.name}-cold")
+            try: return self._log(session, session.run(script, timeout))
+            finally: session.close()
+        start = time.monotonic()
+        try:
+            session = self._free.get(timeout=timeout)
+        except queue.Empty:
+            res = CommandResult([self.dialect.name, script])
+            res.timed_out = True; res.error = "nenhuma sessão livre"
+            res.elapsed = time.monotonic() - start
+            logging.debug("Sessão %s: nenhuma livre em %.0f s.", self.dialect.name, timeout)
+            return res
+        try:
+            left = None if timeout is None else max(0.0, timeout - (time.monotonic() - start))
+            return self._log(session, session.run(script, left))
+        finally:
+            self._free.put(session)
+
+    @staticmethod
+    def _log(session: ShellSession, res: CommandResult) -> CommandResult:
+        if res.error:
+            logging.debug("Sessão %s: %s", session.name, res.error)
+        elif not res.ok and res.stderr_lines:
+            logging.debug("Sessão %s (código %s): %s", session.name, res.returncode, res.stderr.strip()[:500])
+        return res
+
+    def health_check(self, timeout: float = START_TIMEOUT) -> list[bool]:
+        """Pinga as sessões livres (iniciando-as se preciso); True = respondeu."""
+        status: list[bool] = []
+        for _ in range(len(self.sessions)):
+            try: session = self._free.get_nowait()
+            except queue.Empty: break
+            try:
+                res = session.run(self.dialect.ping, timeout)
+                status.append(res.ok)
+            finally:
+                self._free.put(session)
+        return status
+
+    def warm_up(self) -> None:
+        self.health_check()
+
+    def _reaper(self) -> None:
+        interval = max(1.0, min(30.0, self.idle_timeout / 4))
+        while not self._stop.wait(interval):
+            now = time.monotonic()
+            for s in self.sessions:
+                if s.alive and now - s.last_used > self.idle_timeout and s._lock.acquire(blocking=False):
+                    try: s.close()
+                    finally: s._lock.release()
+
+    def close(self) -> None:
+        self._stop.set()
+        for s in self.sessions:
+            with s._lock: s.close()
+
+_host: ShellHost | None = None
+_host_lock = threading.Lock()
+
+def get_powershell_host() -> ShellHost:
+    global _host
+    with _host_lock:
+        if _host is None:
+            _host = ShellHost(PowerShellDialect())
+            atexit.register(_host.close)
+        return _host
+
+def run_powershell(script: str, timeout: float | None = DEFAULT_TIMEOUT, cold: bool = False) -> CommandResult:
+    return get_powershell_host().run(script, timeout, cold=cold)
+
+def ps_quote(text: str) -> str:
+    """Literal de string do PowerShell (aspas simples)."""
+    return "'" + text.replace("'", "''") + "'"
@@ -1,6 +1,8 @@
 from __future__ import annotations
 import ctypes, logging
+from . import metrics
 
+@metrics.instrument()
 def empty_recycle_bin(show_confirm: bool = False, show_progress: bool = True, sound: bool = False) -> bool:
     SHERB_NOCONFIRMATION = 0x1
     SHERB_NOPROGRESSUI   = 0x2
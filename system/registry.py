@@ -0,0 +1,195 @@
+from __future__ import annotations
+import time, logging
+from collections import defaultdict
+try:
+    import winreg
+except Exception:
+    winreg = None  # type: ignore
+
+from . import metrics
+
+# Acesso às chaves Run atrás de um backend: `WinRegBackend` no Windows e
+# `MemoryRegistryBackend` para testes/benchmarks em qualquer sistema. As
+# colmeias são nomes ('HKCU', 'HKLM'), para o módulo importar fora do Windows.
+
+HKCU = 'HKCU'
+HKLM = 'HKLM'
+RUN_KEY = r"Software\Microsoft\Windows\CurrentVersion\Run"
+RUN_PATHS = [(HKCU, RUN_KEY), (HKLM, RUN_KEY)]
+DISABLED_SUFFIX = " (Disabled by WinOptimizer)"
+REG_SZ = 1  # mesmo valor de winreg.REG_SZ
+
+# (nome, valor, tipo)
+RegValue = tuple[str, object, int]
+
+class RegistryBackend:
+    """Leitura de uma chave inteira e renomeação de vários valores com uma só abertura."""
+    name = 'base'
+
+    def read_values(self, hive: str, path: str) -> list[RegValue]:
+        """Todos os valores da chave; FileNotFoundError/PermissionError propagam."""
+        raise NotImplementedError
+
+    def rename_values(self, hive: str, path: str, renames: list[tuple[str, str]]) -> dict[str, str | None]:
+        """Aplica (antigo, novo) em sequência; devolve {antigo: erro ou None}."""
+        raise NotImplementedError
+
+class WinRegBackend(RegistryBackend):
+    name = 'winreg'
+
+    def __init__(self):
+        if winreg is None:
+            raise RuntimeError("winreg indisponível.")
+        self._hives = {HKCU: winreg.HKEY_CURRENT_USER, HKLM: winreg.HKEY_LOCAL_MACHINE}
+
+    def read_values(self, hive: str, path: str) -> list[RegValue]:
+        out: list[RegValue] = []
+        with winreg.OpenKey(self._hives[hive], path, 0, winreg.KEY_READ) as k:
+            count = winreg.QueryInfoKey(k)[1]
+            for i in range(count):
+                try: out.append(winreg.EnumValue(k, i))
+                except OSError: break
+        return out
+
+    def rename_values(self, hive: str, path: str, renames: list[tuple[str, str]]) -> dict[str, str | None]:
+        result: dict[str, str | None] = {}
+        with winreg.OpenKey(self._hives[hive], path, 0, winreg.KEY_SET_VALUE | winreg.KEY_QUERY_VALUE) as k:
+            for old, new in renames:
+                try:
+                    val, typ = winreg.QueryValueEx(k, old)
+                    winreg.SetValueEx(k, new, 0, typ, val)
+                    winreg.DeleteValue(k, old)
+                    result[old] = None
+                except FileNotFoundError:
+                    result[old] = "valor não encontrado"
+                except OSError as e:
+                    result[old] = str(e)
+        return result
+
+class MemoryRegistryBackend(RegistryBackend):
+    """
+    Registro em memória. `latency` (s) simula o custo de abrir uma chave,
+    e `opens` conta as aberturas — útil para comparar estratégias.
+    """
+    name = 'memory'
+
+    def __init__(self, data: dict[tuple[str, str], dict[str, tuple[object, int]]] | None = None,
+                 latency: float = 0.0, readonly: set[tuple[str, str]] | None = None):
+        self.keys: dict[tuple[str, str], dict[str, tuple[object, int]]] = {k: dict(v) for k, v in (data or {}).items()}
+        self.latency = latency
+        self.readonly = set(readonly or ())
+        self.opens = 0
+
+    def _open(self, hive: str, path: str) -> dict[str, tuple[object, int]]:
+        self.opens += 1
+        if self.latency: time.sleep(self.latency)
+        try: return self.keys[(hive, path)]
+        except KeyError: raise FileNotFoundError(f"{hive}\\{path}") from None
+
+    def read_values(self, hive: str, path: str) -> list[RegValue]:
+        return [(n, v, t) for n, (v, t) in self._open(hive, path).items()]
+
+    def rename_values(self, hive: str, path: str, renames: list[tuple[str, str]]) -> dict[str, str | None]:
+        key = self._open(hive, path)
+        if (hive, path) in self.readonly:
+            raise PermissionError(f"{hive}\\{path}")
+        result: dict[str, str | None] = {}
+        for old, new in renames:
+            if old not in key:
+                result[old] = "valor não encontrado"; continue
+            key[new] = key.pop(old); result[old] = None
+        return result
+
+def default_backend() -> RegistryBackend | None:
+    return WinRegBackend() if winreg is not None else None
+
+class StartupEntry:
+    __slots__ = ('hive', 'path', 'name', 'value', 'type', 'enabled')
+
+    def __init__(self, hive: str, path: str, name: str, value: object, type: int, enabled: bool):
+        self.hive = hive; self.path = path; self.name = name
+        self.value = value; self.type = type; self.enabled = enabled
+
+    @property
+    def location(self) -> str:
+        return f"{self.hive}\\{self.path}"
+
+    @property
+    def value_name(self) -> str:
+        """Nome do valor como está gravado no registro."""
+        return self.name if self.enabled else self.name + DISABLED_SUFFIX
+
+    @property
+    def key(self) -> str:
+        """Identificador estável entre habilitar/desabilitar (ex.: iid do Treeview)."""
+        return f"{self.location}\\{self.name}"
+
+    @property
+    def command(self) -> str:
+        return str(self.value)
+
+    def __repr__(self) -> str:
+        return f"StartupEntry({self.key!r}, enabled={self.enabled})"
+
+def _parse(hive: str, path: str, raw: RegValue) -> StartupEntry:
+    name, value, typ = raw
+    if name.endswith(DISABLED_SUFFIX):
+        return StartupEntry(hive, path, name[:-len(DISABLED_SUFFIX)], value, typ, False)
+    return StartupEntry(hive, path, name, value, typ, True)
+
+class StartupSnapshot:
+    """
+    Uma leitura de todas as chaves Run. `set_enabled` agrupa as entradas por
+    chave, abre cada chave uma vez e atualiza o snapshot no lugar.
+    """
+    def __init__(self, backend: RegistryBackend, run_paths: list[tuple[str, str]] | None = None):
+        self.backend = backend
+        self.run_paths = list(run_paths or RUN_PATHS)
+        self.entries: list[StartupEntry] = []
+        self.errors: dict[str, str] = {}   # local -> motivo da falha de leitura
+
+    @metrics.instrument('registry.refresh')
+    def refresh(self) -> StartupSnapshot:
+        entries: list[StartupEntry] = []; self.errors = {}
+        for hive, path in self.run_paths:
+            try:
+                entries.extend(_parse(hive, path, raw) for raw in self.backend.read_values(hive, path))
+            except FileNotFoundError:
+                continue
+            except PermissionError:
+                self.errors[f"{hive}\\{path}"] = "sem permissão"
+                logging.warning("Sem permissão para ler: %s\\%s", hive, path)
+        self.entries = entries
+        return self
+
+    def find(self, name: str) -> list[StartupEntry]:
+        return [e for e in self.entries if e.name == name]
+
+    def get(self, key: str) -> StartupEntry | None:
+        for e in self.entries:
+            if e.key == key: return e
+        return None
+
+    @metrics.instrument('registry.set_enabled')
+    def set_enabled(self, entries: list[StartupEntry], enabled: bool) -> list[StartupEntry]:
+        """Habilita/desabilita em lote; devolve as entradas que mudaram."""
+        by_key: dict[tuple[str, str], list[StartupEntry]] = defaultdict(list)
+        for e in entries:
+            if e.enabled != enabled: by_key[(e.hive, e.path)].append(e)
+        changed: list[StartupEntry] = []
+        verb = "Habilitado" if enabled else "Desabilitado"
+        for (hive, path), group in by_key.items():
+            renames = [(e.value_name, e.name if enabled else e.name + DISABLED_SUFFIX) for e in group]
+            try:
+                result = self.backend.rename_values(hive, path, renames)
+            except PermissionError:
+                logging.warning("Sem permissão para alterar: %s\\%s", hive, path); continue
+            except OSError as e:
+                logging.error("Falha ao abrir %s\\%s: %s", hive, path, e); continue
+            for e, (old, _new) in zip(group, renames):
+                err = result.get(old, "sem resposta")
+                if err:
+                    logging.error("Falha ao alterar %s: %s", e.name, err); continue
+                e.enabled = enabled; changed.append(e)
+                logging.info("%s em %s: %s", verb, e.location, e.name)
+        return changed
@@ -1,21 +1,37 @@
 from __future__ import annotations
-import logging
-from .os_utils import run_ps
+import json, logging
+from .pshost import run_powershell, ps_quote
+from . import metrics
 
+RESTORE_TIMEOUT = 600.0  # Checkpoint-Computer pode demorar com o VSS ocupado
+
+@metrics.instrument()
 def create_restore_point(description: str = "WinOptimizer") -> bool:
     try:
-        cmd = [
-            'powershell', '-NoLogo', '-NoProfile', '-ExecutionPolicy', 'Bypass',
-            'Checkpoint-Computer', '-Description', description,
-            '-RestorePointType', 'MODIFY_SETTINGS'
-        ]
         logging.info("Criando ponto de restauração…")
-        p = run_ps(cmd)
-        if p.returncode == 0:
+        # processo próprio: até 10 min de VSS não podem prender a sessão quente
+        res = run_powershell(f"Checkpoint-Computer -Description {ps_quote(description)} "
+                             "-RestorePointType MODIFY_SETTINGS", timeout=RESTORE_TIMEOUT, cold=True)
+        if res.ok:
             logging.info("Ponto de restauração criado com sucesso.")
             return True
-        logging.warning("Falha ao criar ponto de restauração: %s", (p.stderr or '').strip())
+        reason = "tempo esgotado" if res.timed_out else (res.error or res.stderr.strip())
+        logging.warning("Falha ao criar ponto de restauração: %s", reason)
         return False
     except Exception as e:
         logging.warning("Exceção ao criar ponto de restauração: %s", e)
         return False
+
+@metrics.instrument()
+def list_restore_points() -> list[dict]:
+    """Pontos de restauração existentes (SequenceNumber, Description, CreationTime…)."""
+    res = run_powershell("Get-ComputerRestorePoint | Select-Object SequenceNumber, Description, "
+                         "CreationTime, RestorePointType | ConvertTo-Json -Compress")
+    if not res.ok or not res.stdout.strip():
+        return []
+    try:
+        data = json.loads(res.stdout)
+    except ValueError:
+        logging.debug("Saída inesperada de Get-ComputerRestorePoint: %s", res.stdout[:200])
+        return []
+    return data if isinstance(data, list) else [data]
@@ -0,0 +1,167 @@
+from __future__ import annotations
+import os, re, time, signal, asyncio, logging, subprocess
+from typing import Callable, Sequence
+
+from .progress import CancelToken, is_cancelled
+from . import metrics
+
+# on_line(stream, linha) — stream é 'stdout' ou 'stderr'
+LineCallback = Callable[[str, str], None]
+
+_LINE_SPLIT = re.compile(r'\r\n|\r|\n')  # defrag /U reescreve a linha com \r
+_CREATIONFLAGS = getattr(subprocess, 'CREATE_NO_WINDOW', 0) if os.name == 'nt' else 0
+CANCEL_POLL = 0.2
+KILL_GRACE = 2.0   # s para a árvore morta liberar os pipes antes de desistirmos deles
+
+class CommandResult:
+    __slots__ = ('cmd', 'returncode', 'stdout_lines', 'stderr_lines', 'elapsed', 'timed_out', 'cancelled', 'error')
+
+    def __init__(self, cmd: Sequence[str]):
+        self.cmd = list(cmd)
+        self.returncode: int | None = None
+        self.stdout_lines: list[str] = []; self.stderr_lines: list[str] = []
+        self.elapsed = 0.0
+        self.timed_out = False; self.cancelled = False
+        self.error: str | None = None  # falha ao iniciar o processo
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out and not self.cancelled
+
+    @property
+    def stdout(self) -> str:
+        return "\n".join(self.stdout_lines)
+
+    @property
+    def stderr(self) -> str:
+        return "\n".join(self.stderr_lines)
+
+    def __repr__(self) -> str:
+        return (f"CommandResult({self.cmd[0] if self.cmd else '?'}, rc={self.returncode}, "
+                f"elapsed={self.elapsed:.2f}, timed_out={self.timed_out}, cancelled={self.cancelled})")
+
+async def _pump(stream: asyncio.StreamReader, name: str, sink: list[str], on_line: LineCallback | None,
+                log_prefix: str | None, encoding: str) -> None:
+    pending = ''
+    while True:
+        chunk = await stream.read(4096)
+        if not chunk: break
+        parts = _LINE_SPLIT.split(pending + chunk.decode(encoding, errors='ignore'))
+        pending = parts.pop()
+        for line in parts:
+            _emit(line, name, sink, on_line, log_prefix)
+    if pending:
+        _emit(pending, name, sink, on_line, log_prefix)
+
+def _emit(line: str, name: str, sink: list[str], on_line: LineCallback | None, log_prefix: str | None) -> None:
+    line = line.rstrip()
+    if not line: return
+    sink.append(line)
+    if log_prefix is not None:
+        logging.info("%s%s", log_prefix, line)
+    if on_line:
+        try: on_line(name, line)
+        except Exception: logging.debug("Falha no callback de saída", exc_info=True)
+
+def _kill(proc: asyncio.subprocess.Process) -> None:
+    """
+    Encerra o processo e seus descendentes: um neto que herdou o stdout
+    manteria o pipe aberto (e o `wait`) muito depois do tempo limite.
+    No Windows, taskkill /T; nos demais, o grupo criado com start_new_session.
+    """
+    try:
+        if os.name == 'nt':
+            subprocess.run(['taskkill', '/F', '/T', '/PID', str(proc.pid)], stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL, creationflags=_CREATIONFLAGS, timeout=10)
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+    except Exception:
+        logging.debug("Falha ao encerrar a árvore do processo %s", proc.pid, exc_info=True)
+    try: proc.kill()
+    except ProcessLookupError: pass
+    except Exception: logging.debug("Falha ao encerrar processo %s", proc.pid, exc_info=True)
+
+async def _reap(proc: asyncio.subprocess.Process) -> None:
+    """Espera o processo morto; se algum pipe continuar aberto além de KILL_GRACE, fecha o transporte."""
+    try:
+        await asyncio.wait_for(proc.wait(), KILL_GRACE)
+    except asyncio.TimeoutError:
+        transport = getattr(proc, '_transport', None)
+        if transport is not None: transport.close()
+        logging.debug("Processo %s: pipes ainda abertos após o encerramento; descartados.", proc.pid)
+
+async def run_async(cmd: Sequence[str], timeout: float | None = None, on_line: LineCallback | None = None,
+                    log_output: bool = False, cancel: CancelToken | None = None,
+                    encoding: str = 'utf-8') -> CommandResult:
+    """
+    Executa `cmd` transmitindo stdout/stderr linha a linha (logging e/ou
+    `on_line`). Estourado o `timeout` (s) ou cancelado o token, o processo
+    é encerrado; a saída parcial fica no resultado.
+    """
+    res = CommandResult(cmd)
+    start = time.perf_counter()
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE, creationflags=_CREATIONFLAGS,
+            start_new_session=os.name != 'nt')
+    except OSError as e:
+        res.error = str(e); res.elapsed = time.perf_counter() - start
+        logging.debug("Falha ao iniciar %s: %s", cmd[0], e)
+        return res
+
+    prefix = f"[{os.path.basename(cmd[0])}] " if log_output else None
+    work = asyncio.gather(_pump(proc.stdout, 'stdout', res.stdout_lines, on_line, prefix, encoding),
+                          _pump(proc.stderr, 'stderr', res.stderr_lines, on_line, prefix, encoding),
+                          proc.wait())
+
+    async def watch_cancel() -> None:
+        while not is_cancelled(cancel):
+            await asyncio.sleep(CANCEL_POLL)
+
+    waiters = {asyncio.ensure_future(work)}
+    if cancel is not None: waiters.add(asyncio.ensure_future(watch_cancel()))
+    try:
+        done, _ = await asyncio.wait(waiters, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+    except asyncio.CancelledError:
+        # a tarefa que nos aguardava foi cancelada (ex.: Ctrl+C no asyncio.run): não deixa órfãos
+        for w in waiters: w.cancel()
+        _kill(proc)
+        raise
+    pending = [w for w in waiters if w not in done]
+    for w in pending: w.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    if work not in done:
+        res.timed_out = not is_cancelled(cancel); res.cancelled = is_cancelled(cancel)
+        _kill(proc)
+        await _reap(proc)
+    res.returncode = proc.returncode
+    res.elapsed = time.perf_counter() - start
+    metrics.add(subprocess=res.elapsed)
+    logging.debug("Comando %s: código %s em %.2f s%s", " ".join(res.cmd), res.returncode, res.elapsed,
+                  " (tempo esgotado)" if res.timed_out else " (cancelado)" if res.cancelled else "")
+    return res
+
+def run_streaming(cmd: Sequence[str], timeout: float | None = None, on_line: LineCallback | None = None,
+                  log_output: bool = False, cancel: CancelToken | None = None,
+                  encoding: str = 'utf-8') -> CommandResult:
+    """Versão síncrona de `run_async` (seguro em threads de trabalho)."""
+    return asyncio.run(run_async(cmd, timeout, on_line, log_output, cancel, encoding))
+
+def run_many(cmds: Sequence[Sequence[str]], timeout: float | None = None, on_line: LineCallback | None = None,
+             log_output: bool = False, cancel: CancelToken | None = None,
+             concurrency: int | None = None, encoding: str = 'utf-8',
+             timeouts: Sequence[float | None] | None = None) -> list[CommandResult]:
+    """
+    Roda comandos independentes ao mesmo tempo; resultados na ordem de `cmds`.
+    `timeouts` (opcional) define o limite de cada comando; senão vale `timeout`.
+    """
+    async def main() -> list[CommandResult]:
+        sem = asyncio.Semaphore(concurrency or max(1, len(cmds)))
+
+        async def one(c: Sequence[str], t: float | None) -> CommandResult:
+            async with sem:
+                return await run_async(c, t, on_line, log_output, cancel, encoding)
+        limits = list(timeouts) if timeouts is not None else [timeout] * len(cmds)
+        return list(await asyncio.gather(*(one(c, t) for c, t in zip(cmds, limits))))
+    return asyncio.run(main()) if cmds else []
@@ -0,0 +1,129 @@
+from __future__ import annotations
+import os, json, zlib, logging, threading
+
+from .os_utils import app_cache_dir
+from .progress import CancelToken, is_cancelled
+from .scanner import FileEntry
+
+# Índice em disco da varredura das raízes de cache, usado como `scan` de um
+# CleanupPlan (ver system.plan): a primeira pré-visualização depois de abrir
+# o programa só relista as pastas que mudaram desde a última execução.
+#
+# Formato: MAGIC + zlib(JSON). Por raiz, um dict  pasta_relativa -> registro
+#   [mtime_ns, inode, [[nome, tamanho, mtime], ...], [subpastas]]
+# Uma pasta cujo (mtime, inode) não mudou reaproveita a lista de arquivos
+# diretos sem listar o conteúdo; só as subpastas são checadas (um stat cada).
+# Obs.: reescrever um arquivo existente não muda o mtime da pasta — a
+# execução do plano confere o mtime de cada arquivo, e `invalidate` força
+# uma varredura completa.
+MAGIC = b'DTIX2\n'
+INDEX_FILENAME = 'scan_index.bin'
+
+DirRecord = list  # [mtime_ns, ino, [[nome, tamanho, mtime]], subpastas]
+
+def _walk(base: str, old: dict[str, DirRecord], cancel: CancelToken | None
+          ) -> tuple[dict[str, DirRecord], list[FileEntry], dict[str, int], int]:
+    """Devolve (novo_índice_da_raiz, arquivos, {pasta: mtime_ns}, pastas_relistadas)."""
+    new: dict[str, DirRecord] = {}
+    files: list[FileEntry] = []; dirs: dict[str, int] = {}
+    relisted = 0
+    stack = ['']
+    while stack:
+        if is_cancelled(cancel): break
+        rel = stack.pop()
+        path = os.path.join(base, rel) if rel else base
+        try: st = os.stat(path)
+        except OSError: continue
+        dirs[path] = st.st_mtime_ns
+        rec = old.get(rel)
+        if rec is None or rec[0] != st.st_mtime_ns or rec[1] != st.st_ino:
+            listing: list[list] = []; subdirs: list[str] = []
+            try:
+                with os.scandir(path) as it:
+                    for e in it:
+                        try:
+                            if e.is_dir(follow_symlinks=False): subdirs.append(e.name); continue
+                            if not e.is_file(follow_symlinks=False): continue
+                            fst = e.stat(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        listing.append([e.name, fst.st_size, fst.st_mtime])
+            except OSError:
+                continue   # ilegível: fica fora do índice e é tentada de novo na próxima vez
+            rec = [st.st_mtime_ns, st.st_ino, listing, subdirs]
+            relisted += 1
+        new[rel] = rec
+        files.extend((os.path.join(path, name), size, mtime) for name, size, mtime in rec[2])
+        stack.extend(os.path.join(rel, d) if rel else d for d in rec[3])
+    return new, files, dirs, relisted
+
+class ScanIndex:
+    """Índice em disco com a listagem de cada pasta das raízes de cache."""
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(app_cache_dir(), INDEX_FILENAME)
+        self.roots: dict[str, dict[str, DirRecord]] = {}
+        self._lock = threading.Lock()
+        self.load()
+
+    def load(self) -> None:
+        try:
+            with open(self.path, 'rb') as fh:
+                raw = fh.read()
+            if not raw.startswith(MAGIC): raise ValueError("formato desconhecido")
+            roots = json.loads(zlib.decompress(raw[len(MAGIC):]).decode('utf-8'))
+        except FileNotFoundError:
+            roots = {}
+        except Exception as e:
+            logging.debug("Índice de varredura descartado (%s): %s", self.path, e)
+            roots = {}
+        with self._lock:
+            self.roots = roots
+
+    def save(self) -> None:
+        """Grava o índice; raízes que não existem mais saem dele."""
+        with self._lock:
+            for r in [r for r in self.roots if not os.path.isdir(r)]: del self.roots[r]
+            data = json.dumps(self.roots, separators=(',', ':'), ensure_ascii=False).encode('utf-8', 'surrogatepass')
+        tmp = self.path + '.tmp'
+        try:
+            with open(tmp, 'wb') as fh:
+                fh.write(MAGIC); fh.write(zlib.compress(data, 6))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logging.debug("Falha ao gravar índice de varredura: %s", e)
+
+    def invalidate(self, roots: list[str] | None = None) -> None:
+        with self._lock:
+            if roots is None: self.roots.clear()
+            else:
+                for r in roots: self.roots.pop(r, None)
+
+    def scan(self, base: str, cutoff: float | None = None, cancel: CancelToken | None = None
+             ) -> tuple[list[FileEntry], dict[str, int], set[str]]:
+        """Mesmo contrato de scanner.scan_tree, relistando só as pastas que mudaram."""
+        with self._lock:
+            old = self.roots.get(base, {})
+        new, files, dirs, relisted = _walk(base, old, cancel)
+        # cancelado no meio: as pastas não visitadas mantêm o registro anterior
+        if is_cancelled(cancel): new = {**old, **new}
+        with self._lock:
+            self.roots[base] = new
+        logging.debug("Índice de varredura: %s — %d de %d pastas relistadas.", base, relisted, len(dirs))
+        if cutoff is None:
+            return files, dirs, set()
+        entries: list[FileEntry] = []; kept: set[str] = set()
+        for fe in files:
+            if fe[2] >= cutoff: kept.add(os.path.dirname(fe[0]))
+            else: entries.append(fe)
+        return entries, dirs, kept
+
+_shared: dict[str, ScanIndex] = {}
+_shared_lock = threading.Lock()
+
+def shared_index(path: str | None = None) -> ScanIndex:
+    """Instância única por arquivo (carregada do disco na primeira chamada)."""
+    path = path or os.path.join(app_cache_dir(), INDEX_FILENAME)
+    with _shared_lock:
+        idx = _shared.get(path)
+        if idx is None: idx = _shared[path] = ScanIndex(path)
+        return idx
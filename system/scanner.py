@@ -0,0 +1,109 @@
+from __future__ import annotations
+import os, queue, threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator
+
+from .progress import BATCH_SIZE, CancelToken, is_cancelled
+
+# (caminho, tamanho em bytes, mtime)
+FileEntry = tuple[str, int, float]
+# (caminho, tamanho, mtime, último uso = max(atime, mtime))
+UsageEntry = tuple[str, int, float, float]
+
+# Raízes varridas em paralelo (I/O de metadados, não CPU)
+DEFAULT_SCAN_WORKERS = min(8, (os.cpu_count() or 2) * 2)
+
+def iter_files(base: str, dirs: dict[str, int] | None = None, last_use: bool = False) -> Iterator[FileEntry]:
+    """
+    Percorre `base` com os.scandir (pilha, sem recursão) reaproveitando o stat
+    do próprio DirEntry — no Windows vem do FindNextFile, sem chamada extra.
+    Links simbólicos não são seguidos. Se `dirs` for dado, recebe o
+    st_mtime_ns de cada pasta visitada. Com `last_use`, produz `UsageEntry`.
+    """
+    stack = [base]
+    while stack:
+        d = stack.pop()
+        try:
+            if dirs is not None: dirs[d] = os.stat(d).st_mtime_ns
+            it = os.scandir(d)
+        except OSError: continue
+        with it:
+            for e in it:
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        stack.append(e.path); continue
+                    if not e.is_file(follow_symlinks=False): continue
+                    st = e.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                if last_use: yield e.path, st.st_size, st.st_mtime, max(st.st_atime, st.st_mtime)
+                else: yield e.path, st.st_size, st.st_mtime
+
+def scan_tree(base: str, cutoff: float | None = None, cancel: CancelToken | None = None
+              ) -> tuple[list[FileEntry], dict[str, int], set[str]]:
+    """
+    Arquivos elegíveis de `base`, assinatura (mtime_ns) de cada pasta e as
+    pastas que contêm arquivos poupados pelo `cutoff`.
+    """
+    entries: list[FileEntry] = []; dirs: dict[str, int] = {}; kept: set[str] = set()
+    for i, fe in enumerate(iter_files(base, dirs)):
+        if cutoff is not None and fe[2] >= cutoff:
+            kept.add(os.path.dirname(fe[0]))
+        else:
+            entries.append(fe)
+        if not i % 1024 and is_cancelled(cancel): break
+    return entries, dirs, kept
+
+def scan_tree_usage(base: str, cutoff: float | None = None, cancel: CancelToken | None = None
+                    ) -> tuple[list[UsageEntry], dict[str, int], set[str]]:
+    """Como `scan_tree`, mas com todos os arquivos e o último uso de cada um (ver system.budget)."""
+    entries: list[UsageEntry] = []; dirs: dict[str, int] = {}
+    for i, ue in enumerate(iter_files(base, dirs, last_use=True)):
+        entries.append(ue)
+        if not i % 1024 and is_cancelled(cancel): break
+    return entries, dirs, set()
+
+def _put(q: queue.Queue, item, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1); return True
+        except queue.Full:
+            continue
+    return False
+
+def iter_batches(paths: list[str], cutoff: float | None = None, workers: int = DEFAULT_SCAN_WORKERS,
+                 batch_size: int = BATCH_SIZE, cancel: CancelToken | None = None) -> Iterator[list[FileEntry]]:
+    """
+    Varre as raízes em paralelo e entrega lotes de até `batch_size` arquivos
+    conforme são encontrados (fila limitada). Fechar o iterador ou cancelar
+    o token interrompe os workers.
+    """
+    if not paths: return
+    q: queue.Queue = queue.Queue(maxsize=max(2, workers * 4))
+    stop = threading.Event(); end = object()
+
+    def produce(base: str) -> None:
+        batch: list[FileEntry] = []
+        try:
+            if stop.is_set() or is_cancelled(cancel): return
+            for fe in iter_files(base):
+                if cutoff is not None and fe[2] >= cutoff: continue
+                batch.append(fe)
+                if len(batch) >= batch_size:
+                    if stop.is_set() or is_cancelled(cancel) or not _put(q, batch, stop): return
+                    batch = []
+            if batch and not is_cancelled(cancel): _put(q, batch, stop)
+        finally:
+            _put(q, end, stop)
+
+    workers = max(1, min(workers, len(paths)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='scan') as ex:
+        for p in paths: ex.submit(produce, p)
+        remaining = len(paths)
+        try:
+            while remaining:
+                item = q.get()
+                if item is end: remaining -= 1; continue
+                yield item
+        finally:
+            stop.set()
@@ -0,0 +1,223 @@
+from __future__ import annotations
+import os, time, logging, threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from .scanner import FileEntry
+from .deleters import MODE_AUTO, DeleteBackend, DeleteStats, make_backend
+from .devices import MEDIA_HDD, MEDIA_REMOTE, MEDIA_SSD, MEDIA_UNKNOWN, device_of, media_type, volume_label
+
+# Exclusão em paralelo por dispositivo: os lotes são separados pelo st_dev
+# da pasta e cada dispositivo tem a própria fila e o próprio limite de
+# threads — SSD aguenta várias exclusões simultâneas, HDD não (o braço do
+# disco vira o gargalo). Dispositivos diferentes andam ao mesmo tempo.
+# Com `auto_tune`, o limite de cada dispositivo sobe enquanto a vazão
+# (arquivos/s) melhora e desce quando piora.
+#
+# `DeviceScheduler` tem a mesma interface de um DeleteBackend: `submit`
+# enfileira e devolve o que já terminou desde a última chamada, `flush`
+# espera tudo. Backends que precisam ver todos os arquivos juntos ('tree')
+# ficam com uma thread por dispositivo.
+
+DEVICE_LIMITS = {MEDIA_SSD: 8, MEDIA_HDD: 1, MEDIA_REMOTE: 4, MEDIA_UNKNOWN: 2}
+MAX_DEVICE_LIMIT = 16
+TUNE_INTERVAL = 0.5   # s entre ajustes do limite
+TUNE_MARGIN = 0.1     # variação mínima de vazão para mudar o limite
+
+class _Device:
+    __slots__ = ('key', 'label', 'media', 'limit', 'max_limit', 'queue', 'cond', 'active', 'idle',
+                 'backends', 'closing', 'threads', 'stats', 'started', 'tune_at', 'tune_files',
+                 'tune_rate', 'tune_dir')
+
+    def __init__(self, key, label: str, media: str, limit: int, max_limit: int, backends: list[DeleteBackend]):
+        self.key = key; self.label = label; self.media = media
+        self.limit = limit; self.max_limit = max_limit
+        self.queue: deque[list[FileEntry]] = deque()
+        self.cond = threading.Condition()
+        self.active = 0
+        self.idle = list(backends); self.backends = list(backends)
+        self.closing = False
+        self.threads: list[threading.Thread] = []
+        self.stats = DeleteStats()    # seconds = tempo de parede do dispositivo
+        self.started = 0.0
+        self.tune_at = 0.0; self.tune_files = 0; self.tune_rate = 0.0; self.tune_dir = 1
+
+    def _ready(self) -> bool:
+        return bool(self.queue) and self.active < self.limit and bool(self.idle)
+
+class DeviceScheduler(DeleteBackend):
+    name = 'scheduler'
+
+    def __init__(self, mode: str = MODE_AUTO, limits: dict[str, int] | None = None, auto_tune: bool = False):
+        super().__init__()
+        self.mode = mode
+        self.limits = {**DEVICE_LIMITS, **(limits or {})}
+        self.auto_tune = auto_tune
+        probe = make_backend(mode)
+        self.name = probe.name
+        self.needs_skipped = probe.needs_skipped
+        self.concurrent = probe.concurrent
+        self._spare: DeleteBackend | None = probe
+        self._devices: dict[object, _Device] = {}
+        self._dir_dev: dict[str, object] = {}
+        self._roots: list[str] = []
+        self._lock = threading.Lock()
+        self._ok = 0; self._failed = 0   # concluídos ainda não reportados
+
+    # --- dispositivos ---
+    def _device_key(self, d: str):
+        key = self._dir_dev.get(d)
+        if key is None:
+            dev = device_of(d)
+            key = dev if dev is not None else ('?', volume_label(d))
+            self._dir_dev[d] = key
+        return key
+
+    def _device(self, key, path: str) -> _Device:
+        dev = self._devices.get(key)
+        if dev is not None: return dev
+        media = media_type(path, key if isinstance(key, int) else None)
+        limit = max(1, self.limits.get(media, DEVICE_LIMITS[MEDIA_UNKNOWN]))
+        max_limit = max(limit, MAX_DEVICE_LIMIT if self.auto_tune else limit)
+        if not self.concurrent: limit = max_limit = 1
+        backends = []
+        for _ in range(max_limit):
+            b = self._spare or make_backend(self.mode); self._spare = None
+            backends.append(b)
+        dev = _Device(key, volume_label(path), media, limit, max_limit, backends)
+        for b in backends: b.begin([r for r in self._roots if self._device_key(r) == key])
+        dev.started = dev.tune_at = time.perf_counter()
+        for i in range(max_limit):
+            t = threading.Thread(target=self._work, args=(dev,), name=f"del-{dev.label}-{i}", daemon=True)
+            t.start(); dev.threads.append(t)
+        self._devices[key] = dev
+        logging.debug("Exclusão: %s (%s) com até %d thread(s).", dev.label, media, limit)
+        return dev
+
+    # --- interface de DeleteBackend ---
+    def begin(self, roots: list[str]) -> None:
+        self._roots = [os.path.normpath(r) for r in roots]
+
+    def keep_dir(self, d: str) -> None:
+        if not self.needs_skipped: return   # só o 'tree' usa; evita abrir dispositivos à toa
+        dev = self._device(self._device_key(d), d)
+        for b in dev.backends: b.keep_dir(d)
+
+    def skip(self, fpath: str) -> None:
+        self.keep_dir(os.path.dirname(fpath))
+
+    def submit(self, entries: list[FileEntry]) -> tuple[int, int]:
+        groups: dict[object, list[FileEntry]] = {}
+        for fe in entries:
+            groups.setdefault(self._device_key(os.path.dirname(fe[0])), []).append(fe)
+        for key, batch in groups.items():
+            dev = self._device(key, batch[0][0])
+            with dev.cond:
+                # contrapressão: no máximo dois lotes esperando por thread ativa
+                while len(dev.queue) >= 2 * dev.limit + 1: dev.cond.wait()
+                dev.queue.append(batch); dev.cond.notify_all()
+        return self._take()
+
+    def flush(self) -> tuple[int, int]:
+        self._wait_idle()
+        devices = list(self._devices.values())
+        if devices:
+            # pendências de cada backend (Lixeira em lote, rmtree do 'tree'), dispositivos em paralelo
+            with ThreadPoolExecutor(max_workers=len(devices), thread_name_prefix='del-flush') as ex:
+                for dev, counts in zip(devices, ex.map(self._flush_device, devices)):
+                    with self._lock: self._ok += counts[0]; self._failed += counts[1]
+        self._close()
+        return self._take()
+
+    def drain(self) -> tuple[int, int]:
+        for dev in self._devices.values():
+            with dev.cond: dev.queue.clear(); dev.cond.notify_all()
+        self._wait_idle(); self._close()
+        return self._take()
+
+    def log_summary(self) -> None:
+        for dev in self._devices.values():
+            st = dev.stats
+            if st.files or st.failed:
+                logging.info("Exclusão (%s) em %s [%s, %d thread(s)]: %d arquivos, %d falhas em %.1f s "
+                             "(%.0f arq/s, %.1f MB/s)", self.name, dev.label, dev.media, dev.limit, st.files,
+                             st.failed, st.seconds, st.files_per_s, st.bytes_per_s / 1048576)
+
+    def device_stats(self) -> list[dict]:
+        """Vazão por dispositivo (para métricas/relatórios)."""
+        return [{'device': dev.label, 'media': dev.media, 'threads': dev.limit, 'files': dev.stats.files,
+                 'failed': dev.stats.failed, 'bytes': dev.stats.bytes, 'seconds': round(dev.stats.seconds, 3),
+                 'files_per_s': round(dev.stats.files_per_s, 1)} for dev in self._devices.values()]
+
+    # --- workers ---
+    def _take(self) -> tuple[int, int]:
+        with self._lock:
+            ok, failed = self._ok, self._failed; self._ok = self._failed = 0
+        return ok, failed
+
+    def _work(self, dev: _Device) -> None:
+        while True:
+            with dev.cond:
+                while not dev._ready() and not (dev.closing and not dev.queue):
+                    dev.cond.wait()
+                if not dev.queue: return
+                batch = dev.queue.popleft(); backend = dev.idle.pop(); dev.active += 1
+                dev.cond.notify_all()
+            before = backend.stats.bytes
+            try:
+                ok, failed = backend.submit(batch)
+            except Exception:
+                logging.exception("Falha ao excluir lote em %s", dev.label)
+                ok, failed = 0, len(batch)
+            freed = backend.stats.bytes - before
+            with dev.cond:
+                dev.idle.append(backend); dev.active -= 1
+                self._account_device(dev, ok, failed, freed)
+                dev.cond.notify_all()
+            with self._lock:
+                self._ok += ok; self._failed += failed
+                self._add_totals(ok, failed, freed)
+
+    def _add_totals(self, ok: int, failed: int, freed: int) -> None:
+        """Totais do agendador; chamar com `self._lock` (dispositivos rodam em paralelo)."""
+        st = self.stats
+        st.files += ok; st.failed += failed; st.bytes += freed
+
+    def _account_device(self, dev: _Device, ok: int, failed: int, freed: int) -> None:
+        st = dev.stats
+        st.files += ok; st.failed += failed; st.bytes += freed
+        now = time.perf_counter(); st.seconds = now - dev.started
+        if not self.auto_tune or now - dev.tune_at < TUNE_INTERVAL: return
+        rate = (st.files + st.failed - dev.tune_files) / (now - dev.tune_at)
+        if dev.tune_rate and rate < dev.tune_rate * (1 - TUNE_MARGIN):
+            dev.tune_dir = -dev.tune_dir            # piorou: volta no sentido contrário
+        elif dev.tune_rate and rate < dev.tune_rate * (1 + TUNE_MARGIN):
+            dev.tune_dir = 0 if dev.tune_dir else 1  # estável: para (ou volta a sondar)
+        dev.limit = min(dev.max_limit, max(1, dev.limit + dev.tune_dir))
+        dev.tune_at = now; dev.tune_files = st.files + st.failed; dev.tune_rate = rate
+
+    def _wait_idle(self) -> None:
+        for dev in self._devices.values():
+            with dev.cond:
+                while dev.queue or dev.active: dev.cond.wait()
+
+    def _flush_device(self, dev: _Device) -> tuple[int, int]:
+        ok = failed = 0
+        for b in dev.backends:
+            before_files, before_failed, before_bytes = b.stats.files, b.stats.failed, b.stats.bytes
+            o, f = b.flush(); ok += o; failed += f
+            delta = (b.stats.files - before_files, b.stats.failed - before_failed, b.stats.bytes - before_bytes)
+            with dev.cond: self._account_device(dev, *delta)
+            with self._lock: self._add_totals(*delta)
+        return ok, failed
+
+    def _close(self) -> None:
+        for dev in self._devices.values():
+            with dev.cond: dev.closing = True; dev.cond.notify_all()
+        for dev in self._devices.values():
+            for t in dev.threads: t.join()
+        self.stats.seconds = max((d.stats.seconds for d in self._devices.values()), default=0.0)
+
+def make_scheduler(mode: str = MODE_AUTO, limits: dict[str, int] | None = None,
+                   auto_tune: bool = False) -> DeviceScheduler:
+    return DeviceScheduler(mode, limits, auto_tune)
@@ -0,0 +1,178 @@
+from __future__ import annotations
+import os, re, json, hashlib, logging, threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterator
+
+from .os_utils import app_cache_dir
+
+# Análise dos comandos das chaves Run: de "C:\App\app.exe" --min ou
+# rundll32.exe C:\x.dll,Entry chega-se ao arquivo de fato executado, com
+# tamanho, mtime e SHA-256. Os hashes ficam num cache keyed por
+# (caminho, tamanho, mtime_ns): numa atualização só binários alterados são
+# lidos de novo.
+
+CACHE_FILENAME = 'startup_hashes.json'
+ANALYZE_WORKERS = 4
+HASH_CHUNK = 1024 * 1024
+_EXE_EXTS = ('.exe', '.com', '.bat', '.cmd', '.dll', '.scr', '.lnk', '.vbs', '.js', '.ps1')
+_SWITCHES = re.compile(r'^(?:[/-]\w{1,2}(?::\S*)?\s+)+')
+_LOADERS = {'rundll32.exe', 'rundll32', 'regsvr32.exe', 'regsvr32'}
+
+class TargetInfo:
+    __slots__ = ('command', 'path', 'args', 'exists', 'size', 'mtime', 'sha256', 'error')
+
+    def __init__(self, command: str):
+        self.command = command
+        self.path: str | None = None
+        self.args = ''
+        self.exists = False
+        self.size = 0; self.mtime = 0.0
+        self.sha256: str | None = None
+        self.error: str | None = None
+
+    @property
+    def missing(self) -> bool:
+        return self.path is None or not self.exists
+
+    def __repr__(self) -> str:
+        return f"TargetInfo({self.path!r}, exists={self.exists}, size={self.size})"
+
+def _expand(text: str) -> str:
+    return os.path.expandvars(text.strip())
+
+def _which(name: str) -> str | None:
+    """Procura `name` como o Windows faria: caminho absoluto, System32 e PATH, com PATHEXT."""
+    exts = [''] if os.path.splitext(name)[1] else [''] + os.environ.get('PATHEXT', '.COM;.EXE;.BAT;.CMD').lower().split(';')
+    if os.path.isabs(name) or os.sep in name or (os.altsep and os.altsep in name):
+        dirs = ['']
+    else:
+        windir = os.environ.get('SystemRoot') or os.environ.get('windir') or ''
+        dirs = ([os.path.join(windir, 'System32'), windir] if windir else []) + os.environ.get('PATH', '').split(os.pathsep)
+    for d in dirs:
+        for ext in exts:
+            p = os.path.join(d, name + ext) if d else name + ext
+            if os.path.isfile(p): return p
+    return None
+
+def parse_command(command: str) -> tuple[str, str]:
+    """
+    Separa executável e argumentos. Aceita caminho entre aspas, caminho com
+    espaços sem aspas (tenta prefixos até achar um arquivo) e desvia
+    rundll32/regsvr32 para a DLL carregada.
+    """
+    exe, args = _leading_path(_expand(command))
+    if os.path.basename(exe).lower() in _LOADERS and args:
+        rest = _SWITCHES.sub('', args)   # regsvr32 /s /i x.dll
+        dll, _ = _leading_path(rest, sep=',')
+        if dll: return dll, args
+    return exe, args
+
+def _leading_path(text: str, sep: str = ' ') -> tuple[str, str]:
+    """Primeiro caminho de `text` (entre aspas ou não) e o restante."""
+    text = text.strip()
+    if text.startswith('"'):
+        end = text.find('"', 1)
+        return (text[1:end], text[end + 1:].lstrip(', ')) if end > 0 else (text[1:], '')
+    head, _, tail = text.partition(',') if sep == ',' else (text, '', '')
+    parts = head.split(' ')
+    for i in range(len(parts), 0, -1):
+        cand = ' '.join(parts[:i])
+        if cand.lower().endswith(_EXE_EXTS) and os.path.isfile(cand):
+            rest = ' '.join(parts[i:])
+            return cand, (rest + (',' + tail if tail else '')).strip()
+    first, _, rest = text.partition(sep)
+    return first, rest.strip()
+
+class HashCache:
+    """(caminho, tamanho, mtime_ns) -> SHA-256, persistido em JSON."""
+    def __init__(self, path: str | None = None):
+        self.path = path or os.path.join(app_cache_dir(), CACHE_FILENAME)
+        self._data: dict[str, list] = {}
+        self._lock = threading.Lock()
+        self.hits = 0; self.misses = 0
+        self._dirty = False
+        try:
+            with open(self.path, 'r', encoding='utf-8') as fh:
+                self._data = json.load(fh)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logging.debug("Cache de hashes descartado (%s): %s", self.path, e)
+
+    def get(self, path: str, size: int, mtime_ns: int) -> str | None:
+        with self._lock:
+            rec = self._data.get(os.path.normcase(path))
+            if rec and rec[0] == size and rec[1] == mtime_ns:
+                self.hits += 1; return rec[2]
+            self.misses += 1
+            return None
+
+    def put(self, path: str, size: int, mtime_ns: int, digest: str) -> None:
+        with self._lock:
+            self._data[os.path.normcase(path)] = [size, mtime_ns, digest]; self._dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty: return
+            data = json.dumps(self._data, separators=(',', ':'), ensure_ascii=False)
+            self._dirty = False
+        tmp = self.path + '.tmp'
+        try:
+            with open(tmp, 'w', encoding='utf-8') as fh: fh.write(data)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logging.debug("Falha ao gravar cache de hashes: %s", e)
+
+_cache: HashCache | None = None
+_cache_lock = threading.Lock()
+
+def _default_cache() -> HashCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None: _cache = HashCache()
+        return _cache
+
+def _sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(HASH_CHUNK), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def analyze_command(command: str, cache: HashCache | None = None) -> TargetInfo:
+    info = TargetInfo(command)
+    try:
+        exe, info.args = parse_command(command)
+        info.path = _which(exe) or exe
+        st = os.stat(info.path)
+        info.exists = True; info.size = st.st_size; info.mtime = st.st_mtime
+        digest = cache.get(info.path, st.st_size, st.st_mtime_ns) if cache else None
+        if digest is None:
+            digest = _sha256(info.path)
+            if cache: cache.put(info.path, st.st_size, st.st_mtime_ns, digest)
+        info.sha256 = digest
+    except FileNotFoundError:
+        info.error = "arquivo não encontrado"
+    except OSError as e:
+        info.error = str(e)
+    return info
+
+def iter_analyze(commands: dict[str, str], workers: int = ANALYZE_WORKERS,
+                 cache: HashCache | None = None) -> Iterator[tuple[str, TargetInfo]]:
+    """
+    Analisa {chave: comando} em paralelo e devolve (chave, TargetInfo) na
+    ordem em que ficam prontos. O cache é gravado ao final.
+    """
+    cache = cache or _default_cache()
+    if not commands: return
+    cache.hits = cache.misses = 0
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(commands))), thread_name_prefix='startup') as ex:
+        futs = {ex.submit(analyze_command, cmd, cache): key for key, cmd in commands.items()}
+        for fut in as_completed(futs):
+            yield futs[fut], fut.result()
+    logging.debug("Análise de inicialização: %d hashes do cache, %d recalculados.", cache.hits, cache.misses)
+    cache.save()
+
+def analyze_commands(commands: dict[str, str], workers: int = ANALYZE_WORKERS,
+                     cache: HashCache | None = None) -> dict[str, TargetInfo]:
+    return dict(iter_analyze(commands, workers, cache))
@@ -0,0 +1,185 @@
+from __future__ import annotations
+import os, time, shutil, logging, threading
+from typing import Iterator
+
+try:
+    import psutil  # type: ignore
+    HAS_PSUTIL = True
+except Exception:
+    HAS_PSUTIL = False
+
+from .os_utils import human_size
+
+# Informações do sistema sem travar a interface: cada partição é consultada
+# numa thread daemon com tempo limite — uma unidade de rede mapeada ou um
+# USB dormindo pode prender `disk_usage` por segundos (ou para sempre), e
+# a thread presa é simplesmente abandonada. As fixas vêm primeiro; as
+# removíveis/de rede, com limite próprio, num segundo evento. O resultado
+# fica em cache por `INFO_TTL` s.
+
+INFO_TTL = 60.0
+PROBE_TIMEOUT = 2.0          # partições fixas
+SLOW_PROBE_TIMEOUT = 5.0     # removíveis e de rede
+
+KIND_FIXED = 'fixed'
+KIND_REMOVABLE = 'removable'
+KIND_REMOTE = 'remote'
+KIND_CDROM = 'cdrom'
+SLOW_KINDS = (KIND_REMOVABLE, KIND_REMOTE)
+_REMOTE_FS = {'nfs', 'nfs4', 'cifs', 'smbfs', 'smb3', 'sshfs', 'fuse.sshfs', '9p', 'afs'}
+
+class PartitionInfo:
+    __slots__ = ('device', 'mountpoint', 'fstype', 'kind', 'total', 'free', 'elapsed', 'timed_out', 'error')
+
+    def __init__(self, device: str, mountpoint: str, fstype: str = '', kind: str = KIND_FIXED):
+        self.device = device; self.mountpoint = mountpoint; self.fstype = fstype; self.kind = kind
+        self.total = 0; self.free = 0; self.elapsed = 0.0
+        self.timed_out = False; self.error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return not self.timed_out and self.error is None
+
+    def __repr__(self) -> str:
+        state = "tempo esgotado" if self.timed_out else self.error or f"{self.free}/{self.total}"
+        return f"PartitionInfo({self.device}, {self.kind}, {state})"
+
+class SystemInfo:
+    __slots__ = ('user', 'computer', 'ram_total', 'ram_free', 'cpu_count', 'cpu_mhz', 'partitions',
+                 'collected_at', 'elapsed', 'done')
+
+    def __init__(self):
+        self.user = os.environ.get('USERNAME') or os.environ.get('USER') or ''
+        self.computer = os.environ.get('COMPUTERNAME') or os.environ.get('HOSTNAME') or ''
+        self.ram_total = 0; self.ram_free = 0
+        self.cpu_count = os.cpu_count() or 0; self.cpu_mhz = 0.0
+        self.partitions: list[PartitionInfo] = []
+        self.collected_at = 0.0; self.elapsed = 0.0
+        self.done = False   # False: removíveis/rede ainda em consulta
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.collected_at
+
+    def copy(self) -> SystemInfo:
+        info = SystemInfo.__new__(SystemInfo)
+        for k in self.__slots__: setattr(info, k, getattr(self, k))
+        info.partitions = list(self.partitions)
+        return info
+
+    def log(self) -> None:
+        logging.info("==== Informações do Sistema ====")
+        logging.info("Usuário: %s", self.user)
+        logging.info("Computador: %s", self.computer)
+        if self.ram_total:
+            logging.info("RAM: %s livre de %s", human_size(self.ram_free), human_size(self.ram_total))
+        if self.cpu_mhz:
+            logging.info("CPU: %d núcleos, %.0f MHz", self.cpu_count, self.cpu_mhz)
+        for p in self.partitions:
+            if p.ok:
+                logging.info("Disco %s: %s livres de %s", p.device, human_size(p.free), human_size(p.total))
+            else:
+                logging.info("Disco %s (%s): %s", p.device, p.kind,
+                             "sem resposta" if p.timed_out else p.error)
+
+    def __repr__(self) -> str:
+        return f"SystemInfo({self.computer}, partitions={self.partitions}, done={self.done})"
+
+def _kind(opts: str, fstype: str) -> str:
+    opts_set = {o.strip().lower() for o in opts.split(',')}
+    if KIND_CDROM in opts_set: return KIND_CDROM
+    if KIND_REMOTE in opts_set or fstype.lower() in _REMOTE_FS: return KIND_REMOTE
+    if KIND_REMOVABLE in opts_set: return KIND_REMOVABLE
+    return KIND_FIXED
+
+def list_partitions() -> list[PartitionInfo]:
+    """Partições montadas, sem tocar nelas (só a tabela do sistema)."""
+    if not HAS_PSUTIL: return []
+    try:
+        parts = psutil.disk_partitions(all=False)
+    except Exception as e:
+        logging.debug("Falha ao listar partições: %s", e); return []
+    return [PartitionInfo(p.device, p.mountpoint, p.fstype, _kind(p.opts, p.fstype)) for p in parts]
+
+# pontos de montagem com consulta ainda presa de uma coleta anterior
+_stuck: set[str] = set()
+_stuck_lock = threading.Lock()
+
+def probe_partitions(parts: list[PartitionInfo], timeout: float) -> None:
+    """`disk_usage` de cada partição em paralelo, cada uma em thread daemon; espera no máximo `timeout` s."""
+    threads = []
+    for p in parts:
+        with _stuck_lock:
+            if p.mountpoint in _stuck:
+                p.timed_out = True; continue   # não empilha outra thread no mesmo volume travado
+            _stuck.add(p.mountpoint)
+
+        def probe(p: PartitionInfo = p) -> None:
+            start = time.perf_counter()
+            try:
+                usage = shutil.disk_usage(p.mountpoint); error = None
+            except OSError as e:
+                usage = None; error = e.strerror or str(e)
+            with _stuck_lock:
+                _stuck.discard(p.mountpoint)
+                if p.timed_out: return   # já reportada como sem resposta
+                if usage: p.total, p.free = usage.total, usage.free
+                p.error = error; p.elapsed = time.perf_counter() - start
+        t = threading.Thread(target=probe, name=f"sysinfo-{p.device}", daemon=True)
+        t.start(); threads.append((p, t))
+    deadline = time.monotonic() + timeout
+    for p, t in threads:
+        t.join(max(0.0, deadline - time.monotonic()))
+        with _stuck_lock:
+            if not t.is_alive(): continue
+            p.timed_out = True
+            logging.debug("Partição %s (%s) sem resposta em %.0f s.", p.device, p.kind, timeout)
+
+_cache: SystemInfo | None = None
+_cache_lock = threading.Lock()
+
+def iter_system_info(max_age: float = INFO_TTL, timeout: float = PROBE_TIMEOUT,
+                     slow_timeout: float = SLOW_PROBE_TIMEOUT) -> Iterator[SystemInfo]:
+    """
+    Produz a coleta em duas etapas: RAM/CPU + partições fixas, depois as
+    removíveis/de rede (`done=True`). Com um resultado de menos de `max_age`
+    s em cache, produz só ele.
+    """
+    global _cache
+    with _cache_lock:
+        cached = _cache
+    if cached is not None and cached.age < max_age:
+        yield cached.copy(); return
+    start = time.perf_counter()
+    info = SystemInfo()
+    if HAS_PSUTIL:
+        try:
+            vm = psutil.virtual_memory(); info.ram_total, info.ram_free = vm.total, vm.available
+            freq = psutil.cpu_freq()
+            if freq: info.cpu_count = psutil.cpu_count(logical=True) or info.cpu_count; info.cpu_mhz = freq.current
+        except Exception as e:
+            logging.debug("Falha ao ler RAM/CPU: %s", e)
+    parts = [p for p in list_partitions() if p.kind != KIND_CDROM]
+    fast = [p for p in parts if p.kind not in SLOW_KINDS]
+    slow = [p for p in parts if p.kind in SLOW_KINDS]
+    probe_partitions(fast, timeout)
+    info.partitions = list(fast); info.collected_at = time.time()
+    info.elapsed = time.perf_counter() - start
+    if slow:
+        yield info.copy()
+        probe_partitions(slow, slow_timeout)
+        info.partitions = fast + slow; info.elapsed = time.perf_counter() - start
+    info.done = True
+    with _cache_lock:
+        _cache = info
+    yield info.copy()
+
+def system_info(max_age: float = INFO_TTL) -> SystemInfo:
+    last = None
+    for last in iter_system_info(max_age): pass
+    return last
+
+def clear_cache() -> None:
+    global _cache
+    with _cache_lock:
+        _cache = None
@@ -0,0 +1,134 @@
+from __future__ import annotations
+import os, stat, time, logging, threading
+from fnmatch import fnmatchcase
+
+from . import metrics
+
+# Registro declarativo de alvos de limpeza. Cada cleaner registra padrões no
+# formato  %VARIAVEL%/seg/*/seg  (curingas do fnmatch, sem diferenciar
+# maiúsculas; cada curinga vale para um segmento só — `**` é igual a `*`) e `resolve_targets` resolve todos numa única travessia de
+# %LOCALAPPDATA%/%APPDATA%: os padrões viram uma árvore de prefixos, então
+# um alvo novo só acrescenta ramos — as pastas em comum não são relidas.
+
+KIND_DIR = 'dir'
+KIND_FILE = 'file'
+_WILDCARDS = set('*?[')
+
+class Target:
+    __slots__ = ('name', 'group', 'patterns', 'kind')
+
+    def __init__(self, name: str, group: str, patterns: tuple[str, ...], kind: str = KIND_DIR):
+        self.name = name; self.group = group; self.patterns = patterns; self.kind = kind
+
+_REGISTRY: dict[str, Target] = {}
+_lock = threading.Lock()
+_cache: tuple[float, Resolution] | None = None
+
+def register_target(name: str, group: str, *patterns: str, kind: str = KIND_DIR) -> Target:
+    global _cache
+    t = Target(name, group, tuple(p.replace('\\', '/') for p in patterns), kind)
+    with _lock:
+        _REGISTRY[name] = t; _cache = None
+    return t
+
+def registered_targets(group: str | None = None) -> list[Target]:
+    return [t for t in _REGISTRY.values() if group is None or t.group == group]
+
+class Resolution:
+    """Caminhos encontrados e tempo de resolução (s) por alvo."""
+    def __init__(self, targets: list[Target]):
+        self.targets = targets
+        self.paths: dict[str, list[str]] = {t.name: [] for t in targets}
+        self.timings: dict[str, float] = {t.name: 0.0 for t in targets}
+        self.elapsed = 0.0
+
+    def group(self, group: str) -> list[str]:
+        out: list[str] = []
+        for t in self.targets:
+            if t.group == group: out.extend(self.paths[t.name])
+        return out
+
+    def log(self) -> None:
+        logging.debug("Alvos resolvidos em %.1f ms: %s", self.elapsed * 1000,
+                      ", ".join(f"{n}={len(self.paths[n])} ({self.timings[n]*1000:.1f} ms)" for n in self.paths))
+
+class _Node:
+    __slots__ = ('seg', 'children', 'hits', 'names')
+
+    def __init__(self, seg: str = ''):
+        self.seg = seg
+        self.children: dict[str, _Node] = {}   # padrão em minúsculas -> nó
+        self.hits: list[Target] = []           # alvos que terminam aqui
+        self.names: set[str] = set()           # alvos que passam por aqui
+
+    @property
+    def literal(self) -> bool:
+        return not any(ch in _WILDCARDS for k in self.children for ch in k)
+
+def _build_tries(targets: list[Target]) -> dict[str, _Node]:
+    tries: dict[str, _Node] = {}
+    for t in targets:
+        for pat in t.patterns:
+            head, _, rest = pat.partition('/')
+            base = os.environ.get(head.strip('%'), '') if head.startswith('%') else head
+            if not base or not rest: continue
+            key = os.path.normcase(os.path.abspath(base))
+            node = tries.setdefault(key, _Node(base)); node.names.add(t.name)
+            for seg in rest.split('/'):
+                node = node.children.setdefault(seg.lower(), _Node(seg)); node.names.add(t.name)
+            node.hits.append(t)
+    return tries
+
+def _walk(base: str, root: _Node, res: Resolution) -> None:
+    stack = [(base, root)]
+    while stack:
+        path, node = stack.pop()
+        start = time.perf_counter()
+        found: list[tuple[str, _Node, bool]] = []   # (caminho, nó, é_pasta)
+        if node.literal:
+            # só nomes fixos: um stat por filho, sem listar a pasta
+            for child in node.children.values():
+                p = os.path.join(path, child.seg)
+                try: st = os.stat(p)
+                except OSError: continue
+                found.append((p, child, stat.S_ISDIR(st.st_mode)))
+        else:
+            try:
+                with os.scandir(path) as it:
+                    for e in it:
+                        name = e.name.lower()
+                        for pat, child in node.children.items():
+                            if fnmatchcase(name, pat):
+                                try: found.append((e.path, child, e.is_dir()))
+                                except OSError: pass
+            except OSError:
+                pass
+        share = (time.perf_counter() - start) / max(1, len(node.names))
+        for n in node.names: res.timings[n] += share
+        for p, child, is_dir in found:
+            for t in child.hits:
+                if is_dir == (t.kind == KIND_DIR): res.paths[t.name].append(p)
+            if child.children and is_dir: stack.append((p, child))
+
+@metrics.instrument()
+def resolve_targets(max_age: float = 0.0) -> Resolution:
+    """
+    Resolve todos os alvos registrados numa só travessia. Com `max_age` > 0,
+    reaproveita a última resolução se for mais recente que isso (s).
+    """
+    global _cache
+    with _lock:
+        if max_age > 0 and _cache and time.monotonic() - _cache[0] < max_age:
+            return _cache[1]
+        targets = list(_REGISTRY.values())
+    res = Resolution(targets)
+    start = time.perf_counter()
+    for node in _build_tries(targets).values():
+        if os.path.isdir(node.seg): _walk(node.seg, node, res)
+    # padrões sobrepostos do mesmo alvo podem casar o mesmo caminho mais de uma vez
+    for name, paths in res.paths.items(): res.paths[name] = sorted(set(paths))
+    res.elapsed = time.perf_counter() - start
+    res.log()
+    with _lock:
+        _cache = (time.monotonic(), res)
+    return res
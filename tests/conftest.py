@@ -0,0 +1,32 @@
+import os, sys, time
+
+import pytest
+
+# os testes importam `system.*` como o main.py faz: raiz do projeto no path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+OLD = time.time() - 30 * 86400
+
+@pytest.fixture
+def make_tree(tmp_path):
+    """Cria arquivos a partir de {caminho_relativo: tamanho ou (tamanho, mtime)}; devolve a raiz."""
+    def make(spec: dict, root: str = 'root') -> str:
+        base = tmp_path / root
+        base.mkdir(parents=True, exist_ok=True)
+        for rel, info in spec.items():
+            size, mtime = info if isinstance(info, tuple) else (info, None)
+            p = base / rel
+            p.parent.mkdir(parents=True, exist_ok=True)
+            p.write_bytes(b'x' * size)
+            if mtime is not None: os.utime(p, (mtime, mtime))
+        return str(base)
+    return make
+
+def listing(root: str) -> list[str]:
+    """Arquivos que sobraram sob `root`, relativos e com '/'."""
+    out = []
+    for d, _, files in os.walk(root):
+        out.extend(os.path.relpath(os.path.join(d, f), root).replace(os.sep, '/') for f in files)
+    return sorted(out)
@@ -0,0 +1,37 @@
+from system.budget import SCOPE_ROOT, ByteBudget, apply_budget, select_evictions
+
+NOW = 1_000_000.0
+HOUR = 3600.0
+
+def _pool(root, *files):
+    """files: (nome, tamanho, horas desde o último uso)."""
+    return [(f"{root}/{name}", size, NOW - age * HOUR, NOW - age * HOUR) for name, size, age in files]
+
+def test_nothing_to_evict_under_cap():
+    pools = {'r': _pool('r', ('a', 10, 10), ('b', 10, 20))}
+    assert select_evictions(pools, cap=100, keep_recent=0, now=NOW) == {'r': []}
+
+def test_evicts_oldest_first_until_under_cap():
+    pools = {'r': _pool('r', ('new', 10, 1), ('mid', 10, 5), ('old', 10, 9))}
+    out = select_evictions(pools, cap=15, keep_recent=0, now=NOW)
+    assert [fe[0] for fe in out['r']] == ['r/old', 'r/mid']
+
+def test_recent_files_are_never_evicted():
+    pools = {'r': _pool('r', ('hot', 100, 1), ('cold', 10, 48))}
+    out = select_evictions(pools, cap=0, keep_recent=24, now=NOW)
+    assert [fe[0] for fe in out['r']] == ['r/cold']
+
+def test_oldest_across_roots_of_a_group():
+    pools = {'r1': _pool('r1', ('a', 10, 2)), 'r2': _pool('r2', ('b', 10, 8))}
+    out = select_evictions(pools, cap=10, keep_recent=0, now=NOW)
+    assert out == {'r1': [], 'r2': [('r2/b', 10, NOW - 8 * HOUR)]}
+
+def test_apply_budget_scopes_and_shrink_report():
+    pools = {'r1': _pool('r1', ('a', 60, 2), ('b', 60, 8)), 'r2': _pool('r2', ('c', 60, 5))}
+    groups = {'r1': 'chrome', 'r2': 'chrome'}
+    plan, shrink = apply_budget(pools, ByteBudget(cap=100, keep_recent=0), groups, now=NOW)
+    assert sum(len(gone) for gone, _ in plan.values()) == 2
+    assert shrink['chrome'].bytes == 180 and shrink['chrome'].after == 60
+    plan, _ = apply_budget(pools, ByteBudget(cap=100, scope=SCOPE_ROOT, keep_recent=0), groups, now=NOW)
+    assert [fe[0] for fe in plan['r1'][0]] == ['r1/b'] and plan['r2'][0] == []
+    assert plan['r1'][1] == {'r1'}
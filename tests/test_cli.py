@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+import cli
+from system.actions import ACTIONS, STATUS_ERROR, STATUS_FAILED, STATUS_OK, STATUS_SKIPPED, Action
+from system.jobs import RES_LIGHT
+from system.os_utils import SKIP_OS_CHECK_ENV
+from system.pipeline import Pipeline
+
+@pytest.fixture
+def calls(monkeypatch, tmp_path):
+    """Sem checagem de SO, perfis em tmp_path e todas as ações trocadas por registradoras."""
+    monkeypatch.setenv(SKIP_OS_CHECK_ENV, '1')
+    monkeypatch.setenv('LOCALAPPDATA', str(tmp_path))
+    seen: list[tuple[str, bool]] = []
+
+    def make(name, ok=True):
+        def fn(dry_run, cancel):
+            seen.append((name, dry_run))
+            return ok, {'files': 2, 'bytes': 2048}
+        return fn
+    for a in list(ACTIONS.values()):
+        monkeypatch.setitem(ACTIONS, a.name, Action(a.name, a.title, make(a.name), a.resource, a.supports_dry_run))
+    monkeypatch.setitem(ACTIONS, 'bad', Action('bad', 'bad', make('bad', ok=False), RES_LIGHT, True))
+    return seen
+
+def _json(capsys):
+    return json.loads(capsys.readouterr().out)
+
+@pytest.mark.parametrize('argv', [['--bogus'], [], ['--run', ' , '], ['--run', 'nope'],
+                                  ['--run', 'caches,caches'], ['--profile', 'nope'], ['--profile', '../x']])
+def test_usage_errors_exit_2(calls, argv, capsys):
+    assert cli.main(argv) == cli.EXIT_USAGE
+    assert capsys.readouterr().out == '' and calls == []
+
+def test_help_and_list_exit_0(calls, capsys):
+    assert cli.main(['--help']) == cli.EXIT_OK
+    assert cli.main(['--list']) == cli.EXIT_OK
+    out = capsys.readouterr().out
+    assert 'caches' in out and '(sem --dry-run)' in out and 'completa' in out
+    assert calls == []
+
+def test_os_check_without_bypass(calls, monkeypatch):
+    monkeypatch.setattr(cli, 'ensure_windows', lambda: (_ for _ in ()).throw(SystemExit("só Windows")))
+    with pytest.raises(SystemExit): cli.main(['--run', 'caches', '--quiet'])
+    assert calls == []
+
+@pytest.mark.parametrize('name', sorted(ACTIONS))
+def test_dry_run_each_action(calls, name, capsys):
+    assert cli.main(['--run', name, '--dry-run', '--json', '--quiet']) == cli.EXIT_OK
+    out = _json(capsys)
+    assert out['ok'] and out['dry_run'] and out['profile'] == 'cli'
+    [res] = out['actions']
+    if ACTIONS[name].supports_dry_run:
+        assert res['status'] == STATUS_OK and calls == [(name, True)]
+    else:
+        assert res['status'] == STATUS_SKIPPED and calls == []
+
+def test_json_output_and_failure_exit_1(calls, capsys):
+    assert cli.main(['--run', 'caches,bad', '--json', '--quiet']) == cli.EXIT_FAILED
+    out = _json(capsys)
+    assert not out['ok'] and not out['dry_run'] and isinstance(out['elapsed'], float)
+    assert {a['name']: a['status'] for a in out['actions']} == {'caches': STATUS_OK, 'bad': STATUS_FAILED}
+    assert sorted(calls) == [('bad', False), ('caches', False)]
+
+def test_exception_in_action_is_reported(calls, monkeypatch, capsys):
+    def boom(dry_run, cancel): raise RuntimeError("quebrou")
+    monkeypatch.setitem(ACTIONS, 'caches', Action('caches', 'caches', boom, RES_LIGHT, True))
+    assert cli.main(['--run', 'caches', '--json', '--quiet']) == cli.EXIT_FAILED
+    [res] = _json(capsys)['actions']
+    assert res['status'] == STATUS_ERROR and not res['ok']
+
+def test_text_output_and_profile(calls, capsys):
+    assert cli.main(['--profile', 'rapida', '--dry-run', '--quiet']) == cli.EXIT_OK
+    lines = capsys.readouterr().out.splitlines()
+    assert [l.split()[0] for l in lines] == ['recycle', 'thumbs', 'caches', 'ram', 'total']
+    assert '(simulação)' in lines[-1] and 'arquivos=2' in lines[2]
+
+def test_interrupted_exit_130(calls, monkeypatch):
+    def interrupt(self, *a, **kw): raise KeyboardInterrupt
+    monkeypatch.setattr(Pipeline, 'run', interrupt)
+    assert cli.main(['--run', 'caches', '--quiet']) == cli.EXIT_INTERRUPTED
+
+def test_after_logging_runs_once(calls):
+    ran = []
+    assert cli.main(['--run', 'caches', '--dry-run', '--quiet'], after_logging=lambda: ran.append(1)) == cli.EXIT_OK
+    assert ran == [1]
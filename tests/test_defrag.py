@@ -0,0 +1,69 @@
+import os, sys, time
+
+import pytest
+
+from system.defrag import (MEDIA_HDD, MEDIA_REMOTE, MEDIA_SSD, STATE_CANCELLED, STATE_DONE, STATE_FAILED,
+                           STATE_RUNNING, STATE_SKIPPED, DefragRun, Volume, parse_progress)
+from system.progress import CancelToken
+
+@pytest.mark.parametrize('line, expected', [
+    ("Pre-Optimization: 12% complete...", ('Pre-Optimization', 12.0)),
+    ("Desfragmentação: 45,5% concluída...", ('Desfragmentação', 45.5)),
+    ("   Retrim:  100% complete.", ('Retrim', 100.0)),
+    ("Invoking retrim on C:", None),
+    ("Fase: 150%", None),
+    ("", None),
+])
+def test_defrag_parse_progress(line, expected):
+    assert parse_progress(line) == expected
+
+FAKE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fake_defrag.py')
+
+def _fake(v):
+    return [sys.executable, FAKE, v.path]
+
+def _run(volumes, cancel=None, on_event=None, **kw):
+    run = DefragRun(volumes, command=_fake, **kw)
+    events = []
+    for ev in run.iter_run(cancel, interval=0.05):
+        events.append(ev)
+        if on_event: on_event(run, ev)
+    return run, events
+
+def _states(ev):
+    return {st.volume.letter: st.state for st in ev.volumes}
+
+def test_defrag_run_reports_each_drive(monkeypatch):
+    monkeypatch.setenv('FAKE_DEFRAG_DELAY', '0.005'); monkeypatch.setenv('FAKE_DEFRAG_FAIL', 'D')
+    vols = [Volume('C', MEDIA_SSD), Volume('D', MEDIA_HDD), Volume('E', MEDIA_SSD), Volume('Z', MEDIA_REMOTE)]
+    _, events = _run(vols)
+    last = events[-1]
+    assert last.done and not last.cancelled and all(not ev.done for ev in events[:-1])
+    assert _states(last) == {'C': STATE_DONE, 'D': STATE_FAILED, 'E': STATE_DONE, 'Z': STATE_SKIPPED}
+    by = {st.volume.letter: st for st in last.volumes}
+    assert by['C'].percent == 100.0 and by['C'].returncode == 0
+    assert by['D'].returncode == 1 and 'volume is locked' in by['D'].message
+    assert not last.ok and last.errors == 1 and last.result == (2, 0)
+    assert any(st.phase == 'Retrim' for ev in events for st in ev.volumes)
+
+def test_defrag_cancel_volume_keeps_the_others(monkeypatch):
+    monkeypatch.setenv('FAKE_DEFRAG_DELAY', '0.05'); monkeypatch.delenv('FAKE_DEFRAG_FAIL', raising=False)
+
+    def skip_d(run, ev):
+        if _states(ev)['D'] == STATE_RUNNING: run.cancel_volume('D:')
+    _, events = _run([Volume('C', MEDIA_SSD), Volume('D', MEDIA_SSD)], on_event=skip_d, parallel=2)
+    assert _states(events[-1]) == {'C': STATE_DONE, 'D': STATE_CANCELLED}
+    assert events[-1].errors == 0
+
+def test_defrag_cancel_stops_running_and_pending(monkeypatch):
+    monkeypatch.setenv('FAKE_DEFRAG_DELAY', '0.5'); monkeypatch.delenv('FAKE_DEFRAG_FAIL', raising=False)
+    token = CancelToken()
+
+    def cancel_when_running(run, ev):
+        if STATE_RUNNING in _states(ev).values(): token.cancel()
+    start = time.monotonic()
+    _, events = _run([Volume('C', MEDIA_HDD), Volume('D', MEDIA_HDD)], cancel=token, on_event=cancel_when_running)
+    assert time.monotonic() - start < 5
+    last = events[-1]
+    assert last.done and last.cancelled and last.result == (0, 0)
+    assert _states(last) == {'C': STATE_CANCELLED, 'D': STATE_SKIPPED}   # HDD: um por vez
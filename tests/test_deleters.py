@@ -0,0 +1,127 @@
+import os
+
+import pytest
+
+from conftest import OLD, listing
+from system import deleters
+from system.caches import _delete_from_paths
+from system.deleters import MODE_TREE, MODE_UNLINK, TrashBackend, TreeBackend, UnlinkBackend, make_backend
+from system.scanner import scan_tree
+
+SPEC = {'a/1.bin': 10, 'a/b/2.bin': 20, 'c/3.bin': 30, '4.bin': 40}
+
+def _entries(root):
+    entries, _, _ = scan_tree(root)
+    return entries
+
+def test_unlink_counts(make_tree):
+    root = make_tree(SPEC)
+    b = UnlinkBackend()
+    assert b.submit(_entries(root)) == (4, 0)
+    assert b.flush() == (0, 0)
+    assert b.stats.files == 4 and b.stats.bytes == 100
+    assert listing(root) == []
+
+def test_unlink_counts_missing_file_as_failure(make_tree):
+    root = make_tree(SPEC)
+    entries = _entries(root)
+    os.remove(os.path.join(root, '4.bin'))
+    assert UnlinkBackend().submit(entries) == (3, 1)
+
+def test_tree_removes_whole_subfolders_and_keeps_root(make_tree):
+    root = make_tree(SPEC)
+    b = TreeBackend(); b.begin([root])
+    assert b.submit(_entries(root)) == (0, 0)   # tudo fica para o flush
+    assert b.flush() == (4, 0)
+    assert os.path.isdir(root) and os.listdir(root) == []
+
+def test_tree_keeps_folders_with_skipped_files(make_tree):
+    root = make_tree({**SPEC, 'a/b/new.bin': 5})
+    entries = [fe for fe in _entries(root) if not fe[0].endswith('new.bin')]
+    b = TreeBackend(); b.begin([root]); b.skip(os.path.join(root, 'a', 'b', 'new.bin'))
+    b.submit(entries)
+    assert b.flush() == (4, 0)
+    assert listing(root) == ['a/b/new.bin']
+
+def test_tree_falls_back_to_unlink_for_files_created_after_scan(make_tree):
+    root = make_tree(SPEC)
+    entries = _entries(root)
+    open(os.path.join(root, 'a', 'b', 'late.bin'), 'wb').close()
+    b = TreeBackend(); b.begin([root]); b.submit(entries)
+    assert b.flush() == (4, 0)
+    assert listing(root) == ['a/b/late.bin']
+
+@pytest.mark.skipif(not hasattr(os, 'symlink') or os.name == 'nt', reason="symlink sem privilégio")
+def test_tree_does_not_rmtree_through_symlinks(make_tree):
+    root = make_tree(SPEC)
+    outside = make_tree({'keep.bin': 1}, root='outside')
+    os.symlink(outside, os.path.join(root, 'a', 'link'))
+    b = TreeBackend(); b.begin([root]); b.submit(_entries(root))
+    assert b.flush() == (4, 0)
+    assert listing(outside) == ['keep.bin']
+
+class FakeTrash:
+    """send2trash simulado: `refuse` recusa (sem apagar); com `fail_batch`, o lote apaga um arquivo e falha."""
+    def __init__(self, refuse=(), fail_batch=False):
+        self.refuse = set(refuse); self.fail_batch = fail_batch; self.calls = 0
+
+    def __call__(self, paths):
+        self.calls += 1
+        if isinstance(paths, list):
+            if self.fail_batch:
+                os.remove(next(p for p in paths if os.path.basename(p) not in self.refuse))
+                raise OSError("lote recusado")
+            for p in paths: self(p)
+            return
+        if os.path.basename(paths) in self.refuse: raise OSError("recusado")
+        os.remove(paths)
+
+def test_trash_batches_until_flush(make_tree, monkeypatch):
+    fake = FakeTrash()
+    monkeypatch.setattr(deleters, 'send2trash', fake, raising=False)
+    root = make_tree(SPEC)
+    b = TrashBackend(batch=3)
+    assert b.submit(_entries(root)) == (3, 0)
+    assert b.flush() == (1, 0)
+    assert listing(root) == []
+
+def test_trash_retry_counts_already_trashed_files(make_tree, monkeypatch):
+    monkeypatch.setattr(deleters, 'send2trash', FakeTrash(fail_batch=True), raising=False)
+    root = make_tree(SPEC)
+    b = TrashBackend(batch=10); b.submit(_entries(root))
+    assert b.flush() == (4, 0)
+
+def test_explicit_trash_keeps_refused_files(make_tree, monkeypatch):
+    monkeypatch.setattr(deleters, 'send2trash', FakeTrash(refuse={'4.bin'}, fail_batch=True), raising=False)
+    root = make_tree(SPEC)
+    b = TrashBackend(batch=10); b.submit(_entries(root))
+    assert b.flush() == (3, 1)
+    assert listing(root) == ['4.bin']
+
+def test_auto_trash_deletes_refused_files_permanently(make_tree, monkeypatch):
+    monkeypatch.setattr(deleters, 'send2trash', FakeTrash(refuse={'4.bin'}, fail_batch=True), raising=False)
+    root = make_tree(SPEC)
+    b = TrashBackend(batch=10, permanent_fallback=True); b.submit(_entries(root))
+    assert b.flush() == (4, 0)
+    assert listing(root) == []
+
+def test_make_backend_modes(monkeypatch):
+    assert isinstance(make_backend(MODE_UNLINK), UnlinkBackend)
+    assert isinstance(make_backend(MODE_TREE), TreeBackend)
+    monkeypatch.setattr(deleters, 'HAS_SEND2TRASH', False)
+    assert isinstance(make_backend(), UnlinkBackend)
+    with pytest.raises(ValueError): make_backend('trash')
+    with pytest.raises(ValueError): make_backend('xyz')
+
+@pytest.mark.parametrize('mode', [MODE_UNLINK, MODE_TREE])
+def test_age_cutoff_keeps_recent_files(make_tree, mode):
+    root = make_tree({'a/old.bin': (10, OLD), 'a/new.bin': 20, 'b/old.bin': (30, OLD), 'c/new.bin': 5})
+    assert _delete_from_paths([root], True, 7, mode=mode) == (2, 40)
+    assert len(listing(root)) == 4   # pré-visualização não apaga
+    assert _delete_from_paths([root], False, 7, mode=mode) == (2, 40)
+    assert listing(root) == ['a/new.bin', 'c/new.bin']
+
+def test_zero_days_deletes_everything(make_tree):
+    root = make_tree({'a/old.bin': (10, OLD), 'a/new.bin': 20})
+    assert _delete_from_paths([root], False, 0, mode=MODE_UNLINK) == (2, 30)
+    assert listing(root) == []
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from system.disk_usage import disk_usage, iter_disk_usage
+from system.progress import CancelToken
+
+SPEC = {'a/1.bin': 100, 'a/b/2.bin': 200, 'a/b/c/3.bin': 300, 'd/4.bin': 50, 'd/e/5.bin': 5, 'top.bin': 10,
+        'empty/.keep': 0}
+
+def _by_path(tree):
+    return {os.path.relpath(tree.path(i), tree.root).replace(os.sep, '/'): i for i in range(len(tree))}
+
+@pytest.mark.parametrize('workers', [1, 4])
+def test_totals_per_directory(make_tree, workers):
+    tree = disk_usage(make_tree(SPEC), workers=workers)
+    idx = _by_path(tree)
+    assert sorted(idx) == ['.', 'a', 'a/b', 'a/b/c', 'd', 'd/e', 'empty']
+    totals = {p: (tree.total_files[i], tree.total_bytes[i]) for p, i in idx.items()}
+    assert totals == {'.': (7, 665), 'a': (3, 600), 'a/b': (2, 500), 'a/b/c': (1, 300),
+                      'd': (2, 55), 'd/e': (1, 5), 'empty': (1, 0)}
+    assert (tree.files[idx['a']], tree.bytes[idx['a']]) == (1, 100)
+    assert tree.errors == 0
+
+def test_children_and_largest_dirs(make_tree):
+    tree = disk_usage(make_tree(SPEC))
+    idx = _by_path(tree)
+    name = {i: p for p, i in idx.items()}
+    assert [name[i] for i in tree.children()] == ['a', 'd', 'empty']
+    assert [name[i] for i in tree.children(limit=1)] == ['a']
+    assert [name[i] for i in tree.children(idx['a/b/c'])] == []
+    assert [name[i] for i in tree.largest_dirs(3)] == ['a', 'a/b', 'a/b/c']
+    assert [name[i] for i in tree.largest_dirs(2, direct=True)] == ['a/b/c', 'a/b']
+
+def test_top_files_keeps_only_the_largest(make_tree):
+    root = make_tree(SPEC)
+    last = None
+    for last in iter_disk_usage(root, top_files=3): pass
+    top = [(os.path.relpath(p, root).replace(os.sep, '/'), size) for p, size in last.tree.largest_files()]
+    assert top == [('a/b/c/3.bin', 300), ('a/b/2.bin', 200), ('a/1.bin', 100)]
+    assert last.tree.largest_files(1) == [(os.path.join(root, 'a', 'b', 'c', '3.bin'), 300)]
+    assert last.done and not last.cancelled and last.result == (7, 665) and last.dirs == 7
+
+def test_missing_root_counts_error(tmp_path):
+    tree = disk_usage(str(tmp_path / 'nao_existe'))
+    assert tree.errors == 1 and len(tree) == 1 and tree.total_bytes[0] == 0
+
+def test_cancel_before_start(make_tree):
+    token = CancelToken(); token.cancel()
+    events = list(iter_disk_usage(make_tree(SPEC), cancel=token))
+    assert events[-1].done and events[-1].cancelled
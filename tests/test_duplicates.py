@@ -0,0 +1,94 @@
+import os
+
+import pytest
+
+from system.duplicates import (KEEP_NEWEST, KEEP_OLDEST, KEEP_SHORTEST, PARTIAL_BLOCK, STAGE_FULL, iter_find_duplicates,
+                               select_extras)
+from system.startup_analysis import HashCache
+
+SIZE = 3 * PARTIAL_BLOCK
+BODY = bytes(range(256)) * (SIZE // 256)
+
+def _write(base, rel, data, mtime=None):
+    p = os.path.join(base, *rel.split('/'))
+    os.makedirs(os.path.dirname(p), exist_ok=True)
+    with open(p, 'wb') as fh: fh.write(data)
+    if mtime is not None: os.utime(p, (mtime, mtime))
+    return p
+
+def _middle_changed(data):
+    mid = len(data) // 2
+    return data[:mid] + bytes([data[mid] ^ 0xFF]) + data[mid + 1:]
+
+@pytest.fixture
+def caches(tmp_path):
+    return HashCache(str(tmp_path / 'partial.json')), HashCache(str(tmp_path / 'full.json'))
+
+def _find(roots, caches, **kw):
+    events = list(iter_find_duplicates(roots, partial_cache=caches[0], full_cache=caches[1], workers=2, **kw))
+    return events[-1], [g for ev in events for g in ev.groups]
+
+def _rel(base, group):
+    return [os.path.relpath(fe[0], base).replace(os.sep, '/') for fe in group.files]
+
+def test_only_real_duplicates_are_grouped(tmp_path, caches):
+    base = str(tmp_path / 'root')
+    for rel in ('a/copy.bin', 'b/copy.bin', 'b/c/copy2.bin'): _write(base, rel, BODY)
+    _write(base, 'same_size.bin', bytes(reversed(BODY)))             # só o tamanho bate
+    _write(base, 'same_ends.bin', _middle_changed(BODY))            # tamanho e hash parcial batem
+    _write(base, 'unique.bin', BODY + b'!')
+    _write(base, 'small/1.bin', b'abc'); _write(base, 'small/2.bin', b'abc')   # abaixo de min_size
+    last, groups = _find([base], caches)
+    assert len(groups) == 1
+    assert _rel(base, groups[0]) == ['a/copy.bin', 'b/c/copy2.bin', 'b/copy.bin']
+    assert groups[0].size == SIZE and groups[0].wasted == 2 * SIZE
+    assert last.done and last.stage == STAGE_FULL and last.result == (1, 2 * SIZE)
+    assert last.candidates == 5 and last.errors == 0
+
+def test_partial_hash_match_is_not_enough(tmp_path, caches):
+    base = str(tmp_path / 'root')
+    _write(base, 'a.bin', BODY); _write(base, 'b.bin', _middle_changed(BODY))
+    last, groups = _find([base], caches)
+    assert groups == [] and last.found == 0
+    assert last.hashed_bytes >= 2 * SIZE   # chegou ao hash completo
+
+def test_small_files_compare_whole_content(tmp_path, caches):
+    base = str(tmp_path / 'root')
+    _write(base, 'a.txt', b'x' * 2000); _write(base, 'b.txt', b'x' * 2000); _write(base, 'c.txt', b'y' * 2000)
+    _, groups = _find([base], caches)
+    assert [_rel(base, g) for g in groups] == [['a.txt', 'b.txt']]
+
+@pytest.mark.skipif(not hasattr(os, 'link'), reason="sem hard links")
+def test_hard_links_are_not_copies(tmp_path, caches):
+    base = str(tmp_path / 'root')
+    p = _write(base, 'a.bin', BODY)
+    os.link(p, os.path.join(base, 'link.bin'))
+    _, groups = _find([base], caches)
+    assert groups == []
+
+def test_second_run_uses_cache_and_sees_changes(tmp_path, caches):
+    base = str(tmp_path / 'root')
+    _write(base, 'a.bin', BODY); p = _write(base, 'b.bin', BODY)
+    assert len(_find([base], caches)[1]) == 1
+    caches[0].save(); caches[1].save()
+    fresh = HashCache(caches[0].path), HashCache(caches[1].path)
+    assert len(_find([base], fresh)[1]) == 1
+    assert fresh[0].hits == 2 and fresh[1].hits == 2 and fresh[0].misses == 0
+    _write(base, 'b.bin', _middle_changed(BODY), mtime=os.stat(p).st_mtime + 10)
+    assert _find([base], fresh)[1] == []
+
+def test_select_extras_keeps_one_per_group(tmp_path, caches):
+    base = str(tmp_path / 'root')
+    _write(base, 'old/copy.bin', BODY, mtime=1000)
+    _write(base, 'new/copy.bin', BODY, mtime=3000)
+    _write(base, 'deeper/x/copy.bin', BODY, mtime=2000)
+    _, groups = _find([base], caches)
+
+    def kept(keep):
+        extras = {fe[0] for fe in select_extras(groups, keep)}
+        assert len(extras) == 2
+        [left] = [fe[0] for fe in groups[0].files if fe[0] not in extras]
+        return os.path.relpath(left, base).replace(os.sep, '/')
+    assert kept(KEEP_OLDEST) == 'old/copy.bin'
+    assert kept(KEEP_NEWEST) == 'new/copy.bin'
+    assert kept(KEEP_SHORTEST) == 'new/copy.bin'
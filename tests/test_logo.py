@@ -0,0 +1,53 @@
+import os
+
+import pytest
+
+pytest.importorskip('tkinter')
+from ui import logo   # noqa: E402
+
+@pytest.fixture
+def renders(monkeypatch):
+    """Troca o PIL por um renderizador que grava a altura no arquivo e conta as chamadas."""
+    calls = []
+
+    def fake(src, targets):
+        calls.append(sorted(targets))
+        for h, out in targets.items():
+            with open(out, 'w') as fh: fh.write(str(h))
+        return True
+    monkeypatch.setattr(logo, '_render_variants', fake)
+    return calls
+
+def _src(tmp_path, data=b'png-1'):
+    p = tmp_path / 'DTO.png'; p.write_bytes(data)
+    return str(p)
+
+def test_variants_are_reused(tmp_path, renders):
+    src, cache = _src(tmp_path), str(tmp_path / 'cache')
+    first = logo.cached_logo_paths((120, 320), src, cache)
+    assert [os.path.basename(p).rsplit('-', 1)[1] for p in first] == ['120.png', '320.png']
+    assert logo.cached_logo_paths((120, 320), src, cache) == first
+    assert renders == [[120, 320]]
+
+def test_changed_source_regenerates_and_prunes(tmp_path, renders):
+    src, cache = _src(tmp_path), str(tmp_path / 'cache')
+    old = logo.cached_logo_paths((120, 320), src, cache)
+    st = os.stat(src)
+    os.utime(src, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert logo.cached_logo_paths((120, 320), src, cache) == old   # só o mtime: mesmo conteúdo, mesmo hash
+    _src(tmp_path, b'png-2')
+    new = logo.cached_logo_paths((120, 320), src, cache)
+    assert new != old and renders == [[120, 320], [120, 320]]
+    assert sorted(os.listdir(cache)) == sorted(os.path.basename(p) for p in new)
+
+def test_new_height_renders_only_missing(tmp_path, renders):
+    src, cache = _src(tmp_path), str(tmp_path / 'cache')
+    logo.cached_logo_paths((120, 320), src, cache)
+    paths = logo.cached_logo_paths((120, 200), src, cache)
+    assert renders == [[120, 320], [200]]
+    assert sorted(os.listdir(cache)) == sorted(os.path.basename(p) for p in paths)
+
+def test_missing_source_or_renderer(tmp_path, monkeypatch):
+    assert logo.cached_logo_paths((120,), str(tmp_path / 'nao.png'), str(tmp_path / 'c')) is None
+    monkeypatch.setattr(logo, '_render_variants', lambda src, targets: False)   # sem PIL
+    assert logo.cached_logo_paths((120,), _src(tmp_path), str(tmp_path / 'c')) is None
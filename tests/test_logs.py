@@ -0,0 +1,44 @@
+import logging, queue
+
+import pytest
+
+from system.logs import AggregatingQueueHandler, aggregate
+
+@pytest.fixture
+def capture():
+    q: queue.Queue = queue.Queue()
+    log = logging.getLogger('tests.aggregate')
+    log.propagate = False; log.setLevel(logging.INFO)
+    handlers = []
+
+    def make(**kw):
+        h = AggregatingQueueHandler(q, **kw); log.addHandler(h); handlers.append(h)
+        return log, h
+    make.messages = lambda: [q.get_nowait().getMessage() for _ in range(q.qsize())]
+    yield make
+    for h in handlers: log.removeHandler(h)
+
+def test_burst_then_summary_on_flush(capture):
+    log, h = capture(window=100, burst=2)
+    for i in range(5): log.warning("falha %d", i, extra=aggregate('del'))
+    h.flush()
+    msgs = capture.messages()
+    assert msgs[:2] == ['falha 0', 'falha 1']
+    assert msgs[2].startswith('del: mais 3 ocorrência(s)') and 'falha 4' in msgs[2]
+
+def test_plain_records_do_not_reset_other_buckets(capture):
+    log, h = capture(window=100, burst=2)
+    for i in range(3): log.warning("a %d", i, extra=aggregate('a'))
+    log.info("sem chave")
+    for i in range(3, 5): log.warning("a %d", i, extra=aggregate('a'))
+    assert capture.messages() == ['a 0', 'a 1', 'sem chave']
+
+def test_each_key_has_its_own_window(capture):
+    log, h = capture(window=100, burst=1, max_dropped=3)
+    log.warning("a", extra=aggregate('a'))
+    for i in range(4): log.warning("b %d", i, extra=aggregate('b'))
+    msgs = capture.messages()
+    assert msgs[:2] == ['a', 'b 0']
+    assert len(msgs) == 3 and msgs[2].startswith('b: mais 3')   # janela de 'b' fechou pela contagem
+    h.flush()
+    assert capture.messages() == []   # 'a' não tinha omitidos
@@ -0,0 +1,35 @@
+import pytest
+
+from system.memory import FakeProcessBackend, MetadataCache, TrimPolicy, select_processes
+
+MB = 1 << 20
+
+@pytest.fixture
+def backend():
+    table = {pid: (f"p{pid}.exe", pid * 10 * MB, 'user') for pid in range(1, 11)}
+    table[11] = ('svc.exe', 500 * MB, 'NT AUTHORITY\\SYSTEM')
+    table[12] = ('dwm.exe', 400 * MB, 'user')
+    return FakeProcessBackend(table, foreground=10)
+
+def _pick(backend, **kw):
+    rows = backend.list_processes()
+    return sorted(r[0] for r in select_processes(rows, TrimPolicy(**kw), backend, MetadataCache()))
+
+def test_union_of_top_n_and_threshold(backend):
+    assert _pick(backend, top_n=2, min_rss=55 * MB) == [6, 7, 8, 9]
+    assert _pick(backend, top_n=6, min_rss=85 * MB) == [4, 5, 6, 7, 8, 9]
+
+def test_single_criterion(backend):
+    assert _pick(backend, top_n=3, min_rss=None) == [7, 8, 9]
+    assert _pick(backend, top_n=None, min_rss=75 * MB) == [8, 9]
+    assert _pick(backend, top_n=None, min_rss=None) == list(range(1, 10))
+
+def test_foreground_system_accounts_and_excluded_names_are_skipped(backend):
+    picked = _pick(backend, top_n=None, min_rss=None)
+    assert 10 not in picked and 11 not in picked and 12 not in picked
+    assert 10 in _pick(backend, top_n=None, min_rss=None, skip_foreground=False)
+
+def test_exclude_adds_to_the_built_in_names(backend):
+    picked = _pick(backend, top_n=None, min_rss=None, exclude={'P3.EXE'})
+    assert 3 not in picked and 12 not in picked   # dwm.exe continua de fora
+    assert 4 in picked
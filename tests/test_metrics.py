@@ -0,0 +1,103 @@
+import json, uuid
+
+import pytest
+
+from system import metrics
+
+class Ev:
+    def __init__(self, files, nbytes, errors=0, cancelled=False):
+        self.result = (files, nbytes); self.errors = errors; self.cancelled = cancelled
+
+def _name():
+    return f"test.{uuid.uuid4().hex[:8]}"
+
+def test_nested_spans_add_to_parent():
+    outer, inner = _name(), _name()
+    with metrics.span(outer) as sp:
+        metrics.add(files=1, bytes=10)
+        with metrics.span(inner):
+            metrics.add(files=2, bytes=20, subprocess=0.5)
+        assert metrics.current_span() is sp
+    assert metrics.current_span() is None
+    o, i = metrics.recorder.last(outer), metrics.recorder.last(inner)
+    assert (o.files, o.bytes, o.subprocess) == (3, 30, 0.5) and (i.files, i.bytes) == (2, 20)
+    assert i.parent is o and o.wall >= i.wall and o.error is None
+
+def test_detached_span_keeps_its_numbers():
+    outer, det = _name(), _name()
+    with metrics.span(outer):
+        sp = metrics.span(det, detached=True)
+        metrics.add(files=1)      # vai para o span da pilha, não para o destacado
+        sp.add(files=5); sp.finish()
+    assert metrics.recorder.last(outer).files == 1
+    d = metrics.recorder.last(det)
+    assert d.files == 5 and d.parent is not None and d.parent.name == outer
+
+def test_span_records_exception():
+    name = _name()
+    with pytest.raises(ValueError):
+        with metrics.span(name): raise ValueError("ruim")
+    sp = metrics.recorder.last(name)
+    assert sp.error == "ruim" and sp.errors == 1 and metrics.current_span() is None
+
+def test_instrument_names_and_records_each_call():
+    @metrics.instrument()
+    def medir(n):
+        metrics.add(files=n); return n * 2
+
+    label = f"{__name__.rsplit('.', 1)[-1]}.medir"
+    before = len(metrics.query(label))
+    assert medir(3) == 6 and medir(4) == 8
+    spans = metrics.query(label)[before:]
+    assert [s.files for s in spans] == [3, 4]
+    assert metrics.summary(label)[label]['files'] >= 7
+
+    name = _name()
+    @metrics.instrument(name)
+    def quebra(): raise RuntimeError("x")
+    with pytest.raises(RuntimeError): quebra()
+    assert metrics.recorder.last(name).errors == 1
+
+def test_spanned_events_uses_last_event():
+    name = _name()
+    events = list(metrics.spanned_events(name, iter([Ev(1, 10), Ev(3, 30, errors=1)]), root='r'))
+    assert len(events) == 2
+    sp = metrics.recorder.last(name)
+    assert (sp.files, sp.bytes, sp.errors) == (3, 30, 1) and sp.error is None
+    assert sp.attrs == {'root': 'r'}
+
+def test_spanned_events_records_error():
+    name = _name()
+
+    def gen():
+        yield Ev(1, 1); raise OSError("disco")
+    with pytest.raises(OSError): list(metrics.spanned_events(name, gen()))
+    assert metrics.recorder.last(name).error == "disco"
+
+def test_spanned_events_early_close_is_cancelled_not_error():
+    name = _name(); closed = []
+
+    def gen():
+        try:
+            for i in range(10): yield Ev(i, i * 10)
+        finally:
+            closed.append(True)
+    it = metrics.spanned_events(name, gen())
+    next(it); next(it)
+    it.close()
+    sp = metrics.recorder.last(name)
+    assert sp.error is None and sp.errors == 0 and sp.attrs.get('cancelled') is True
+    assert (sp.files, sp.bytes) == (1, 10)
+    assert closed == [True]   # o gerador interno foi fechado junto
+
+def test_configure_appends_json_lines(tmp_path):
+    path = tmp_path / 'm' / 'metrics.jsonl'
+    metrics.configure(str(path))
+    try:
+        name = _name()
+        with metrics.span(name, dry_run=True): metrics.add(bytes=7)
+    finally:
+        metrics.configure(None)
+    rec = json.loads(path.read_text(encoding='utf-8').splitlines()[-1])
+    assert rec['name'] == name and rec['bytes'] == 7 and rec['attrs'] == {'dry_run': True}
+    assert rec['run'] == metrics.RUN_ID
@@ -0,0 +1,62 @@
+import threading, time
+
+import pytest
+
+from system.actions import ACTIONS, STATUS_FAILED, STATUS_OK, STATUS_SKIPPED, Action
+from system.jobs import RES_DISK, RES_LIGHT, RES_PROCESS
+from system.pipeline import Pipeline, Profile, Step
+
+@pytest.fixture
+def fake_actions(monkeypatch):
+    """Ações 'fa'..'fd' que registram início/fim; 'fail' devolve falha."""
+    log: list[tuple[str, str]] = []
+    lock = threading.Lock()
+
+    def make(name, delay=0.05, ok=True):
+        def fn(dry_run, cancel):
+            with lock: log.append(('start', name))
+            time.sleep(delay)
+            with lock: log.append(('end', name))
+            return ok, {}
+        return fn
+    for name, res in (('fa', RES_DISK), ('fb', RES_PROCESS), ('fc', RES_LIGHT), ('fd', RES_DISK)):
+        monkeypatch.setitem(ACTIONS, name, Action(name, name, make(name), res, True))
+    monkeypatch.setitem(ACTIONS, 'fail', Action('fail', 'fail', make('fail', ok=False), RES_PROCESS, True))
+    return log
+
+def _status(ev):
+    return {st.name: st.result.status for st in ev.steps}
+
+def test_unknown_and_repeated_actions_are_rejected(fake_actions):
+    with pytest.raises(ValueError): Pipeline(Profile('p', ['fa', 'nope']), rules=[])
+    with pytest.raises(ValueError): Pipeline(Profile('p', ['fa', 'fa']), rules=[])
+
+def test_dependency_outside_profile_is_rejected(fake_actions):
+    with pytest.raises(ValueError): Pipeline(Profile('p', [Step('fa', after=['fb'])]), rules=[])
+
+def test_cycle_is_detected(fake_actions):
+    steps = [Step('fa', after=['fc']), Step('fb', after=['fa']), Step('fc', after=['fb'])]
+    with pytest.raises(ValueError, match='circular'):
+        Pipeline(Profile('p', steps), rules=[])
+
+def test_rules_apply_only_when_both_actions_are_present(fake_actions):
+    pipe = Pipeline(Profile('p', ['fa', 'fb']), rules=[('fb', 'fa', False), ('fc', 'fa', True)])
+    assert pipe.deps['fa'] == {'fb': False}
+
+def test_after_orders_steps(fake_actions):
+    ev = Pipeline(Profile('p', [Step('fa', after=['fb']), 'fb']), rules=[]).run()
+    assert _status(ev) == {'fa': STATUS_OK, 'fb': STATUS_OK}
+    assert fake_actions.index(('end', 'fb')) < fake_actions.index(('start', 'fa'))
+
+def test_independent_steps_on_different_resources_overlap(fake_actions):
+    Pipeline(Profile('p', ['fa', 'fb', 'fc']), rules=[]).run()
+    starts = [i for i, (what, _) in enumerate(fake_actions) if what == 'start']
+    first_end = min(i for i, (what, _) in enumerate(fake_actions) if what == 'end')
+    assert len([i for i in starts if i < first_end]) > 1
+
+def test_failed_hard_dependency_skips_step_but_not_soft_one(fake_actions):
+    steps = ['fail', Step('fa', requires=['fail']), Step('fb', after=['fail'])]
+    ev = Pipeline(Profile('p', steps), rules=[]).run()
+    assert _status(ev) == {'fail': STATUS_FAILED, 'fa': STATUS_SKIPPED, 'fb': STATUS_OK}
+    assert ('start', 'fa') not in fake_actions
+    assert ev.done and not ev.ok and ev.errors == 1
@@ -0,0 +1,34 @@
+import os, time
+
+from conftest import OLD, listing
+from system.plan import CleanupPlan
+from system.progress import drain
+from system.scanner import scan_tree
+
+def test_build_counts_and_cutoff(make_tree):
+    root = make_tree({'a/old.bin': (10, OLD), 'a/new.bin': 20, 'b/old.bin': (30, OLD)})
+    plan = CleanupPlan([root], older_than_days=7).build()
+    assert (plan.count, plan.bytes) == (2, 40)
+    assert plan.roots[root].kept == {os.path.join(root, 'a')}
+
+def test_revalidate_rescans_only_changed_roots(make_tree):
+    r1 = make_tree({'x.bin': 1}, root='r1'); r2 = make_tree({'y.bin': 2}, root='r2')
+    scanned = []
+    def scan(root, cutoff, cancel):
+        scanned.append(root); return scan_tree(root, cutoff, cancel)
+    plan = CleanupPlan([r1, r2], scan=scan).build()
+    assert sorted(scanned) == sorted([r1, r2])
+    scanned.clear()
+    time.sleep(0.01)
+    open(os.path.join(r2, 'z.bin'), 'wb').write(b'zzz')
+    ev = drain(plan.iter_revalidate())
+    assert scanned == [r2]
+    assert ev.result == (3, 6)
+
+def test_execute_keeps_files_changed_since_preview(make_tree):
+    root = make_tree({'a.bin': 10, 'b.bin': 20})
+    plan = CleanupPlan([root]).build()
+    os.utime(os.path.join(root, 'b.bin'), (OLD, OLD))
+    ev = drain(plan.iter_execute(mode='unlink'))
+    assert ev.result == (1, 10) and ev.skipped == 1
+    assert listing(root) == ['b.bin']
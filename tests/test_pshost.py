@@ -0,0 +1,68 @@
+import os, time
+
+import pytest
+
+from system.pshost import PosixShellDialect, ShellHost, ShellSession
+
+pytestmark = pytest.mark.skipif(os.name == 'nt', reason="interpretador substituto em sh")
+
+@pytest.fixture
+def session():
+    s = ShellSession(PosixShellDialect(), 'sh-test')
+    yield s
+    s.close()
+
+@pytest.fixture
+def host():
+    h = ShellHost(PosixShellDialect(), size=2, idle_timeout=None)
+    yield h
+    h.close()
+
+def test_output_and_returncode(session):
+    res = session.run("echo um; echo erro >&2; false")
+    assert res.stdout_lines == ['um'] and res.stderr_lines == ['erro']
+    assert res.returncode == 1 and not res.timed_out and res.error is None
+
+def test_session_is_reused(session):
+    session.run("echo $$ > /dev/null")
+    pid = session.proc.pid
+    assert session.run("true").ok and session.proc.pid == pid and session.requests == 2
+
+def test_output_without_trailing_newline(session):
+    res = session.run('echo nonl | tr -d "\\n"; printf err >&2')
+    assert res.ok and res.stdout_lines == ['nonl'] and res.stderr_lines == ['err']
+    assert session.run("echo ok").stdout_lines == ['ok']
+
+def test_exit_reports_code_and_restarts(session):
+    res = session.run("echo antes; exit 3")
+    assert res.returncode == 3 and res.error is None and res.stdout_lines == ['antes']
+    assert not session.alive
+    res = session.run("echo de novo")
+    assert res.ok and res.stdout_lines == ['de novo'] and session.restarts == 1
+
+def test_timeout_kills_and_next_call_restarts(session):
+    res = session.run("sleep 5", timeout=0.3)
+    assert res.timed_out and not session.alive
+    assert session.run("echo ok").ok and session.restarts == 1
+
+def test_health_check_restarts_dead_sessions(host):
+    assert host.health_check() == [True, True]
+    host.sessions[0].proc.kill(); host.sessions[0].proc.wait()
+    assert host.health_check() == [True, True]
+    assert sum(s.restarts for s in host.sessions) == 1
+
+def test_cold_run_closes_its_process(host):
+    res = host.run("echo frio", cold=True)
+    assert res.ok and res.stdout_lines == ['frio']
+    assert not any(s.alive for s in host.sessions)
+
+def test_idle_sessions_are_shut_down():
+    h = ShellHost(PosixShellDialect(), idle_timeout=0.2)
+    try:
+        assert h.run("true").ok and h.sessions[0].alive
+        deadline = time.monotonic() + 5
+        while h.sessions[0].alive and time.monotonic() < deadline: time.sleep(0.05)
+        assert not h.sessions[0].alive
+        assert h.run("echo volta").stdout_lines == ['volta']
+    finally:
+        h.close()
@@ -0,0 +1,39 @@
+from system.registry import (DISABLED_SUFFIX, HKCU, HKLM, REG_SZ, RUN_KEY, MemoryRegistryBackend,
+                             StartupSnapshot)
+
+def _backend(**kw):
+    return MemoryRegistryBackend({
+        (HKCU, RUN_KEY): {'Chat': ('chat.exe', REG_SZ), 'Sync' + DISABLED_SUFFIX: ('sync.exe', REG_SZ)},
+        (HKLM, RUN_KEY): {'Audio': ('audio.exe', REG_SZ)},
+    }, **kw)
+
+def test_refresh_reads_all_run_keys_and_disabled_suffix():
+    snap = StartupSnapshot(_backend()).refresh()
+    state = {e.name: e.enabled for e in snap.entries}
+    assert state == {'Chat': True, 'Sync': False, 'Audio': True}
+    assert snap.get(f"{HKCU}\\{RUN_KEY}\\Sync").value_name == 'Sync' + DISABLED_SUFFIX
+
+def test_missing_key_is_ignored():
+    backend = MemoryRegistryBackend({(HKCU, RUN_KEY): {'Chat': ('chat.exe', REG_SZ)}})
+    snap = StartupSnapshot(backend).refresh()
+    assert [e.name for e in snap.entries] == ['Chat'] and snap.errors == {}
+
+def test_set_enabled_opens_each_key_once_and_updates_in_place():
+    backend = _backend()
+    snap = StartupSnapshot(backend).refresh()
+    opens = backend.opens
+    changed = snap.set_enabled(snap.entries, False)
+    assert sorted(e.name for e in changed) == ['Audio', 'Chat']   # Sync já estava desabilitado
+    assert backend.opens - opens == 2
+    assert all(not e.enabled for e in snap.entries)
+    assert 'Chat' + DISABLED_SUFFIX in backend.keys[(HKCU, RUN_KEY)]
+    assert {e.name: e.enabled for e in StartupSnapshot(backend).refresh().entries} == \
+        {'Chat': False, 'Sync': False, 'Audio': False}
+
+def test_readonly_key_leaves_entries_unchanged():
+    backend = _backend(readonly={(HKLM, RUN_KEY)})
+    snap = StartupSnapshot(backend).refresh()
+    changed = snap.set_enabled(snap.entries, False)
+    assert [e.name for e in changed] == ['Chat']
+    assert snap.find('Audio')[0].enabled
+    assert 'Audio' in backend.keys[(HKLM, RUN_KEY)]
@@ -0,0 +1,53 @@
+import os, sys, time, threading
+
+import pytest
+
+from system.progress import CancelToken
+from system.runner import run_many, run_streaming
+
+pytestmark = pytest.mark.skipif(os.name == 'nt', reason="scripts substitutos em sh")
+
+def test_streams_lines_from_both_pipes():
+    seen = []
+    res = run_streaming(['sh', '-c', "printf 'a\\rb\\n'; echo err >&2; echo c; exit 3"],
+                        on_line=lambda stream, line: seen.append((stream, line)))
+    assert res.returncode == 3 and not res.ok
+    assert res.stdout_lines == ['a', 'b', 'c'] and res.stderr_lines == ['err']
+    assert [l for s, l in seen if s == 'stdout'] == ['a', 'b', 'c']
+
+def test_start_failure_sets_error():
+    res = run_streaming(['/nao/existe/programa'])
+    assert res.error and res.returncode is None
+
+def test_timeout_returns_partial_output():
+    start = time.monotonic()
+    res = run_streaming(['sh', '-c', 'echo antes; sleep 5'], timeout=0.5)
+    assert time.monotonic() - start < 2
+    assert res.timed_out and not res.cancelled and res.stdout_lines == ['antes']
+
+def test_timeout_kills_grandchild_holding_stdout():
+    # o neto herda o stdout: sem matar a árvore, a espera pelo EOF duraria os 5 s
+    start = time.monotonic()
+    res = run_streaming(['sh', '-c', 'sleep 5 & sleep 5'], timeout=0.5)
+    assert time.monotonic() - start < 2
+    assert res.timed_out
+
+def test_timeout_kills_python_grandchild():
+    script = "import subprocess, sys, time; subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(5)']); time.sleep(5)"
+    start = time.monotonic()
+    res = run_streaming([sys.executable, '-c', script], timeout=0.5)
+    assert time.monotonic() - start < 2 and res.timed_out
+
+def test_cancel_from_other_thread():
+    token = CancelToken()
+    threading.Timer(0.3, token.cancel).start()
+    start = time.monotonic()
+    res = run_streaming(['sh', '-c', 'sleep 5 & sleep 5'], cancel=token)
+    assert time.monotonic() - start < 2
+    assert res.cancelled and not res.timed_out and not res.ok
+
+def test_run_many_keeps_order_and_per_command_timeouts():
+    res = run_many([['sh', '-c', 'sleep 0.2; echo um'], ['sh', '-c', 'sleep 5'], ['sh', '-c', 'echo tres']],
+                   timeouts=[None, 0.3, None])
+    assert [r.stdout for r in res] == ['um', '', 'tres']
+    assert [r.timed_out for r in res] == [False, True, False]
@@ -0,0 +1,98 @@
+import os, time, shutil
+
+from conftest import OLD, listing
+from system.plan import CleanupPlan
+from system.progress import CancelToken
+from system.scan_index import MAGIC, ScanIndex
+
+def test_index_survives_restart_and_relists_only_changed_dirs(make_tree, tmp_path):
+    root = make_tree({'a/1.bin': 1, 'a/b/2.bin': 2, 'c/3.bin': 3})
+    path = str(tmp_path / 'idx.bin')
+    plan = CleanupPlan([root], index=ScanIndex(path)).build()
+    assert (plan.count, plan.bytes) == (3, 6)
+
+    idx = ScanIndex(path)   # "reabertura": carrega do disco
+    assert set(idx.roots[root]) == {'', 'a', os.path.join('a', 'b'), 'c'}
+    records = {rel: list(rec) for rel, rec in idx.roots[root].items()}
+    time.sleep(0.01)
+    open(os.path.join(root, 'a', 'b', '4.bin'), 'wb').write(b'4444')
+    plan = CleanupPlan([root], index=idx).build()
+    assert (plan.count, plan.bytes) == (4, 10)
+    changed = {rel for rel, rec in idx.roots[root].items() if rec != records.get(rel)}
+    assert changed == {os.path.join('a', 'b')}
+
+def test_index_plan_executes_like_a_fresh_scan(make_tree, tmp_path):
+    root = make_tree({'a/old.bin': (10, OLD), 'a/new.bin': 20})
+    path = str(tmp_path / 'idx.bin')
+    CleanupPlan([root], 7, index=ScanIndex(path)).build()
+    plan = CleanupPlan([root], 7, index=ScanIndex(path)).build()
+    assert plan.execute(mode='unlink') == (1, 10)
+    assert listing(root) == ['a/new.bin']
+
+def test_index_cancel_keeps_previous_records(make_tree, tmp_path):
+    root = make_tree({'a/1.bin': 1})
+    idx = ScanIndex(str(tmp_path / 'idx.bin'))
+    idx.scan(root)
+    before = dict(idx.roots[root])
+    token = CancelToken(); token.cancel()
+    entries, _, _ = idx.scan(root, None, token)
+    assert entries == [] and idx.roots[root] == before
+
+def test_index_invalidate_forces_relisting(make_tree, tmp_path):
+    root = make_tree({'a/1.bin': 1})
+    idx = ScanIndex(str(tmp_path / 'idx.bin'))
+    idx.scan(root); idx.invalidate([root])
+    assert root not in idx.roots
+    assert len(idx.scan(root)[0]) == 1
+
+def test_corrupt_index_is_discarded(tmp_path):
+    path = tmp_path / 'idx.bin'
+    path.write_bytes(b'lixo')
+    assert ScanIndex(str(path)).roots == {}
+
+def test_round_trip_keeps_listing(make_tree, tmp_path):
+    root = make_tree({'a/1.bin': 1, 'a/b/2.bin': 2})
+    path = str(tmp_path / 'idx.bin')
+    idx = ScanIndex(path); idx.scan(root); idx.save()
+    assert ScanIndex(path).roots == idx.roots
+    assert open(path, 'rb').read().startswith(MAGIC)
+
+def test_wrong_magic_is_discarded(make_tree, tmp_path):
+    root = make_tree({'a/1.bin': 1})
+    path = tmp_path / 'idx.bin'
+    idx = ScanIndex(str(path)); idx.scan(root); idx.save()
+    path.write_bytes(b'DTIX1\n' + path.read_bytes()[len(MAGIC):])
+    assert ScanIndex(str(path)).roots == {}
+
+def test_truncated_index_is_discarded(make_tree, tmp_path):
+    root = make_tree({'a/1.bin': 1})
+    path = tmp_path / 'idx.bin'
+    idx = ScanIndex(str(path)); idx.scan(root); idx.save()
+    path.write_bytes(path.read_bytes()[:-4])
+    assert ScanIndex(str(path)).roots == {}
+
+def test_changed_dir_mtime_is_not_trusted(make_tree, tmp_path):
+    """Um registro com mtime antigo nunca esconde arquivos novos da limpeza."""
+    root = make_tree({'a/1.bin': 1})
+    path = str(tmp_path / 'idx.bin')
+    idx = ScanIndex(path); idx.scan(root); idx.save()
+    time.sleep(0.01)
+    open(os.path.join(root, 'a', '2.bin'), 'wb').write(b'22')
+    entries, _, _ = ScanIndex(path).scan(root)
+    assert sorted(os.path.basename(fe[0]) for fe in entries) == ['1.bin', '2.bin']
+
+def test_replaced_dir_with_same_mtime_is_relisted(make_tree, tmp_path):
+    root = make_tree({'a/1.bin': 1})
+    idx = ScanIndex(str(tmp_path / 'idx.bin')); idx.scan(root)
+    rec = idx.roots[root]['a']
+    rec[1] += 1   # outro inode: a pasta foi recriada
+    rec[2] = []
+    entries, _, _ = idx.scan(root)
+    assert [os.path.basename(fe[0]) for fe in entries] == ['1.bin']
+
+def test_removed_roots_leave_the_index_on_save(make_tree, tmp_path):
+    root = make_tree({'a/1.bin': 1})
+    path = str(tmp_path / 'idx.bin')
+    idx = ScanIndex(path); idx.scan(root)
+    shutil.rmtree(root); idx.save()
+    assert ScanIndex(path).roots == {}
@@ -0,0 +1,73 @@
+import hashlib, os
+
+import pytest
+
+from system.startup_analysis import HashCache, analyze_command, analyze_commands, parse_command
+
+def test_parse_command_quoted_path():
+    assert parse_command('"C:\\Program Files\\App\\app.exe" --min') == ('C:\\Program Files\\App\\app.exe', '--min')
+
+def test_parse_command_unquoted_path_with_spaces(tmp_path):
+    exe = tmp_path / 'My App' / 'app.exe'
+    exe.parent.mkdir(); exe.write_bytes(b'MZ')
+    assert parse_command(f"{exe} --tray -x") == (str(exe), '--tray -x')
+
+def test_parse_command_without_existing_file_splits_on_first_space():
+    assert parse_command('app.exe /silent') == ('app.exe', '/silent')
+
+def test_parse_command_expands_environment(monkeypatch):
+    monkeypatch.setenv('APPROOT', os.path.join('x', 'y'))
+    exe, args = parse_command('"$APPROOT/run.exe" -a' if os.name != 'nt' else '"%APPROOT%/run.exe" -a')
+    assert exe == os.path.join('x', 'y') + '/run.exe' and args == '-a'
+
+@pytest.mark.parametrize('loader', ['rundll32.exe', 'regsvr32'])
+def test_parse_command_follows_loader_to_dll(loader):
+    exe, args = parse_command(f'{loader} /s "C:\\Libs\\thing.dll",Entry 1')
+    assert exe == 'C:\\Libs\\thing.dll'
+    assert args.startswith('/s')
+
+def _exe(tmp_path, name='app.exe', data=b'MZ-v1'):
+    p = tmp_path / name; p.write_bytes(data)
+    return str(p)
+
+def test_hash_cache_hit_and_invalidation(tmp_path):
+    cache = HashCache(str(tmp_path / 'h.json'))
+    cache.put('C:/app.exe', 10, 1000, 'abc')
+    assert cache.get('C:/app.exe', 10, 1000) == 'abc'
+    assert cache.get('C:/app.exe', 11, 1000) is None    # tamanho mudou
+    assert cache.get('C:/app.exe', 10, 2000) is None    # mtime mudou
+    assert cache.get('C:/outro.exe', 10, 1000) is None
+    assert (cache.hits, cache.misses) == (1, 3)
+
+def test_hash_cache_round_trip_and_corrupt_file(tmp_path):
+    path = str(tmp_path / 'h.json')
+    cache = HashCache(path); cache.put('a', 1, 2, 'd'); cache.save()
+    assert HashCache(path).get('a', 1, 2) == 'd'
+    with open(path, 'w', encoding='utf-8') as fh: fh.write('{quebrado')
+    assert HashCache(path).get('a', 1, 2) is None
+
+def test_analyze_reuses_hash_until_file_changes(tmp_path):
+    exe = _exe(tmp_path)
+    cache = HashCache(str(tmp_path / 'h.json'))
+    first = analyze_command(f'"{exe}" --min', cache)
+    assert first.sha256 == hashlib.sha256(b'MZ-v1').hexdigest() and first.args == '--min'
+    assert analyze_command(f'"{exe}"', cache).sha256 == first.sha256 and cache.hits == 1
+    # conteúdo novo com tamanho e mtime novos: o hash é recalculado
+    with open(exe, 'wb') as fh: fh.write(b'MZ-v2!')
+    st = os.stat(exe); os.utime(exe, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert analyze_command(f'"{exe}"', cache).sha256 == hashlib.sha256(b'MZ-v2!').hexdigest()
+    # mesmo tamanho, só o mtime muda: também recalcula
+    with open(exe, 'wb') as fh: fh.write(b'MZ-v3!')
+    os.utime(exe, ns=(st.st_atime_ns, st.st_mtime_ns + 2 * 10 ** 9))
+    assert analyze_command(f'"{exe}"', cache).sha256 == hashlib.sha256(b'MZ-v3!').hexdigest()
+    assert cache.hits == 1
+
+def test_analyze_commands_saves_cache_and_reports_missing(tmp_path):
+    exe = _exe(tmp_path)
+    path = str(tmp_path / 'h.json')
+    out = analyze_commands({'ok': f'"{exe}"', 'gone': f'"{tmp_path / "nao.exe"}"'}, cache=HashCache(path))
+    assert out['ok'].exists and not out['ok'].missing
+    assert out['gone'].missing and out['gone'].error == "arquivo não encontrado"
+    again = HashCache(path)
+    analyze_commands({'ok': f'"{exe}"'}, cache=again)
+    assert (again.hits, again.misses) == (1, 0)
@@ -0,0 +1,89 @@
+import os, threading, time
+from collections import namedtuple
+
+import pytest
+
+from system import sysinfo
+from system.sysinfo import (KIND_CDROM, KIND_FIXED, KIND_REMOTE, KIND_REMOVABLE, PartitionInfo, iter_system_info,
+                            probe_partitions)
+
+Usage = namedtuple('Usage', 'total used free')
+
+@pytest.fixture
+def disks(monkeypatch):
+    """disk_usage falso: `hang` trava até `release`, `broken` falha; os demais respondem na hora."""
+    state = {'hang': set(), 'broken': set(), 'calls': []}
+    release = threading.Event()
+
+    def fake(path):
+        state['calls'].append(path)
+        if path in state['hang']: release.wait(10)
+        if path in state['broken']: raise OSError(5, "E/S")
+        return Usage(100, 40, 60)
+    monkeypatch.setattr(sysinfo.shutil, 'disk_usage', fake)
+    monkeypatch.setattr(sysinfo, '_stuck', set())
+    sysinfo.clear_cache()
+    state['release'] = release
+    yield state
+    release.set()
+    # threads presas ainda mexem em `_stuck`: espera antes que o próximo teste troque o conjunto
+    deadline = time.monotonic() + 5
+    while sysinfo._stuck and time.monotonic() < deadline: time.sleep(0.01)
+    sysinfo.clear_cache()
+
+def _parts(*specs):
+    return [PartitionInfo(mp, mp, 'fs', kind) for mp, kind in specs]
+
+@pytest.mark.parametrize('opts, fstype, kind', [
+    ('rw,fixed', 'NTFS', KIND_FIXED), ('cdrom', 'CDFS', KIND_CDROM), ('rw,removable', 'FAT32', KIND_REMOVABLE),
+    ('remote', 'NTFS', KIND_REMOTE), ('rw', 'nfs4', KIND_REMOTE), ('rw', 'ext4', KIND_FIXED),
+])
+def test_kind(opts, fstype, kind):
+    assert sysinfo._kind(opts, fstype) == kind
+
+def test_probe_times_out_without_waiting_for_stuck_drive(disks):
+    disks['hang'].add('Z:'); disks['broken'].add('E:')
+    parts = _parts(('C:', KIND_FIXED), ('E:', KIND_FIXED), ('Z:', KIND_REMOTE))
+    start = time.monotonic()
+    probe_partitions(parts, timeout=0.3)
+    assert time.monotonic() - start < 2
+    c, e, z = parts
+    assert c.ok and (c.total, c.free) == (100, 60)
+    assert e.error == "E/S" and not e.timed_out
+    assert z.timed_out and not z.ok
+
+def test_stuck_drive_is_not_probed_again_until_it_answers(disks):
+    disks['hang'].add('Z:')
+    probe_partitions(_parts(('Z:', KIND_REMOTE)), timeout=0.2)
+    again = _parts(('Z:', KIND_REMOTE))
+    probe_partitions(again, timeout=0.2)
+    assert again[0].timed_out and disks['calls'].count('Z:') == 1
+    disks['release'].set()
+    deadline = time.monotonic() + 5
+    while sysinfo._stuck and time.monotonic() < deadline: time.sleep(0.01)
+    later = _parts(('Z:', KIND_REMOTE))
+    probe_partitions(later, timeout=1)
+    assert later[0].ok and disks['calls'].count('Z:') == 2
+
+def test_slow_partitions_arrive_in_second_event_and_result_is_cached(disks, monkeypatch):
+    disks['hang'].add('N:')
+    monkeypatch.setattr(sysinfo, 'list_partitions', lambda: _parts(
+        ('C:', KIND_FIXED), ('D:', KIND_CDROM), ('N:', KIND_REMOTE), ('U:', KIND_REMOVABLE)))
+    events = list(iter_system_info(max_age=60, timeout=0.5, slow_timeout=0.3))
+    assert [ev.done for ev in events] == [False, True]
+    assert [p.device for p in events[0].partitions] == ['C:']
+    by = {p.device: p for p in events[1].partitions}
+    assert sorted(by) == ['C:', 'N:', 'U:']   # leitor de CD fica de fora
+    assert by['C:'].ok and by['U:'].ok and by['N:'].timed_out
+    cached = list(iter_system_info(max_age=60))
+    assert len(cached) == 1 and cached[0].done and cached[0] is not events[1]
+    assert [p.device for p in cached[0].partitions] == ['C:', 'N:', 'U:']
+    assert len(list(iter_system_info(max_age=0))) == 2   # cache vencido: coleta de novo
+
+def test_fallback_without_psutil(disks, monkeypatch):
+    monkeypatch.setattr(sysinfo, 'HAS_PSUTIL', False)
+    assert sysinfo.list_partitions() == []
+    [info] = list(iter_system_info(max_age=0))
+    assert info.done and info.partitions == [] and info.ram_total == 0
+    assert info.cpu_count == (os.cpu_count() or 0)
+    info.log()   # sem RAM/CPU/partições não quebra
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from system import targets
+from system.targets import KIND_DIR, KIND_FILE, register_target, resolve_targets
+
+TREE = {
+    'Google/Chrome/User Data/Default/Cache/Cache_Data/f_1': 1,
+    'Google/Chrome/User Data/Profile 1/Cache/Cache_Data/f_2': 1,
+    'Google/Chrome/User Data/PROFILE 2/Code Cache/js/f_3': 1,
+    'Google/Chrome/User Data/System Profile/Cache/x': 1,
+    'Microsoft/Edge/User Data/Default/Cache/y': 1,
+    'Microsoft/Windows/Explorer/thumbcache_32.db': 1,
+    'Microsoft/Windows/Explorer/THUMBCACHE_256.DB': 1,
+    'Microsoft/Windows/Explorer/iconcache_16.db': 1,
+    'Microsoft/Windows/Explorer/thumbcache_dir.db/z': 1,
+}
+
+@pytest.fixture
+def base(make_tree, monkeypatch):
+    root = make_tree(TREE)
+    monkeypatch.setenv('DTTEST_BASE', root)
+    monkeypatch.setattr(targets, '_REGISTRY', {})
+    monkeypatch.setattr(targets, '_cache', None)
+    return root
+
+def _rel(base, paths):
+    return sorted(os.path.relpath(p, base).replace(os.sep, '/') for p in paths)
+
+@pytest.mark.parametrize('patterns, kind, expected', [
+    # literal até o fim
+    (['%DTTEST_BASE%/Google/Chrome/User Data/Default/Cache'], KIND_DIR,
+     ['Google/Chrome/User Data/Default/Cache']),
+    # curinga num segmento; maiúsculas não importam
+    (['%DTTEST_BASE%/Google/Chrome/User Data/profile*/Cache'], KIND_DIR,
+     ['Google/Chrome/User Data/Profile 1/Cache']),
+    (['%DTTEST_BASE%/Google/Chrome/User Data/profile*/*cache'], KIND_DIR,
+     ['Google/Chrome/User Data/PROFILE 2/Code Cache', 'Google/Chrome/User Data/Profile 1/Cache']),
+    # `**` é um curinga de um segmento só (fnmatch), não recursivo
+    (['%DTTEST_BASE%/**/Chrome'], KIND_DIR, ['Google/Chrome']),
+    (['%DTTEST_BASE%/Google/**/Cache'], KIND_DIR, []),
+    (['%DTTEST_BASE%/*/*/User Data/*/Cache'], KIND_DIR,
+     ['Google/Chrome/User Data/Default/Cache', 'Google/Chrome/User Data/Profile 1/Cache',
+      'Google/Chrome/User Data/System Profile/Cache', 'Microsoft/Edge/User Data/Default/Cache']),
+    # arquivos: pastas com o mesmo nome ficam de fora
+    (['%DTTEST_BASE%/Microsoft/Windows/Explorer/thumbcache_*.db'], KIND_FILE,
+     ['Microsoft/Windows/Explorer/THUMBCACHE_256.DB', 'Microsoft/Windows/Explorer/thumbcache_32.db']),
+    # estilo Windows: barras invertidas
+    (['%DTTEST_BASE%\\Microsoft\\Windows\\Explorer\\iconcache_*.db'], KIND_FILE,
+     ['Microsoft/Windows/Explorer/iconcache_16.db']),
+    # variável ausente ou padrão sem segmentos não resolvem nada
+    (['%DTTEST_NAO_EXISTE%/Google'], KIND_DIR, []),
+    (['%DTTEST_BASE%'], KIND_DIR, []),
+])
+def test_resolve_single_target(base, patterns, kind, expected):
+    register_target('t', 'g', *patterns, kind=kind)
+    assert _rel(base, resolve_targets().paths['t']) == expected
+
+def test_overlapping_patterns_resolve_independently(base):
+    register_target('chrome', 'browser', '%DTTEST_BASE%/Google/Chrome/User Data/*/Cache')
+    register_target('chrome-default', 'browser', '%DTTEST_BASE%/Google/Chrome/User Data/Default/Cache')
+    register_target('chrome-data', 'browser', '%DTTEST_BASE%/Google/Chrome/User Data/*/Cache/Cache_Data')
+    register_target('thumbs', 'thumbs', '%DTTEST_BASE%/Microsoft/Windows/Explorer/thumbcache_*.db',
+                    '%DTTEST_BASE%/Microsoft/Windows/Explorer/THUMBCACHE_*', kind=KIND_FILE)
+    res = resolve_targets()
+    assert _rel(base, res.paths['chrome-default']) == ['Google/Chrome/User Data/Default/Cache']
+    assert len(res.paths['chrome']) == 3 and set(res.paths['chrome-default']) <= set(res.paths['chrome'])
+    assert _rel(base, res.paths['chrome-data']) == ['Google/Chrome/User Data/Default/Cache/Cache_Data',
+                                                     'Google/Chrome/User Data/Profile 1/Cache/Cache_Data']
+    # dois padrões do mesmo alvo que casam os mesmos arquivos não os repetem
+    assert len(res.paths['thumbs']) == 2
+    assert sorted(res.group('browser')) == sorted(res.paths['chrome'] + res.paths['chrome-default']
+                                                  + res.paths['chrome-data'])
+    assert set(res.timings) == {'chrome', 'chrome-default', 'chrome-data', 'thumbs'}
+
+def test_cache_is_reused_until_a_target_is_registered(base):
+    register_target('a', 'g', '%DTTEST_BASE%/Google')
+    first = resolve_targets(max_age=60)
+    assert resolve_targets(max_age=60) is first
+    assert resolve_targets() is not first
+    register_target('b', 'g', '%DTTEST_BASE%/Microsoft')
+    assert 'b' in resolve_targets(max_age=60).paths
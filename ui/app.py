@@ -6,36 +6,60 @@ if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
 
-import os, time, logging, tkinter as tk
-from tkinter import ttk, messagebox
+import os, time, logging, importlib, tkinter as tk
+from tkinter import ttk, messagebox, filedialog
 from datetime import datetime
 
 from system.os_utils import is_admin, relaunch_as_admin, human_size, disable_maximize_button
-from system.restore import create_restore_point
-from system.recycle_bin import empty_recycle_bin
-from system.defrag import optimize_drives
-from system.caches import clear_thumbnail_cache, clear_all_browser_caches
-from system.startup import list_startup_entries, disable_startup_entry, enable_startup_entry
-from system.power import set_power_plan_high_performance, set_power_plan_balanced
-from system.appearance import set_visual_effects_best_performance, revert_performance_tweaks
-from system.memory import optimize_memory_ram
-from system.drivers import scan_driver_updates
+from system.jobs import RES_DISK, RES_PROCESS, RES_LIGHT, RES_PIPELINE
+from system.progress import CancelToken, drain
 
 from ui.styles import init_styles, LIGHT_BG, CARD_BG, TEXT_MUTE
 from ui.logo import load_logo_images
-
-# psutil opcional (apenas informações)
-try:
-    import psutil  # type: ignore
-    HAS_PSUTIL = True
-except Exception:
-    HAS_PSUTIL = False
+from ui.jobs import TkJobExecutor
+from ui.timing import StartupTimer
+
+def _lazy(target: str):
+    """'modulo:funcao' -> função que importa o módulo só na primeira chamada (em geral já na thread do job)."""
+    mod, _, attr = target.partition(':')
+    def call(*args, **kwargs):
+        return getattr(importlib.import_module(mod), attr)(*args, **kwargs)
+    call.__name__ = attr
+    return call
+
+create_restore_point = _lazy('system.restore:create_restore_point')
+empty_recycle_bin = _lazy('system.recycle_bin:empty_recycle_bin')
+optimize_drives = _lazy('system.defrag:optimize_drives')
+list_volumes = _lazy('system.defrag:list_volumes')
+DefragRun = _lazy('system.defrag:DefragRun')
+state_text = _lazy('system.defrag:state_text')
+list_profiles = _lazy('system.pipeline:list_profiles')
+Pipeline = _lazy('system.pipeline:Pipeline')
+iter_system_info = _lazy('system.sysinfo:iter_system_info')
+iter_clear_thumbnail_cache = _lazy('system.caches:iter_clear_thumbnail_cache')
+enumerate_browser_cache_paths = _lazy('system.caches:enumerate_browser_cache_paths')
+plan_browser_caches = _lazy('system.caches:plan_browser_caches')
+plan_thumbnail_cache = _lazy('system.caches:plan_thumbnail_cache')
+ByteBudget = _lazy('system.budget:ByteBudget')
+iter_disk_usage = _lazy('system.disk_usage:iter_disk_usage')
+iter_find_duplicates = _lazy('system.duplicates:iter_find_duplicates')
+iter_delete_duplicates = _lazy('system.duplicates:iter_delete_duplicates')
+select_extras = _lazy('system.duplicates:select_extras')
+load_startup_snapshot = _lazy('system.startup:load_startup_snapshot')
+iter_analyze = _lazy('system.startup_analysis:iter_analyze')
+set_power_plan_high_performance = _lazy('system.power:set_power_plan_high_performance')
+set_power_plan_balanced = _lazy('system.power:set_power_plan_balanced')
+set_visual_effects_best_performance = _lazy('system.appearance:set_visual_effects_best_performance')
+revert_performance_tweaks = _lazy('system.appearance:revert_performance_tweaks')
+trim_memory = _lazy('system.memory:trim_memory')
+scan_driver_updates = _lazy('system.drivers:scan_driver_updates')
 
 class WinOptimizerApp(tk.Tk):
-    def __init__(self, app_name: str, log_path: str):
+    def __init__(self, app_name: str, log_path: str, timer: StartupTimer | None = None):
         super().__init__()
         self.app_name = app_name
         self.log_path = log_path
+        self.timer = timer or StartupTimer()
 
         self.title(app_name)
         # Janela padrão, não maximizada
@@ -49,6 +73,11 @@ class WinOptimizerApp(tk.Tk):
         # Estilos/cores
         init_styles(self)
 
+        # Ações rodam fora da thread do Tk
+        self.jobs = TkJobExecutor(self)
+        self.protocol('WM_DELETE_WINDOW', self._on_close)
+        self._defrag_win: tk.Toplevel | None = None   # janela de "Otimizar unidades" (uma só)
+
         # Logo
         self.logo_small, self.logo_large = load_logo_images()
         if self.logo_small: self.iconphoto(True, self.logo_small)
@@ -58,41 +87,65 @@ class WinOptimizerApp(tk.Tk):
         if self.logo_small:
             ttk.Label(header, image=self.logo_small, style="Header.TLabel").pack(side='left', padx=(16, 12), pady=8)
         ttk.Label(header, text="DISDAL TECH – Otimizador", style="HeaderTitle.TLabel").pack(side='left', pady=8)
-        self.admin_badge = ttk.Label(header, style="HeaderBadge.TLabel"); self._update_admin_badge()
+        self.admin_badge = ttk.Label(header, style="HeaderBadge.TLabel")  # preenchido após o 1º quadro
         self.admin_badge.pack(side='left', padx=12)
-        if not is_admin():
-            ttk.Button(header, text="Executar como Administrador", command=relaunch_as_admin, style="Accent.TButton").pack(side='right', padx=16, pady=12)
+        self._header = header
 
-        # Body / Abas
+        # Body / Abas — cada aba é montada na primeira vez que é selecionada
         body = ttk.Frame(self, style="App.TFrame"); body.pack(fill='both', expand=True)
         nb = ttk.Notebook(body, style="Big.TNotebook"); nb.pack(fill='both', expand=True, padx=16, pady=16)
+        self.nb = nb
 
         self.tab_main = ttk.Frame(nb, style="App.TFrame"); nb.add(self.tab_main, text='🧰  Geral')
         self.tab_cache = ttk.Frame(nb, style="App.TFrame"); nb.add(self.tab_cache, text='🧹  Caches')
         self.tab_start = ttk.Frame(nb, style="App.TFrame"); nb.add(self.tab_start, text='🔧  Inicialização')
         self.tab_power = ttk.Frame(nb, style="App.TFrame"); nb.add(self.tab_power, text='🚀  Energia & Aparência')
-
-        self._build_tab_main()
-        self._build_tab_cache()
-        self._build_tab_start()
-        self._build_tab_power()
+        self.tab_disk = ttk.Frame(nb, style="App.TFrame"); nb.add(self.tab_disk, text='💽  Disco')
+        self.tab_dups = ttk.Frame(nb, style="App.TFrame"); nb.add(self.tab_dups, text='🗂  Duplicados')
+        self.tab_sys = ttk.Frame(nb, style="App.TFrame"); nb.add(self.tab_sys, text='🖥  Sistema')
+        self._tab_builders = {str(self.tab_main): self._build_tab_main, str(self.tab_cache): self._build_tab_cache,
+                              str(self.tab_start): self._build_tab_start, str(self.tab_power): self._build_tab_power,
+                              str(self.tab_disk): self._build_tab_disk, str(self.tab_dups): self._build_tab_dups,
+                              str(self.tab_sys): self._build_tab_sys}
+        self._sysinfo = None; self.sys_parts = None   # coletado após o 1º quadro; a aba só exibe
+        nb.bind('<<NotebookTabChanged>>', self._on_tab_changed)
+        self._on_tab_changed()
 
         # Footer
         footer = ttk.Frame(self, style="Footer.TFrame"); footer.pack(fill='x')
         ttk.Label(footer, text=f"🧾 Log: {log_path}", style="Footer.TLabel").pack(side='left', padx=16, pady=8)
+        self.timing_label = ttk.Label(footer, text='', style="Footer.TLabel")
+        self.timing_label.pack(side='right', padx=16, pady=8)
 
-        # Info inicial
-        self.show_system_info()
-
-        # Bloquear maximizar
-        self.after(0, lambda: disable_maximize_button(self))
+        self.timer.mark('ui_build')
+        # o que não é essencial para o primeiro quadro fica para depois dele
+        self.after_idle(self._after_first_paint)
 
     # ===== util ui =====
+    def _on_tab_changed(self, _event=None):
+        builder = self._tab_builders.pop(self.nb.select(), None)
+        if builder is not None:
+            start = time.perf_counter()
+            builder()
+            logging.debug("Aba %s montada em %.1f ms.", builder.__name__, (time.perf_counter() - start) * 1000)
+
+    def _after_first_paint(self):
+        self.update_idletasks()
+        self.timer.mark('first_paint')
+        self.timer.log()
+        self.timing_label.configure(text=f"⏱ Abertura: {self.timer.report()['total_ms']:.0f} ms")
+        disable_maximize_button(self)
+        self._update_admin_badge()
+        self.jobs.submit(self.show_system_info, resource=RES_LIGHT)
+
     def _update_admin_badge(self):
         if is_admin():
             self.admin_badge.configure(text="🟢 Administrador")
         else:
             self.admin_badge.configure(text="🟡 Permissões padrão")
+            if not getattr(self, '_admin_btn', None):
+                self._admin_btn = ttk.Button(self._header, text="Executar como Administrador", command=relaunch_as_admin, style="Accent.TButton")
+                self._admin_btn.pack(side='right', padx=16, pady=12)
 
     def _grid_two_cols(self, frame):
         frame.columnconfigure(0, weight=1, uniform="cols")
@@ -101,6 +154,19 @@ class WinOptimizerApp(tk.Tk):
     def _btn(self, parent, text, cmd, style="Primary.TButton"):
         return ttk.Button(parent, text=text, command=cmd, style=style)
 
+    def _job_btn(self, parent, text, action, style="Primary.TButton"):
+        """Botão cujo `action(btn)` recebe o próprio botão (desabilitado durante o trabalho)."""
+        b = ttk.Button(parent, text=text, style=style)
+        b.configure(command=lambda: action(b))
+        return b
+
+    def _run(self, btn, fn, *args, resource=RES_LIGHT, on_done=None, **kwargs):
+        return self.jobs.submit(fn, *args, resource=resource, widgets=(btn,), on_done=on_done, **kwargs)
+
+    def _on_close(self):
+        self.jobs.shutdown()
+        self.destroy()
+
     # ===== abas =====
     def _build_tab_main(self):
         f = self.tab_main
@@ -109,28 +175,54 @@ class WinOptimizerApp(tk.Tk):
         g.pack(fill='x', padx=12, pady=12)
         self._grid_two_cols(g)
 
-        self._btn(g, '🛡️  Criar ponto de restauração',
-                  lambda: create_restore_point(f"WinOptimizer {datetime.now().strftime('%Y-%m-%d %H:%M')}")).grid(row=0, column=0, padx=8, pady=8, sticky="ew")
-        self._btn(g, '🗑️  Esvaziar Lixeira', empty_recycle_bin).grid(row=0, column=1, padx=8, pady=8, sticky="ew")
+        self._job_btn(g, '🛡️  Criar ponto de restauração', self._action_restore_point).grid(row=0, column=0, padx=8, pady=8, sticky="ew")
+        self._job_btn(g, '🗑️  Esvaziar Lixeira',
+                      lambda b: self._run(b, empty_recycle_bin, resource=RES_DISK)).grid(row=0, column=1, padx=8, pady=8, sticky="ew")
 
-        self._btn(g, '⚡  Otimizar unidades (defrag/TRIM)', self._action_optimize_drives).grid(row=1, column=0, padx=8, pady=8, sticky="ew")
-        self._btn(g, '🧠  Otimizar memória RAM', self._action_optimize_ram, style="Secondary.TButton").grid(row=1, column=1, padx=8, pady=8, sticky="ew")
+        self._job_btn(g, '⚡  Otimizar unidades (defrag/TRIM)', self._action_optimize_drives).grid(row=1, column=0, padx=8, pady=8, sticky="ew")
+        self._job_btn(g, '🧠  Otimizar memória RAM', self._action_optimize_ram, style="Secondary.TButton").grid(row=1, column=1, padx=8, pady=8, sticky="ew")
 
-        self._btn(g, '🖼️  Miniaturas (pré-visualizar)', lambda: self._thumbs_action(True), style="Secondary.TButton").grid(row=2, column=0, padx=8, pady=8, sticky="ew")
-        self._btn(g, '🧹  Miniaturas (executar)', lambda: self._thumbs_action(False)).grid(row=2, column=1, padx=8, pady=8, sticky="ew")
+        self._job_btn(g, '🖼️  Miniaturas (pré-visualizar)', lambda b: self._thumbs_action(True, b), style="Secondary.TButton").grid(row=2, column=0, padx=8, pady=8, sticky="ew")
+        self._job_btn(g, '🧹  Miniaturas (executar)', lambda b: self._thumbs_action(False, b)).grid(row=2, column=1, padx=8, pady=8, sticky="ew")
 
         h = ttk.LabelFrame(f, text='Atualizações de Driver', style="Card.TLabelframe")
         h.pack(fill='x', padx=12, pady=12); self._grid_two_cols(h)
-        self._btn(h, '🔎  Buscar atualização de drivers (Windows Update)', scan_driver_updates)\
+        self._job_btn(h, '🔎  Buscar atualização de drivers (Windows Update)',
+                      lambda b: self._run(b, scan_driver_updates, resource=RES_PROCESS))\
             .grid(row=0, column=0, padx=8, pady=8, sticky="ew")
         ttk.Label(h, text="Dica: para drivers OEM (placa-mãe, vídeo, etc.), use o app do fabricante.",
                   background=CARD_BG, foreground=TEXT_MUTE)\
             .grid(row=0, column=1, padx=8, pady=8, sticky="w")
 
+        m = ttk.LabelFrame(f, text='Manutenção em etapas', style="Card.TLabelframe")
+        m.pack(fill='x', padx=12, pady=12)
+        top = ttk.Frame(m, style="App.TFrame"); top.pack(fill='x', padx=8, pady=(8, 4))
+        self.pipe_profile = tk.StringVar()
+        self.pipe_combo = ttk.Combobox(top, textvariable=self.pipe_profile, state='readonly', width=48)
+        self.pipe_combo.pack(side='left')
+        self._job_btn(top, '▶  Executar', lambda b: self._pipe_run(False, b)).pack(side='left', padx=(8, 0))
+        self._job_btn(top, '🔎  Simular', lambda b: self._pipe_run(True, b), style="Secondary.TButton").pack(side='left', padx=6)
+        self.pipe_cancel_btn = ttk.Button(top, text='⏹  Cancelar', command=self._pipe_cancel, style="Danger.TButton")
+        self.pipe_cancel_btn.pack(side='left'); self.pipe_cancel_btn.state(['disabled'])
+        self.pipe_tree = ttk.Treeview(m, columns=('estado', 'duracao', 'detalhe'), height=4)
+        self.pipe_tree.heading('#0', text='Etapa'); self.pipe_tree.column('#0', width=260)
+        self.pipe_tree.heading('estado', text='Estado'); self.pipe_tree.column('estado', width=90, stretch=False)
+        self.pipe_tree.heading('duracao', text='Duração'); self.pipe_tree.column('duracao', width=80, anchor='e', stretch=False)
+        self.pipe_tree.heading('detalhe', text='Detalhe'); self.pipe_tree.column('detalhe', width=260)
+        self.pipe_tree.pack(fill='x', padx=8, pady=(0, 8))
+        self._pipe_profiles = {}; self._pipe_cancel_token: CancelToken | None = None
+
+        def loaded(job):
+            self._pipe_profiles = {f"{p.title} [{p.name}]": p for p in job.result.values()}
+            self.pipe_combo.configure(values=list(self._pipe_profiles))
+            if self._pipe_profiles: self.pipe_combo.current(0)
+        self.jobs.submit(list_profiles, resource=RES_LIGHT, on_done=loaded)
+
         d = ttk.LabelFrame(f, text='Desfazer', style="Card.TLabelframe")
         d.pack(fill='x', padx=12, pady=12)
         self._grid_two_cols(d)
-        self._btn(d, '↩️  Balanceado + Melhor aparência', revert_performance_tweaks, style="Danger.TButton")\
+        self._job_btn(d, '↩️  Balanceado + Melhor aparência',
+                      lambda b: self._run(b, revert_performance_tweaks, resource=RES_PROCESS), style="Danger.TButton")\
             .grid(row=0, column=0, columnspan=2, padx=8, pady=8, sticky="ew")
 
     def _build_tab_cache(self):
@@ -144,30 +236,69 @@ class WinOptimizerApp(tk.Tk):
 
         btns = ttk.Frame(box, style="App.TFrame"); btns.pack(fill='x', padx=10, pady=(0,10))
         btns.columnconfigure(0, weight=1)
-        ttk.Button(btns, text='🔍  Pré-visualizar (todos os navegadores)',
-                   command=lambda: self._browser_cache_action(True),
-                   style="Secondary.TButton").grid(row=0, column=1, padx=6, sticky="e")
-        ttk.Button(btns, text='🧽  Limpar agora',
-                   command=lambda: self._browser_cache_action(False),
-                   style="Primary.TButton").grid(row=0, column=2, padx=6, sticky="e")
+        self._job_btn(btns, '🔍  Pré-visualizar (todos os navegadores)',
+                      lambda b: self._browser_cache_action(True, b),
+                      style="Secondary.TButton").grid(row=0, column=1, padx=6, sticky="e")
+        self._job_btn(btns, '🧽  Limpar agora',
+                      lambda b: self._browser_cache_action(False, b),
+                      style="Primary.TButton").grid(row=0, column=2, padx=6, sticky="e")
+        self.cache_cancel_btn = ttk.Button(btns, text='⏹  Cancelar', command=self._cancel_cache_action,
+                                           style="Danger.TButton")
+        self.cache_cancel_btn.grid(row=0, column=3, padx=6, sticky="e")
+        self.cache_cancel_btn.state(['disabled'])
+        self.cache_full_scan = tk.BooleanVar(value=False)
+        ttk.Checkbutton(btns, text='Varredura completa (descartar pré-visualização e índice)',
+                        variable=self.cache_full_scan).grid(row=0, column=0, padx=6, sticky="w")
+
+        # modo orçamento: remove só os arquivos usados há mais tempo até caber no teto
+        budget = ttk.Frame(box, style="App.TFrame"); budget.pack(fill='x', padx=10, pady=(0, 8))
+        self.cache_budget_on = tk.BooleanVar(value=False)
+        self.cache_budget_mb = tk.IntVar(value=256)
+        self.cache_budget_scope = tk.StringVar(value='por navegador')
+        ttk.Checkbutton(budget, text='Manter até', variable=self.cache_budget_on).pack(side='left')
+        ttk.Spinbox(budget, from_=16, to=16384, increment=64, width=7,
+                    textvariable=self.cache_budget_mb).pack(side='left', padx=4)
+        ttk.Label(budget, text='MB', background=CARD_BG).pack(side='left')
+        ttk.Combobox(budget, values=('por navegador', 'por pasta'), state='readonly', width=14,
+                     textvariable=self.cache_budget_scope).pack(side='left', padx=6)
+        ttk.Label(budget, text='(apaga primeiro o que não é usado há mais tempo)', background=CARD_BG,
+                  foreground=TEXT_MUTE).pack(side='left', padx=6)
+
+        self.cache_progress = ttk.Progressbar(box, mode='indeterminate')
+        self.cache_progress.pack(fill='x', padx=10, pady=(0, 4))
+        self.cache_status = ttk.Label(box, text='', background=CARD_BG, foreground=TEXT_MUTE)
+        self.cache_status.pack(anchor='w', padx=10, pady=(0, 10))
+        self._cache_cancel: CancelToken | None = None
+        self._cache_plan = None   # plano da última pré-visualização (reusado por "Limpar agora")
+        self._thumbs_plan = None
 
     def _build_tab_start(self):
         f = self.tab_start
         top = ttk.Frame(f, style="App.TFrame"); top.pack(fill='x', padx=12, pady=10)
-        ttk.Button(top, text='🔄 Atualizar lista', command=self.refresh_startup, style="Secondary.TButton").pack(side='left')
-        ttk.Button(top, text='🚫 Desabilitar selecionado', command=self.disable_selected, style="Danger.TButton").pack(side='left', padx=6)
-        ttk.Button(top, text='✅ Habilitar selecionado', command=self.enable_selected, style="Primary.TButton").pack(side='left', padx=6)
-
-        cols = ('local', 'nome', 'comando')
-        self.tree = ttk.Treeview(f, columns=cols, show='headings', height=12)
+        self.start_refresh_btn = ttk.Button(top, text='🔄 Atualizar lista', command=self.refresh_startup, style="Secondary.TButton")
+        self.start_refresh_btn.pack(side='left')
+        self.start_disable_btn = ttk.Button(top, text='🚫 Desabilitar selecionados', command=self.disable_selected, style="Danger.TButton")
+        self.start_disable_btn.pack(side='left', padx=6)
+        self.start_enable_btn = ttk.Button(top, text='✅ Habilitar selecionados', command=self.enable_selected, style="Primary.TButton")
+        self.start_enable_btn.pack(side='left', padx=6)
+
+        cols = ('local', 'nome', 'estado', 'comando', 'alvo', 'tamanho', 'modificado', 'sha256')
+        self.tree = ttk.Treeview(f, columns=cols, show='headings', height=12, selectmode='extended')
         self.tree.heading('local', text='Local'); self.tree.column('local', width=260, stretch=False)
         self.tree.heading('nome', text='Nome'); self.tree.column('nome', width=200, stretch=False)
-        self.tree.heading('comando', text='Comando'); self.tree.column('comando', width=560, stretch=True)
+        self.tree.heading('estado', text='Estado'); self.tree.column('estado', width=100, stretch=False)
+        self.tree.heading('comando', text='Comando'); self.tree.column('comando', width=360, stretch=True)
+        self.tree.heading('alvo', text='Executável'); self.tree.column('alvo', width=260, stretch=True)
+        self.tree.heading('tamanho', text='Tamanho'); self.tree.column('tamanho', width=80, stretch=False, anchor='e')
+        self.tree.heading('modificado', text='Modificado'); self.tree.column('modificado', width=120, stretch=False)
+        self.tree.heading('sha256', text='SHA-256'); self.tree.column('sha256', width=120, stretch=False)
         self.tree.pack(fill='both', expand=True, padx=12, pady=(0,12))
 
         vsb = ttk.Scrollbar(f, orient="vertical", command=self.tree.yview)
         vsb.place(in_=self.tree, relx=1.0, rely=0, relheight=1.0, x=-1)
         self.tree.configure(yscrollcommand=vsb.set)
+        self._startup_snap = None
+        self._startup_info = {}   # chave da entrada -> TargetInfo (preenchido aos poucos)
 
     def _build_tab_power(self):
         f = self.tab_power
@@ -176,17 +307,17 @@ class WinOptimizerApp(tk.Tk):
         g1.pack(fill='x', padx=12, pady=12)
         self._grid_two_cols(g1)
 
-        ttk.Button(
+        self._job_btn(
             g1,
-            text="💪  Ativar: Alto desempenho",
-            command=set_power_plan_high_performance,
+            "💪  Ativar: Alto desempenho",
+            lambda b: self._run(b, set_power_plan_high_performance, resource=RES_PROCESS),
             style="Primary.TButton"
         ).grid(row=0, column=0, padx=8, pady=8, sticky="ew")
 
-        ttk.Button(
+        self._job_btn(
             g1,
-            text="🧘  Ativar: Balanceado",
-            command=set_power_plan_balanced,
+            "🧘  Ativar: Balanceado",
+            lambda b: self._run(b, set_power_plan_balanced, resource=RES_PROCESS),
             style="Secondary.TButton"
         ).grid(row=0, column=1, padx=8, pady=8, sticky="ew")
 
@@ -194,99 +325,561 @@ class WinOptimizerApp(tk.Tk):
         g2.pack(fill='x', padx=12, pady=12)
         self._grid_two_cols(g2)
 
-        ttk.Button(
+        self._job_btn(
             g2,
-            text="🚀  Melhor desempenho",
-            command=lambda: set_visual_effects_best_performance(True),
+            "🚀  Melhor desempenho",
+            lambda b: self._run(b, set_visual_effects_best_performance, True, resource=RES_PROCESS),
             style="Primary.TButton"
         ).grid(row=0, column=0, padx=8, pady=8, sticky="ew")
 
-        ttk.Button(
+        self._job_btn(
             g2,
-            text="✨  Melhor aparência",
-            command=lambda: set_visual_effects_best_performance(False),
+            "✨  Melhor aparência",
+            lambda b: self._run(b, set_visual_effects_best_performance, False, resource=RES_PROCESS),
             style="Secondary.TButton"
         ).grid(row=0, column=1, padx=8, pady=8, sticky="ew")
 
 
     # ===== ações =====
-    def show_system_info(self):
-        logging.info("==== Informações do Sistema ====")
-        logging.info("Usuário: %s", os.environ.get('USERNAME'))
-        logging.info("Computador: %s", os.environ.get('COMPUTERNAME'))
-        if HAS_PSUTIL:
-            try:
-                vm = psutil.virtual_memory()
-                logging.info("RAM: %s livre de %s", human_size(vm.available), human_size(vm.total))
-                cpu_freq = psutil.cpu_freq()
-                if cpu_freq:
-                    logging.info("CPU: %d núcleos, %.0f MHz", psutil.cpu_count(logical=True), cpu_freq.current)
-                for d in psutil.disk_partitions():
-                    try:
-                        usage = psutil.disk_usage(d.mountpoint)
-                        logging.info("Disco %s: %s livres de %s", d.device, human_size(usage.free), human_size(usage.total))
-                    except Exception:
-                        pass
-            except Exception:
-                pass
+    def show_system_info(self, max_age: float | None = None):
+        # roda num job após o primeiro quadro; cada partição tem tempo limite
+        # próprio, e removíveis/rede chegam num segundo evento
+        last = None
+        for last in (iter_system_info() if max_age is None else iter_system_info(max_age)):
+            self.jobs.call_soon(self._sysinfo_show, last)
+        if last is not None: last.log()
         logging.info("Log em: %s", self.log_path)
-
-    def _thumbs_action(self, dry_run: bool):
-        cnt, total = clear_thumbnail_cache(dry_run=dry_run)
-        if dry_run:
-            messagebox.showinfo(self.app_name, f"Miniaturas (pré-visualização):\nArquivos: {cnt}\nTamanho: {human_size(total)}")
-        else:
-            messagebox.showinfo(self.app_name, f"Miniaturas removidas:\nArquivos: {cnt}\nTotal: {human_size(total)}")
-
-    def _browser_cache_action(self, dry_run: bool):
-        cnt, total = clear_all_browser_caches(dry_run=dry_run)
-        if dry_run:
-            messagebox.showinfo(self.app_name, f"Pré-visualização (todos os navegadores):\nArquivos: {cnt}\nTamanho: {human_size(total)}")
+        return last
+
+    def _build_tab_sys(self):
+        f = self.tab_sys
+        top = ttk.Frame(f, style="App.TFrame"); top.pack(fill='x', padx=12, pady=(12, 6))
+        self._job_btn(top, '🔄  Atualizar', lambda b: self._run(b, self.show_system_info, 0.0, resource=RES_LIGHT),
+                      style="Secondary.TButton").pack(side='left')
+        self.sys_status = ttk.Label(top, text='Coletando…', background=LIGHT_BG, foreground=TEXT_MUTE)
+        self.sys_status.pack(side='left', padx=12)
+        box = ttk.LabelFrame(f, text='Computador', style="Card.TLabelframe"); box.pack(fill='x', padx=12, pady=6)
+        self.sys_summary = ttk.Label(box, text='', background=CARD_BG, justify='left')
+        self.sys_summary.pack(anchor='w', padx=8, pady=8)
+        parts = ttk.LabelFrame(f, text='Partições', style="Card.TLabelframe")
+        parts.pack(fill='both', expand=True, padx=12, pady=(6, 12))
+        t = ttk.Treeview(parts, columns=('tipo', 'livre', 'total', 'uso'), height=10)
+        t.heading('#0', text='Unidade'); t.column('#0', width=200)
+        for col, text, width in (('tipo', 'Tipo', 110), ('livre', 'Livre', 110), ('total', 'Total', 110), ('uso', 'Uso', 140)):
+            t.heading(col, text=text); t.column(col, width=width, anchor='e' if col != 'tipo' else 'w', stretch=False)
+        t.pack(fill='both', expand=True, padx=8, pady=8)
+        self.sys_parts = t
+        if self._sysinfo is not None: self._sysinfo_show(self._sysinfo)
+
+    SYS_KINDS = {'fixed': 'fixa', 'removable': 'removível', 'remote': 'rede', 'cdrom': 'CD/DVD'}
+
+    def _sysinfo_show(self, info):
+        self._sysinfo = info
+        if self.sys_parts is None: return   # aba ainda não montada
+        lines = [f"Usuário: {info.user or '—'}    Computador: {info.computer or '—'}"]
+        if info.ram_total: lines.append(f"RAM: {human_size(info.ram_free)} livre de {human_size(info.ram_total)}")
+        lines.append(f"CPU: {info.cpu_count} núcleos" + (f", {info.cpu_mhz:.0f} MHz" if info.cpu_mhz else ''))
+        self.sys_summary.configure(text="\n".join(lines))
+        t = self.sys_parts
+        t.delete(*t.get_children())
+        for p in info.partitions:
+            if p.ok:
+                pct = (p.total - p.free) * 100 / p.total if p.total else 0
+                values = (self.SYS_KINDS.get(p.kind, p.kind), human_size(p.free), human_size(p.total), f"{pct:.0f}%")
+            else:
+                values = (self.SYS_KINDS.get(p.kind, p.kind), '', '', "sem resposta" if p.timed_out else p.error)
+            t.insert('', 'end', text=p.device, values=values)
+        when = datetime.fromtimestamp(info.collected_at).strftime('%H:%M:%S') if info.collected_at else '—'
+        self.sys_status.configure(text=f"Coletado às {when} em {info.elapsed:.1f} s"
+                                  + ("" if info.done else " • consultando unidades removíveis/de rede…"))
+
+    def _thumbs_action(self, dry_run: bool, btn=None):
+        plan = None if dry_run else self._thumbs_plan
+
+        def work():
+            p = plan or plan_thumbnail_cache()
+            return p, drain(iter_clear_thumbnail_cache(dry_run, plan=p))
+
+        def done(job):
+            p, ev = job.result
+            cnt, total = ev.result
+            self._thumbs_plan = p if dry_run else None
+            if dry_run:
+                messagebox.showinfo(self.app_name, f"Miniaturas (pré-visualização):\nArquivos: {cnt}\nTamanho: {human_size(total)}")
+            else:
+                messagebox.showinfo(self.app_name, f"Miniaturas removidas:\nArquivos: {cnt}\nTotal: {human_size(total)}")
+        self._run(btn, work, resource=RES_DISK, on_done=done)
+
+    def _cache_budget(self):
+        if not self.cache_budget_on.get(): return None
+        try: mb = int(self.cache_budget_mb.get())
+        except (tk.TclError, ValueError): mb = 256
+        scope = 'root' if self.cache_budget_scope.get() == 'por pasta' else 'group'
+        return ByteBudget(cap=max(1, mb) * 1024 * 1024, scope=scope)
+
+    def _browser_cache_action(self, dry_run: bool, btn=None):
+        token = CancelToken(); self._cache_cancel = token
+        budget = self._cache_budget()
+        full_scan = self.cache_full_scan.get()
+        plan = None if full_scan else self._cache_plan
+        if plan is not None and plan.budget != budget: plan = None   # orçamento mudou desde a pré-visualização
+        expected = 0 if dry_run or plan is None else plan.count
+        if expected:
+            self.cache_progress.configure(mode='determinate', maximum=expected, value=0)
         else:
-            messagebox.showinfo(self.app_name, f"Limpeza concluída:\nArquivos apagados: {cnt}\nTotal: {human_size(total)}")
+            self.cache_progress.configure(mode='indeterminate'); self.cache_progress.start(15)
+        self.cache_cancel_btn.state(['!disabled'])
+
+        def events(p):
+            # pré-visualização gera/atualiza o plano; a limpeza executa o plano sem varrer de novo
+            if plan is None: yield from p.iter_build(cancel=token)
+            elif dry_run: yield from p.iter_revalidate(enumerate_browser_cache_paths(), cancel=token)
+            if not dry_run and not token.cancelled: yield from p.iter_execute(cancel=token)
+
+        def work():
+            p = plan or plan_browser_caches(budget=budget, force_rescan=full_scan); last = None
+            for last in events(p):
+                self.jobs.call_soon(self._cache_progress_update, last)
+            return p, last
+
+        def finish():
+            self.cache_progress.stop(); self.cache_cancel_btn.state(['disabled'])
+
+        def failed(job):
+            finish(); self.jobs.report_error(job)
+
+        def done(job):
+            p, ev = job.result
+            self._cache_progress_update(ev); finish()
+            cnt, total = ev.result
+            self._cache_plan = p if dry_run and not ev.cancelled else None
+            if dry_run:
+                msg = f"Pré-visualização (todos os navegadores):\nArquivos: {cnt}\nTamanho: {human_size(total)}"
+                if p.shrink:
+                    msg += "\n\n" + "\n".join(f"{g.name}: {human_size(g.bytes)} → {human_size(g.after)}"
+                                               for g in sorted(p.shrink.values(), key=lambda g: g.name))
+                messagebox.showinfo(self.app_name, msg)
+            elif ev.cancelled:
+                messagebox.showwarning(self.app_name, f"Limpeza cancelada:\nArquivos apagados: {cnt}\nTotal: {human_size(total)}")
+            else:
+                messagebox.showinfo(self.app_name, f"Limpeza concluída:\nArquivos apagados: {cnt}\nTotal: {human_size(total)}")
+        self._run(btn, work, resource=RES_DISK, on_done=done, on_error=failed)
+
+    # ----- uso de disco -----
+    def _build_tab_disk(self):
+        f = self.tab_disk
+        top = ttk.Frame(f, style="App.TFrame"); top.pack(fill='x', padx=12, pady=10)
+        default = os.environ.get('SystemDrive', '') + '\\' if os.name == 'nt' else os.path.expanduser('~')
+        self.disk_path = tk.StringVar(value=default)
+        ttk.Entry(top, textvariable=self.disk_path, width=60).pack(side='left')
+        ttk.Button(top, text='📁', width=3, style="Secondary.TButton",
+                   command=lambda: self._ask_dir(self.disk_path)).pack(side='left', padx=(4, 8))
+        self.disk_scan_btn = self._job_btn(top, '📊  Analisar', self._disk_scan, style="Primary.TButton")
+        self.disk_scan_btn.pack(side='left')
+        self.disk_cancel_btn = ttk.Button(top, text='⏹  Cancelar', command=self._disk_cancel, style="Danger.TButton")
+        self.disk_cancel_btn.pack(side='left', padx=6); self.disk_cancel_btn.state(['disabled'])
+        self.disk_status = ttk.Label(f, text='', background=LIGHT_BG, foreground=TEXT_MUTE)
+        self.disk_status.pack(anchor='w', padx=12)
+
+        panes = ttk.PanedWindow(f, orient='horizontal'); panes.pack(fill='both', expand=True, padx=12, pady=(6, 12))
+        left = ttk.Frame(panes, style="App.TFrame"); right = ttk.Frame(panes, style="App.TFrame")
+        panes.add(left, weight=3); panes.add(right, weight=2)
+        self.disk_tree = ttk.Treeview(left, columns=('tamanho', 'arquivos', 'pct'), height=16)
+        self.disk_tree.heading('#0', text='Pasta'); self.disk_tree.column('#0', width=320)
+        self.disk_tree.heading('tamanho', text='Tamanho'); self.disk_tree.column('tamanho', width=90, anchor='e', stretch=False)
+        self.disk_tree.heading('arquivos', text='Arquivos'); self.disk_tree.column('arquivos', width=80, anchor='e', stretch=False)
+        self.disk_tree.heading('pct', text='%'); self.disk_tree.column('pct', width=60, anchor='e', stretch=False)
+        self.disk_tree.pack(fill='both', expand=True)
+        self.disk_tree.bind('<<TreeviewOpen>>', self._disk_expand)
+        self.disk_files = ttk.Treeview(right, columns=('tamanho',), height=16)
+        self.disk_files.heading('#0', text='Maiores arquivos'); self.disk_files.column('#0', width=300)
+        self.disk_files.heading('tamanho', text='Tamanho'); self.disk_files.column('tamanho', width=90, anchor='e', stretch=False)
+        self.disk_files.pack(fill='both', expand=True)
+        self._disk_usage = None      # UsageTree da última análise completa
+        self._disk_cancel_token: CancelToken | None = None
+
+    def _disk_cancel(self):
+        if self._disk_cancel_token:
+            self._disk_cancel_token.cancel(); self.disk_status.configure(text="Cancelando…")
+
+    DISK_CHILDREN = 200   # subpastas mostradas por nível
+
+    def _disk_rows(self, tree, parent: int) -> list[tuple]:
+        """(índice, nome, bytes, arquivos, tem_filhos) das maiores subpastas; roda fora da thread do Tk."""
+        start, _ = tree._child_index()
+        return [(k, tree.names[k], tree.total_bytes[k], tree.total_files[k], start[k + 1] > start[k])
+                for k in tree.children(parent, self.DISK_CHILDREN)]
+
+    def _disk_fill(self, parent_iid: str, rows, total: int):
+        t = self.disk_tree
+        for item in t.get_children(parent_iid): t.delete(item)
+        for k, name, nbytes, nfiles, has_kids in rows:
+            iid = str(k)
+            t.insert(parent_iid, tk.END, iid=iid, text=name,
+                     values=(human_size(nbytes), nfiles, f"{nbytes * 100 / total:.1f}" if total else ''))
+            if has_kids: t.insert(iid, tk.END, iid=f"{iid}:…", text='…')
+
+    def _disk_expand(self, _event=None):
+        tree = self._disk_usage
+        iid = self.disk_tree.focus()
+        if tree is None or not iid or not self.disk_tree.exists(f"{iid}:…"): return
+        self._disk_fill(iid, self._disk_rows(tree, int(iid)), tree.total_bytes[0])
+
+    def _disk_show(self, ev, rows, files):
+        txt = f"Pastas: {ev.dirs} • Arquivos: {ev.files} • Tamanho: {human_size(ev.bytes)} • {ev.elapsed:.1f} s"
+        if ev.errors: txt += f" • Sem acesso: {ev.errors}"
+        if ev.cancelled: txt += " • cancelado"
+        self.disk_status.configure(text=txt)
+        self._disk_fill('', rows, ev.bytes)
+        self.disk_files.delete(*self.disk_files.get_children())
+        for path, size in files:
+            self.disk_files.insert('', tk.END, text=path, values=(human_size(size),))
+
+    def _disk_scan(self, btn=None):
+        root = self.disk_path.get().strip()
+        if not root or not os.path.isdir(root):
+            messagebox.showwarning(self.app_name, "Pasta inválida."); return
+        token = CancelToken(); self._disk_cancel_token = token
+        self._disk_usage = None
+        self.disk_cancel_btn.state(['!disabled'])
+
+        def work():
+            last = None
+            for last in iter_disk_usage(root, cancel=token, interval=0.5):
+                # totais parciais e linhas montados aqui; a interface só insere
+                if not last.done: last.tree.rollup()
+                self.jobs.call_soon(self._disk_show, last, self._disk_rows(last.tree, 0),
+                                    last.tree.largest_files(50))
+            return last
+
+        def done(job):
+            self.disk_cancel_btn.state(['disabled'])
+            self._disk_usage = job.result.tree if job.result is not None else None
+
+        def failed(job):
+            self.disk_cancel_btn.state(['disabled']); self.jobs.report_error(job)
+        self._run(btn, work, resource=RES_DISK, on_done=done, on_error=failed, name='análise de disco')
+
+    # ----- duplicados -----
+    def _build_tab_dups(self):
+        f = self.tab_dups
+        top = ttk.Frame(f, style="App.TFrame"); top.pack(fill='x', padx=12, pady=10)
+        self.dup_path = tk.StringVar(value=os.path.expanduser('~'))
+        self.dup_min_kb = tk.IntVar(value=1)
+        ttk.Entry(top, textvariable=self.dup_path, width=50).pack(side='left')
+        ttk.Button(top, text='📁', width=3, style="Secondary.TButton",
+                   command=lambda: self._ask_dir(self.dup_path)).pack(side='left', padx=(4, 8))
+        ttk.Label(top, text='Mínimo (KB):', background=LIGHT_BG).pack(side='left')
+        ttk.Spinbox(top, from_=0, to=1048576, increment=64, width=7, textvariable=self.dup_min_kb).pack(side='left', padx=4)
+        self._job_btn(top, '🔍  Procurar', self._dup_find, style="Primary.TButton").pack(side='left', padx=6)
+        self.dup_cancel_btn = ttk.Button(top, text='⏹  Cancelar', style="Danger.TButton",
+                                         command=lambda: self._dup_cancel and self._dup_cancel.cancel())
+        self.dup_cancel_btn.pack(side='left'); self.dup_cancel_btn.state(['disabled'])
+        self.dup_status = ttk.Label(f, text='', background=LIGHT_BG, foreground=TEXT_MUTE)
+        self.dup_status.pack(anchor='w', padx=12)
+
+        self.dup_tree = ttk.Treeview(f, columns=('tamanho', 'modificado'), height=16, selectmode='extended')
+        self.dup_tree.heading('#0', text='Arquivo'); self.dup_tree.column('#0', width=560)
+        self.dup_tree.heading('tamanho', text='Tamanho'); self.dup_tree.column('tamanho', width=100, anchor='e', stretch=False)
+        self.dup_tree.heading('modificado', text='Modificado'); self.dup_tree.column('modificado', width=130, stretch=False)
+        self.dup_tree.pack(fill='both', expand=True, padx=12, pady=(6, 6))
+        bottom = ttk.Frame(f, style="App.TFrame"); bottom.pack(fill='x', padx=12, pady=(0, 12))
+        ttk.Button(bottom, text='☑  Marcar cópias extras (manter a mais antiga)', style="Secondary.TButton",
+                   command=self._dup_mark_extras).pack(side='left')
+        self._job_btn(bottom, '🗑  Enviar marcados para a Lixeira', self._dup_delete,
+                      style="Danger.TButton").pack(side='right')
+        self._dup_groups = []            # DuplicateGroup na ordem de chegada
+        self._dup_files = {}             # iid -> (índice do grupo, FileEntry)
+        self._dup_cancel: CancelToken | None = None
+
+    def _ask_dir(self, var):
+        d = filedialog.askdirectory(initialdir=var.get() or None)
+        if d: var.set(d)
+
+    def _dup_add_groups(self, groups):
+        for g in groups:
+            gi = len(self._dup_groups); self._dup_groups.append(g)
+            gid = f"g{gi}"
+            self.dup_tree.insert('', tk.END, iid=gid, open=True,
+                                 text=f"{len(g.files)} cópias • {human_size(g.wasted)} repetidos",
+                                 values=(human_size(g.size), ''))
+            for j, fe in enumerate(g.files):
+                iid = f"{gid}:{j}"; self._dup_files[iid] = (gi, fe)
+                self.dup_tree.insert(gid, tk.END, iid=iid, text=fe[0],
+                                     values=(human_size(fe[1]), datetime.fromtimestamp(fe[2]).strftime('%Y-%m-%d %H:%M')))
+
+    def _dup_show(self, ev):
+        stage = {'scan': 'listando', 'partial': 'hash parcial', 'full': 'hash completo'}.get(ev.stage, ev.stage)
+        txt = (f"{'Concluído' if ev.done else stage.capitalize()} • Arquivos: {ev.scanned} • Candidatos: {ev.candidates}"
+               f" • Grupos: {ev.found} • Repetido: {human_size(ev.wasted)} • Lido: {human_size(ev.hashed_bytes)}")
+        if ev.errors: txt += f" • Erros: {ev.errors}"
+        if ev.cancelled: txt += " • cancelado"
+        self.dup_status.configure(text=txt)
+        self._dup_add_groups(ev.groups)
+
+    def _dup_find(self, btn=None):
+        root = self.dup_path.get().strip()
+        if not root or not os.path.isdir(root):
+            messagebox.showwarning(self.app_name, "Pasta inválida."); return
+        try: min_size = max(0, int(self.dup_min_kb.get())) * 1024
+        except (tk.TclError, ValueError): min_size = 1024
+        token = CancelToken(); self._dup_cancel = token
+        self.dup_tree.delete(*self.dup_tree.get_children()); self._dup_groups = []; self._dup_files = {}
+        self.dup_cancel_btn.state(['!disabled'])
+
+        def work():
+            for ev in iter_find_duplicates([root], min_size=min_size, cancel=token, interval=0.3):
+                self.jobs.call_soon(self._dup_show, ev)
+
+        def finish(job):
+            self.dup_cancel_btn.state(['disabled'])
+            if not job.ok: self.jobs.report_error(job)
+        self._run(btn, work, resource=RES_DISK, on_done=finish, on_error=finish, name='duplicados')
+
+    def _dup_mark_extras(self):
+        extras = set(select_extras(self._dup_groups))
+        self.dup_tree.selection_set([iid for iid, (_, fe) in self._dup_files.items() if fe in extras])
+
+    def _dup_delete(self, btn=None):
+        chosen = [self._dup_files[i] for i in self.dup_tree.selection() if i in self._dup_files]
+        if not chosen: return
+        per_group: dict[int, int] = {}
+        for gi, _ in chosen: per_group[gi] = per_group.get(gi, 0) + 1
+        if any(n >= len(self._dup_groups[gi].files) for gi, n in per_group.items()):
+            messagebox.showwarning(self.app_name, "Todas as cópias de um grupo estão marcadas; mantenha ao menos uma.")
+            return
+        entries = [fe for _, fe in chosen]
+        if not messagebox.askyesno(self.app_name, f"Enviar {len(entries)} arquivo(s) "
+                                   f"({human_size(sum(fe[1] for fe in entries))}) para a Lixeira?"):
+            return
+
+        def done(job):
+            ev = job.result; gone = set(entries)
+            for iid in [i for i, (_, fe) in self._dup_files.items() if fe in gone]:
+                if self.dup_tree.exists(iid): self.dup_tree.delete(iid)
+            msg = f"Removidos: {ev.deleted} • {human_size(ev.bytes)}"
+            if ev.skipped: msg += f"\nMantidos (alterados desde a busca): {ev.skipped}"
+            if ev.errors: msg += f"\nFalhas: {ev.errors}"
+            messagebox.showinfo(self.app_name, msg)
+        self._run(btn, lambda: drain(iter_delete_duplicates(entries)), resource=RES_DISK, on_done=done)
+
+    def _cache_progress_update(self, ev):
+        if ev is None: return
+        if str(self.cache_progress.cget('mode')) == 'determinate':
+            self.cache_progress.configure(value=min(ev.deleted, self.cache_progress.cget('maximum')))
+        txt = f"Arquivos: {ev.scanned} • Tamanho: {human_size(ev.bytes)}"
+        if not ev.dry_run:
+            txt += f" • Apagados: {ev.deleted} • Erros: {ev.errors}"
+        self.cache_status.configure(text=txt)
+
+    def _cancel_cache_action(self):
+        if self._cache_cancel:
+            self._cache_cancel.cancel()
+            self.cache_status.configure(text="Cancelando…")
+
+    def _startup_buttons(self):
+        return (self.start_refresh_btn, self.start_disable_btn, self.start_enable_btn)
+
+    def _startup_row(self, e):
+        row = (e.location, e.name, 'Habilitado' if e.enabled else 'Desabilitado', e.command)
+        info = self._startup_info.get(e.key)
+        if info is None: return row + ('…', '', '', '')
+        if info.missing: return row + (f"⚠ ausente: {info.path or '?'}", '', '', '')
+        return row + (info.path, human_size(info.size), datetime.fromtimestamp(info.mtime).strftime('%Y-%m-%d %H:%M'),
+                      (info.sha256 or '')[:16])
+
+    def _analyze_startup(self, snap):
+        commands = {e.key: e.command for e in snap.entries}
+
+        def show(key, info):
+            if self._startup_snap is not snap: return  # lista já foi recarregada
+            self._startup_info[key] = info
+            e = snap.get(key)
+            if e is not None and self.tree.exists(key): self.tree.item(key, values=self._startup_row(e))
+
+        def work():
+            for key, info in iter_analyze(commands):
+                self.jobs.call_soon(show, key, info)
+        self.jobs.submit(work, resource=RES_LIGHT, name='análise de inicialização')
 
     def refresh_startup(self):
-        for item in self.tree.get_children(): self.tree.delete(item)
-        items = list_startup_entries()
-        if not items:
-            messagebox.showinfo(self.app_name, "Nenhum item encontrado ou sem permissão."); return
-        for (loc, name, cmd) in items:
-            self.tree.insert('', tk.END, values=(loc, name, cmd))
-
-    def _selected_startup_name(self) -> str | None:
-        sel = self.tree.selection()
-        if not sel: return None
-        vals = (self.tree.item(sel[0]).get('values') or [])
-        return vals[1] if len(vals) >= 2 else None
+        def done(job):
+            self._startup_snap = snap = job.result
+            self._startup_info = {}
+            for item in self.tree.get_children(): self.tree.delete(item)
+            if snap is None or not snap.entries:
+                messagebox.showinfo(self.app_name, "Nenhum item encontrado ou sem permissão."); return
+            for e in snap.entries:
+                self.tree.insert('', tk.END, iid=e.key, values=self._startup_row(e))
+            self._analyze_startup(snap)
+        self.jobs.submit(load_startup_snapshot, resource=RES_LIGHT, widgets=self._startup_buttons(), on_done=done)
+
+    def _set_selected_enabled(self, enabled: bool):
+        snap = self._startup_snap
+        selected = [snap.get(iid) for iid in self.tree.selection()] if snap else []
+        selected = [e for e in selected if e is not None]
+        if not selected: messagebox.showinfo(self.app_name, "Selecione um ou mais itens na lista."); return
+        pending = [e for e in selected if e.enabled != enabled]
+
+        def done(job):
+            # o snapshot já foi atualizado no lugar: só as linhas alteradas são redesenhadas
+            for e in job.result:
+                if self.tree.exists(e.key): self.tree.item(e.key, values=self._startup_row(e))
+            failed = len(pending) - len(job.result)
+            msg = f"Itens alterados: {len(job.result)}"
+            if failed: msg += f"\nFalhas: {failed}. Veja logs."
+            messagebox.showinfo(self.app_name, msg)
+        self.jobs.submit(snap.set_enabled, pending, enabled, resource=RES_LIGHT,
+                         widgets=self._startup_buttons(), on_done=done)
 
     def disable_selected(self):
-        name = self._selected_startup_name()
-        if not name: messagebox.showinfo(self.app_name, "Selecione um item na lista."); return
-        ok = disable_startup_entry(name)
-        messagebox.showinfo(self.app_name, "OK" if ok else "Falhou. Veja logs."); self.refresh_startup()
+        self._set_selected_enabled(False)
 
     def enable_selected(self):
-        name = self._selected_startup_name()
-        if not name: messagebox.showinfo(self.app_name, "Selecione um item na lista."); return
-        ok = enable_startup_entry(name)
-        messagebox.showinfo(self.app_name, "OK" if ok else "Falhou. Veja logs."); self.refresh_startup()
-
-    def _action_optimize_drives(self):
-        import time as _t
-        start = _t.time()
-        ok = optimize_drives()
-        elapsed = _t.time() - start
-        mins = int(elapsed // 60); secs = int(elapsed % 60)
-        if ok:
-            messagebox.showinfo(self.app_name, f"Otimização concluída com sucesso!\n\nDuração: {mins} min {secs} s\nVeja o log para detalhes.")
-        else:
-            messagebox.showwarning(self.app_name, f"Otimização finalizada com avisos/erros.\n\nDuração: {mins} min {secs} s\nVeja o log para detalhes.")
-
-    def _action_optimize_ram(self):
-        import time as _t
-        start = _t.time()
-        ok_count, tries = optimize_memory_ram()
-        elapsed = _t.time() - start
-        mins = int(elapsed // 60); secs = int(elapsed % 60)
-        messagebox.showinfo(self.app_name,
-            f"Memória otimizada!\n\nProcessos ajustados: {ok_count} de {tries}\nDuração: {mins} min {secs} s")
+        self._set_selected_enabled(True)
+
+    # ===== manutenção em etapas =====
+    PIPE_STATES = {'pending': 'na fila', 'running': 'rodando', 'ok': 'ok', 'failed': 'falhou',
+                   'error': 'erro', 'skipped': 'pulada'}
+
+    def _pipe_cancel(self):
+        if self._pipe_cancel_token: self._pipe_cancel_token.cancel()
+
+    def _pipe_show(self, ev):
+        t = self.pipe_tree
+        for st in ev.steps:
+            res = st.result; detail = ''
+            if res is not None:
+                if res.error: detail = res.error
+                elif 'files' in res.data: detail = f"{res.data['files']} arquivos • {human_size(res.data['bytes'])}"
+                elif 'bytes' in res.data: detail = f"{human_size(res.data['bytes'])} devolvidos"
+            values = (self.PIPE_STATES.get(st.state, st.state), f"{st.elapsed:.1f} s" if st.elapsed else '', detail)
+            if t.exists(st.name): t.item(st.name, values=values)
+            else: t.insert('', 'end', iid=st.name, text=st.title, values=values)
+
+    def _pipe_run(self, dry_run: bool, btn=None):
+        profile = self._pipe_profiles.get(self.pipe_profile.get())
+        if profile is None: return
+        try:
+            pipeline = Pipeline(profile)
+        except ValueError as e:
+            messagebox.showwarning(self.app_name, f"Perfil inválido: {e}"); return
+        if not dry_run and not messagebox.askyesno(self.app_name, f"Executar o perfil \"{profile.title}\"?\n\n"
+                                                   f"Etapas: {', '.join(profile.actions)}"):
+            return
+        token = CancelToken(); self._pipe_cancel_token = token
+        self.pipe_tree.delete(*self.pipe_tree.get_children())
+        self.pipe_cancel_btn.state(['!disabled'])
+
+        def work():
+            # as etapas vão para os pools do mesmo JobRunner da interface
+            last = None
+            for last in pipeline.iter_run(dry_run, token, runner=self.jobs.runner):
+                self.jobs.call_soon(self._pipe_show, last)
+            return last
+
+        def done(job):
+            self.pipe_cancel_btn.state(['disabled'])
+            if not job.ok: self.jobs.report_error(job); return
+            ev = job.result; s = ev.summary()
+            files, nbytes = ev.result
+            msg = (f"Perfil \"{profile.title}\" {'simulado' if dry_run else 'concluído'} em {s['elapsed']:.0f} s "
+                   f"({s['serial']:.0f} s se em série).\n\nArquivos: {files} • {human_size(nbytes)}")
+            if ev.cancelled: msg += "\nCancelado."
+            (messagebox.showinfo if ev.ok else messagebox.showwarning)(self.app_name, msg)
+        self._run(btn, work, resource=RES_PIPELINE, on_done=done, on_error=done, name='pipeline')
+
+    def _action_restore_point(self, btn=None):
+        self._run(btn, create_restore_point, f"WinOptimizer {datetime.now().strftime('%Y-%m-%d %H:%M')}",
+                  resource=RES_PROCESS)
+
+    def _action_optimize_drives(self, btn=None):
+        win = self._defrag_win
+        if win is not None and win.winfo_exists():
+            # uma janela só: a aberta volta para a frente
+            win.deiconify(); win.lift(); win.focus_set()
+            return
+
+        def done(job):
+            mins = int(job.elapsed // 60); secs = int(job.elapsed % 60)
+            if job.result:
+                messagebox.showinfo(self.app_name, f"Otimização concluída com sucesso!\n\nDuração: {mins} min {secs} s\nVeja o log para detalhes.")
+            else:
+                messagebox.showwarning(self.app_name, f"Otimização finalizada com avisos/erros.\n\nDuração: {mins} min {secs} s\nVeja o log para detalhes.")
+
+        def listed(job):
+            # sem a lista de volumes, cai no `defrag /C` de uma vez só
+            if job.result: self._defrag_win = self._defrag_window(job.result)
+            else: self._run(btn, optimize_drives, resource=RES_DISK, on_done=done)
+        self._run(btn, list_volumes, resource=RES_PROCESS, on_done=listed)
+
+    def _defrag_window(self, volumes):
+        """Janela por unidade: progresso do /U, pular/cancelar cada uma e duração."""
+        run = DefragRun(volumes); token = CancelToken()
+        win = tk.Toplevel(self); win.title("Otimizar unidades"); win.configure(background=LIGHT_BG)
+        win.transient(self); win.geometry('640x320')
+        tree = ttk.Treeview(win, columns=('tipo', 'estado', 'progresso', 'duracao'), height=8)
+        tree.heading('#0', text='Unidade'); tree.column('#0', width=90, stretch=False)
+        for col, text, width in (('tipo', 'Tipo', 80), ('estado', 'Estado', 120), ('progresso', 'Progresso', 200),
+                                 ('duracao', 'Duração', 90)):
+            tree.heading(col, text=text); tree.column(col, width=width, anchor='w')
+        tree.pack(fill='both', expand=True, padx=12, pady=(12, 6))
+        bar = ttk.Frame(win, style="App.TFrame"); bar.pack(fill='x', padx=12, pady=(0, 12))
+
+        def show(ev):
+            if not tree.winfo_exists(): return
+            for st in ev.volumes:
+                prog = f"{st.phase} {st.percent:.0f}%" if st.phase else ''
+                mins, secs = divmod(int(st.elapsed), 60)
+                values = (st.volume.media.upper(), state_text(st.state), prog, f"{mins} min {secs:02d} s" if st.elapsed else '')
+                if tree.exists(st.volume.letter): tree.item(st.volume.letter, values=values)
+                else: tree.insert('', 'end', iid=st.volume.letter, text=st.volume.path, values=values)
+        show(run.snapshot(time.perf_counter()))
+
+        def skip_selected():
+            for letter in tree.selection(): run.skip(letter)
+            show(run.snapshot(time.perf_counter()))
+
+        def work():
+            last = None
+            for last in run.iter_run(token, interval=0.5): self.jobs.call_soon(show, last)
+            return last
+
+        def done(job):
+            # a janela pode ter sido fechada (cancelando a execução) antes do fim
+            alive = bool(win.winfo_exists())
+            if alive: cancel_all.state(['disabled'])
+            if not job.ok: self.jobs.report_error(job); return
+            ev = job.result
+            if ev is None or not alive: return
+            failed = [st.volume.path for st in ev.volumes if not st.ok]
+            if failed: messagebox.showwarning(self.app_name, f"Unidades com avisos/erros: {', '.join(failed)}\nVeja o log para detalhes.", parent=win)
+            else: messagebox.showinfo(self.app_name, "Otimização concluída com sucesso!", parent=win)
+
+        start = ttk.Button(bar, text='▶  Iniciar', style="Primary.TButton")
+        start.configure(command=lambda: (start.state(['disabled']), cancel_all.state(['!disabled']),
+                                         self.jobs.submit(work, resource=RES_DISK, on_done=done, on_error=done,
+                                                         name='defrag')))
+        start.pack(side='left')
+        ttk.Button(bar, text='⏭  Pular/cancelar selecionadas', command=skip_selected,
+                   style="Secondary.TButton").pack(side='left', padx=6)
+        cancel_all = ttk.Button(bar, text='⏹  Cancelar tudo', command=token.cancel, style="Danger.TButton")
+        cancel_all.pack(side='left'); cancel_all.state(['disabled'])
+        win.protocol('WM_DELETE_WINDOW', lambda: (token.cancel(), win.destroy()))
+        return win
+
+    def _action_optimize_ram(self, btn=None):
+        def work():
+            logging.info("Otimizando memória RAM…")
+            report = trim_memory(); report.log()
+            return report
+
+        def done(job):
+            report = job.result
+            mins = int(job.elapsed // 60); secs = int(job.elapsed % 60)
+            top = "\n".join(f"  {r.name}: {human_size(r.freed)}" for r in report.top(5) if r.freed)
+            messagebox.showinfo(self.app_name,
+                f"Memória otimizada!\n\nProcessos ajustados: {report.ok} de {report.tried}\n"
+                f"Memória devolvida: {human_size(report.freed)}\nDuração: {mins} min {secs} s"
+                + (f"\n\nMaiores ganhos:\n{top}" if top else ""))
+        self._run(btn, work, resource=RES_LIGHT, on_done=done)
@@ -0,0 +1,78 @@
+from __future__ import annotations
+import logging, queue, threading
+from tkinter import messagebox
+
+from system.jobs import Job, JobRunner, RES_LIGHT
+
+POLL_MS = 50
+
+class TkJobExecutor:
+    """
+    Roda ações fora da thread do Tk e devolve os resultados via after():
+    os callbacks (on_done/on_error) sempre executam na thread da interface.
+    """
+    def __init__(self, root, runner: JobRunner | None = None, poll_ms: int = POLL_MS):
+        self.root = root
+        self.runner = runner or JobRunner()
+        self.poll_ms = poll_ms
+        self._done: queue.Queue = queue.Queue()
+        self._pending = 0
+        self._polling = False
+        self._poll_lock = threading.Lock()   # call_soon agenda o _poll também a partir de workers
+
+    def submit(self, fn, *args, resource: str = RES_LIGHT, widgets=(), on_done=None, on_error=None,
+               name: str | None = None, **kwargs) -> Job:
+        widgets = [w for w in widgets if w is not None]
+        for w in widgets:
+            try: w.state(['disabled'])
+            except Exception: pass
+        job = self.runner.submit(fn, *args, resource=resource, name=name, **kwargs)
+        self._pending += 1
+        job.future.add_done_callback(lambda _f: self._done.put((job, widgets, on_done, on_error)))
+        self._schedule()
+        return job
+
+    def call_soon(self, fn, *args) -> None:
+        """Agenda `fn(*args)` na thread da interface (seguro a partir de workers)."""
+        self._done.put((None, (), lambda _job: fn(*args), None))
+        self._schedule()
+
+    @property
+    def busy(self) -> bool:
+        return self._pending > 0
+
+    def shutdown(self) -> None:
+        self.runner.shutdown(wait=False)
+
+    def _schedule(self) -> None:
+        with self._poll_lock:
+            if self._polling: return
+            self._polling = True
+        self.root.after(self.poll_ms, self._poll)
+
+    def _poll(self) -> None:
+        with self._poll_lock:
+            self._polling = False
+        while True:
+            try: job, widgets, on_done, on_error = self._done.get_nowait()
+            except queue.Empty: break
+            if job is not None:
+                self._pending -= 1
+            for w in widgets:
+                try: w.state(['!disabled'])
+                except Exception: pass
+            try:
+                if job is None or job.ok:
+                    if on_done: on_done(job)
+                elif on_error:
+                    on_error(job)
+                else:
+                    self.report_error(job)
+            except Exception:
+                logging.exception("Falha no retorno da ação %s", job.name if job else '?')
+        if self._pending > 0 or not self._done.empty():
+            self._schedule()
+
+    def report_error(self, job: Job) -> None:
+        logging.error("Erro em %s: %s", job.name, job.error)
+        messagebox.showerror(getattr(self.root, 'app_name', 'Erro'), f"Falha em {job.name}: {job.error}")
@@ -1,31 +1,79 @@
 from __future__ import annotations
-import os
+import os, glob, hashlib, logging
 import tkinter as tk
-try:
-    from PIL import Image, ImageTk
-    HAS_PIL = True
-except Exception:
-    HAS_PIL = False
 
-from system.os_utils import resource_path
+from system.os_utils import app_cache_dir, resource_path
 
 LOGO_FILENAME = "assets/DTO.png"
 LOGO_SMALL_HEIGHT = 120
 LOGO_LARGE_HEIGHT = 320
 
+# Variantes redimensionadas ficam em cache por usuário, com o hash do
+# arquivo de origem e a altura no nome: nas aberturas seguintes o PNG é
+# carregado direto com tk.PhotoImage, sem importar o PIL. Trocar o asset
+# ou as alturas gera nomes novos (e as variantes antigas são removidas).
+CACHE_SUBDIR = 'logo'
+
+def _source_hash(path: str) -> str:
+    h = hashlib.blake2b(digest_size=8)
+    with open(path, 'rb') as fh:
+        h.update(fh.read())
+    return h.hexdigest()
+
+def _variant_path(cache_dir: str, stem: str, digest: str, height: int) -> str:
+    return os.path.join(cache_dir, f"{stem}-{digest}-{height}.png")
+
+def _render_variants(src: str, targets: dict[int, str]) -> bool:
+    """Recorta pela caixa do alfa e grava cada altura (LANCZOS). Único ponto que usa PIL."""
+    try:
+        from PIL import Image
+    except Exception:
+        return False
+    img = Image.open(src).convert("RGBA")
+    bbox = img.split()[-1].getbbox()
+    if bbox: img = img.crop(bbox)
+    for h, out in targets.items():
+        w = int(round(img.width * (h / img.height)))
+        tmp = out + '.tmp'
+        img.resize((w, h), Image.LANCZOS).save(tmp, format='PNG')
+        os.replace(tmp, out)
+    return True
+
+def _prune(cache_dir: str, stem: str, keep: set[str]) -> None:
+    for p in glob.glob(os.path.join(cache_dir, f"{stem}-*.png")):
+        if p not in keep:
+            try: os.remove(p)
+            except OSError: pass
+
+def cached_logo_paths(heights: tuple[int, ...], src: str | None = None,
+                      cache_dir: str | None = None) -> list[str] | None:
+    """Caminhos das variantes em cache, gerando as que faltam; None se não der."""
+    src = src or resource_path(LOGO_FILENAME)
+    if not os.path.exists(src): return None
+    try:
+        if cache_dir: os.makedirs(cache_dir, exist_ok=True)
+        else: cache_dir = app_cache_dir(CACHE_SUBDIR)
+        stem = os.path.splitext(os.path.basename(src))[0]
+        digest = _source_hash(src)
+        paths = {h: _variant_path(cache_dir, stem, digest, h) for h in heights}
+        missing = {h: p for h, p in paths.items() if not os.path.exists(p)}
+        if missing:
+            if not _render_variants(src, missing): return None
+            logging.debug("Logo: %d variante(s) gerada(s) em %s", len(missing), cache_dir)
+            _prune(cache_dir, stem, set(paths.values()))
+        return [paths[h] for h in heights]
+    except Exception as e:
+        logging.debug("Cache do logo indisponível: %s", e)
+        return None
+
 def load_logo_images(small_h: int = LOGO_SMALL_HEIGHT, large_h: int = LOGO_LARGE_HEIGHT) -> tuple[tk.PhotoImage | None, tk.PhotoImage | None]:
     path = resource_path(LOGO_FILENAME)
     if not os.path.exists(path):
         return None, None
-    if HAS_PIL:
+    cached = cached_logo_paths((small_h, large_h), path)
+    if cached:
         try:
-            img = Image.open(path).convert("RGBA")
-            alpha = img.split()[-1]; bbox = alpha.getbbox()
-            if bbox: img = img.crop(bbox)
-            def make(h):
-                w = int(round(img.width * (h / img.height)))
-                return ImageTk.PhotoImage(img.resize((w, h), Image.LANCZOS))
-            return make(small_h), make(large_h)
+            return tk.PhotoImage(file=cached[0]), tk.PhotoImage(file=cached[1])
         except Exception:
             pass
     try:
@@ -0,0 +1,65 @@
+from __future__ import annotations
+import os, json, time, logging, statistics
+
+# Relatório de tempo de abertura: marcos desde o início do processo
+# (importações, montagem da interface, primeiro quadro). Cada abertura é
+# anexada a um histórico curto para que regressões apareçam no log.
+
+HISTORY_FILENAME = 'startup_times.jsonl'
+HISTORY_KEEP = 30
+REGRESSION_FACTOR = 1.5   # avisa se o primeiro quadro levar 50% a mais que a mediana
+
+class StartupTimer:
+    def __init__(self, t0: float | None = None):
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self.marks: dict[str, float] = {}
+        self._last = self.t0
+        self.phases: dict[str, float] = {}
+
+    def mark(self, name: str) -> float:
+        """Registra o marco `name`; devolve o tempo da fase desde o marco anterior (s)."""
+        now = time.perf_counter()
+        self.marks[name] = now - self.t0
+        self.phases[name] = now - self._last
+        self._last = now
+        return self.phases[name]
+
+    def report(self) -> dict[str, float]:
+        out = {f"{k}_ms": round(v * 1000, 1) for k, v in self.phases.items()}
+        out['total_ms'] = round((self._last - self.t0) * 1000, 1)
+        return out
+
+    def summary(self) -> str:
+        return " • ".join(f"{k}: {v * 1000:.0f} ms" for k, v in self.phases.items()) + \
+               f" • total: {(self._last - self.t0) * 1000:.0f} ms"
+
+    def log(self, history_path: str | None = None) -> None:
+        logging.info("Abertura: %s", self.summary())
+        if history_path is None:
+            try:
+                from system.os_utils import app_cache_dir
+                history_path = os.path.join(app_cache_dir(), HISTORY_FILENAME)
+            except OSError:
+                return
+        rep = self.report()
+        previous = _read_history(history_path)
+        if len(previous) >= 3:
+            median = statistics.median(r.get('total_ms', 0.0) for r in previous)
+            if median and rep['total_ms'] > median * REGRESSION_FACTOR:
+                logging.warning("Abertura mais lenta que o normal: %.0f ms (mediana %.0f ms).", rep['total_ms'], median)
+        _write_history(history_path, previous + [dict(rep, ts=round(time.time()))])
+
+def _read_history(path: str) -> list[dict]:
+    try:
+        with open(path, 'r', encoding='utf-8') as fh:
+            return [json.loads(line) for line in fh if line.strip()][-HISTORY_KEEP:]
+    except (OSError, ValueError):
+        return []
+
+def _write_history(path: str, rows: list[dict]) -> None:
+    try:
+        with open(path, 'w', encoding='utf-8') as fh:
+            for r in rows[-HISTORY_KEEP:]:
+                fh.write(json.dumps(r) + "\n")
+    except OSError as e:
+        logging.debug("Falha ao gravar histórico de abertura: %s", e)